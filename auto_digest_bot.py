@@ -1,23 +1,46 @@
 """
-Telegram бот с автоматической отправкой дайджестов каждые 4 часа.
+Telegram бот с автоматической отправкой дайджестов: каждый источник опрашивается
+по своему расписанию (scheduler.py).
 Также доступны команды для ручного запроса.
 """
 import os
 import asyncio
-from datetime import datetime, time
+import html
+import threading
+from datetime import datetime
+from typing import NamedTuple
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 from dotenv import load_dotenv
-import sqlite3
 from pathlib import Path
 import sys
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from parsers import collect_all_internships
-from db import upsert_and_get_changes, get_internships_count
-from telegram_bot import build_digest_message, build_no_changes_message
+from parsers import SOURCES, SourceOutcome, collect_all_internships
+from parsers.base import Source
+from scheduler import (
+    ProbeOutcome,
+    due_sources,
+    load_schedule,
+    next_run,
+    probe_sources,
+    source_health,
+    update_schedule,
+)
+import db
+from db import Change, upsert_and_get_changes, get_internships_count, load_source_snapshots
+from bot_app import build_application, start_receiving
+from cache import FLIGHT_CACHED, FLIGHT_JOINED, FLIGHT_OWN, SingleFlight, VersionedCache
+from config import CHECK_FRESHNESS_SEC, PROBE_INTERVAL_SEC, SCHEDULE_TICK_SEC
+from delivery import DeliveryEngine
+from telegram_bot import (
+    LIST_OPEN,
+    ListPages,
+    build_no_changes_message,
+    fan_out_digest,
+)
 
 load_dotenv()
 
@@ -26,202 +49,345 @@ BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 DB_PATH = Path(os.getenv("DB_PATH", "./internships.db"))
 
-# Интервал проверки (в часах)
-CHECK_INTERVAL_HOURS = 4
-
-
-def get_open_internships():
-    """Получить открытые стажировки."""
-    if not DB_PATH.exists():
-        return []
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT company, title, status, url 
-        FROM internships 
-        WHERE status LIKE '%Открыт%' 
-           OR status LIKE '%набор%'
-           OR status LIKE '%Идет%'
-           OR status LIKE '%Прием заявок%'
-           OR status LIKE '%Приём заявок%'
-        ORDER BY company, title
-    """)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+# Готовые ответы на команды: живут до следующего изменения данных в БД
+read_cache = VersionedCache(DB_PATH)
+# Постраничные списки /internships и /all: страницы из read_cache, кнопки навигации
+lists = ListPages(DB_PATH, read_cache)
+
+# Полная проверка источников одна на всех: /check присоединяется к идущей,
+# результат моложе CHECK_FRESHNESS_SEC отдаётся без нового сбора
+checks: SingleFlight["CheckResult"] = SingleFlight(CHECK_FRESHNESS_SEC)
+# Плановая проверка части источников - отдельно: её результат не годится в ответ на /check.
+# Параллельно с полной она не запускается, а /check дожидается её окончания
+scheduled: SingleFlight["CheckResult"] = SingleFlight(0)
+# Пробы источников: не идут одновременно ни с одной проверкой, проверки дожидаются их окончания
+probes: SingleFlight[list[ProbeOutcome]] = SingleFlight(0)
+
+
+class CheckProgress:
+    """Ход проверки источников для /stats: этап, сколько источников готово, итог прошлой."""
+
+    def __init__(self) -> None:
+        self.phase: str | None = None  # None - проверка не идёт
+        self.started_at: datetime | None = None
+        self.sources_done = 0
+        self.sources_total = 0
+        self.finished_at: datetime | None = None  # окончание последней проверки (удачной или нет)
+        self.error: str | None = None
+        self._lock = threading.Lock()
+
+    def start(self, sources_total: int) -> None:
+        with self._lock:
+            self.phase = "сбор источников"
+            self.started_at = datetime.now()
+            self.sources_done = 0
+            self.sources_total = sources_total
+
+    def source_done(self, outcome: SourceOutcome) -> None:
+        """Колбэк collect_all_internships(): вызывается из потока сбора."""
+        with self._lock:
+            self.sources_done += 1
+
+    def set_phase(self, phase: str) -> None:
+        with self._lock:
+            self.phase = phase
+
+    def finish(self, error: str | None = None) -> None:
+        with self._lock:
+            self.phase = None
+            self.finished_at = datetime.now()
+            self.error = error
+
+    def restore(self, finished_at: datetime) -> None:
+        """Итог последней проверки до перезапуска бота (из расписания в БД), если своих ещё не было."""
+        with self._lock:
+            if self.finished_at is None and self.phase is None:
+                self.finished_at = finished_at
+
+    def describe(self) -> str:
+        """Строка о состоянии проверок для /stats."""
+        with self._lock:
+            if self.phase is not None:
+                line = f"🔄 Идёт проверка (с {self.started_at:%H:%M:%S}): {self.phase}"
+                if self.phase == "сбор источников":
+                    line += f", готово {self.sources_done} из {self.sources_total}"
+                if self.finished_at is None:
+                    line += "\n⏳ Бот только что запущен: данные — из базы, первая проверка ещё идёт"
+                return line
+            if self.finished_at is None:
+                return "⏳ Бот только что запущен: первая проверка ещё не началась"
+            if self.error:
+                return f"⚠️ Последняя проверка ({self.finished_at:%d.%m %H:%M}) не удалась: {self.error}"
+            return f"✅ Последняя проверка: {self.finished_at:%d.%m %H:%M}"
+
+
+progress = CheckProgress()
+
+# Все сообщения бота идут через один движок доставки: лимиты Telegram и повторы при 429
+delivery = DeliveryEngine()
 
 
 def get_stats():
     """Получить статистику."""
     if not DB_PATH.exists():
         return None
+    return db.get_stats(DB_PATH)
+
+
+def stats_message() -> str | None:
+    """Текст ответа на /stats (None - базы нет)."""
+    def build():
+        stats = get_stats()
+        if not stats:
+            return None
+        return f"""
+📊 <b>Статистика:</b>
+
+📚 Всего стажировок: <b>{stats['total']}</b>
+🟢 Открыт набор: <b>{stats['open']}</b>
+🟡 Скоро откроется: <b>{stats['soon']}</b>
+🔴 Набор закрыт: <b>{stats['closed']}</b>
+❔ Статус уточняется: <b>{stats['unknown']}</b>
+🏢 Компаний: <b>{stats['companies']}</b>
+
+⏰ Автопроверка: у каждого источника своё расписание
+"""
+    return read_cache.get("stats", build)
+
+
+def collect_internships(sources: list[Source] | None = None):
+    """
+    Собрать источники (по умолчанию все) с учётом результатов прошлого прогона и здоровья
+    источников (вызывать в executor).
+    """
+    return collect_all_internships(
+        snapshots=load_source_snapshots(DB_PATH), on_outcome=progress.source_done, sources=sources,
+        health=source_health(load_schedule(DB_PATH)),
+    )
+
+
+def _format_failed_sources(failed) -> str:
+    """Строки об источниках, которые не удалось собрать (для ответа на /check)."""
+    if not failed:
+        return ""
+    return "\n\n⚠️ Не собраны:\n" + "\n".join(o.summary() for o in failed)
+
+
+class CheckResult(NamedTuple):
+    """Итог одной проверки источников."""
+    collected: int  # сколько стажировок собрано
+    outcomes: list  # SourceOutcome по источникам
+    changes: list[Change]
+    delivered: int  # сколько чатов получили дайджест
+
+
+async def run_check(sources: list[Source] | None = None) -> CheckResult:
+    """
+    Собрать источники (по умолчанию все), сохранить в БД и разослать дайджест,
+    если есть изменения. Расписание собранных источников пересчитывается.
+    """
+    progress.start(len(SOURCES if sources is None else sources))
+    try:
+        result = await _run_check(sources)
+    except Exception as e:
+        progress.finish(error=str(e))
+        raise
+    progress.finish(error=None if result.collected else "источники не вернули данных")
+    return result
+
+
+async def _run_check(sources: list[Source] | None) -> CheckResult:
+    # Сбор - в рабочем потоке: collect_internships() поднимает свой event loop через asyncio.run()
+    loop = asyncio.get_running_loop()
+    internships, outcomes = await loop.run_in_executor(None, collect_internships, sources)
+    for outcome in outcomes:
+        print(f"   {outcome.summary()}")
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM internships")
-    total = cursor.fetchone()[0]
-    
-    cursor.execute("""
-        SELECT COUNT(*) FROM internships 
-        WHERE status LIKE '%Открыт%' 
-           OR status LIKE '%набор%'
-           OR status LIKE '%Идет%'
-           OR status LIKE '%Прием заявок%'
-           OR status LIKE '%Приём заявок%'
-    """)
-    open_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT company) FROM internships")
-    companies = cursor.fetchone()[0]
+    if not internships:
+        await loop.run_in_executor(None, update_schedule, DB_PATH, outcomes, [], [])
+        return CheckResult(0, outcomes, [], 0)
     
-    conn.close()
-    return {'total': total, 'open': open_count, 'companies': companies}
+    # Сохраняем в БД и получаем изменения
+    progress.set_phase("запись в базу")
+    changes = await loop.run_in_executor(None, upsert_and_get_changes, DB_PATH, internships, outcomes)
+    await loop.run_in_executor(None, update_schedule, DB_PATH, outcomes, internships, changes)
+    delivered = 0
+    if changes:
+        # Есть изменения - отправляем дайджест
+        progress.set_phase("рассылка дайджеста")
+        results = await fan_out_digest(delivery, DB_PATH, CHAT_ID, changes)
+        delivered = sum(r.ok for r in results)
+        new_count = sum(c.is_new for c in changes)
+        print(f"✅ Дайджест отправлен: {new_count} новых, {len(changes) - new_count} обновлений")
+        print(f"   {delivery.stats().summary()}")
+    else:
+        print("ℹ️ Изменений нет")
+    return CheckResult(len(internships), outcomes, changes, delivered)
 
 
-def escape_html(text):
-    """Экранировать HTML."""
-    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+def _busy() -> bool:
+    """Идёт проверка (полная или плановая) или пробы: новый сбор или проба не запускаются."""
+    return checks.running or scheduled.running or probes.running
 
 
 async def check_and_send_digest(context: ContextTypes.DEFAULT_TYPE):
-    """Проверить источники и отправить дайджест если есть изменения."""
-    print(f"\n⏰ [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Проверка стажировок...")
+    """
+    Тик расписания: проверить источники, у которых подошло время, и отправить дайджест,
+    если есть изменения. Пока идёт другая проверка (например, /check), тик пропускается —
+    её результат сам сдвинет расписание.
+    """
+    if _busy():
+        return
     
     try:
-        # Собираем данные в отдельном потоке (т.к. Playwright синхронный)
-        loop = asyncio.get_event_loop()
-        internships = await loop.run_in_executor(None, collect_all_internships)
-        
-        if not internships:
-            print("⚠️ Не удалось получить данные")
+        loop = asyncio.get_running_loop()
+        schedule = await loop.run_in_executor(None, load_schedule, DB_PATH)
+        # Пока читалось расписание, мог начаться /check или проба: проверяем ещё раз.
+        # Дальше до scheduled.run() await нет - никто не вклинится
+        if _busy():
+            return
+        due = due_sources(schedule)
+        if not due:
+            # После перезапуска источникам может быть ещё рано: /stats покажет прошлую проверку
+            last_runs = [s.last_run_at for s in schedule.values() if s.last_run_at is not None]
+            if last_runs:
+                progress.restore(_local_time(max(last_runs)))
             return
         
-        # Сохраняем в БД и получаем изменения
-        changes = await loop.run_in_executor(None, upsert_and_get_changes, DB_PATH, internships)
-        new_list = [c.internship for c in changes if c.is_new]
-        updated_list = [c.internship for c in changes if not c.is_new]
-        
-        if changes:
-            # Есть изменения - отправляем дайджест
-            text = build_digest_message(new_list, updated_list)
-            await context.bot.send_message(
-                chat_id=CHAT_ID,
-                text=text,
-                parse_mode='HTML'
-            )
-            print(f"✅ Дайджест отправлен: {len(new_list)} новых, {len(updated_list)} обновлений")
-        else:
-            print("ℹ️ Изменений нет")
+        print(
+            f"\n⏰ [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Проверка по расписанию: "
+            + ", ".join(s.company for s in due)
+        )
+        flight = await scheduled.run(lambda: run_check(due))
+        if not flight.value.collected:
+            print("⚠️ Не удалось получить данные")
             
     except Exception as e:
         print(f"❌ Ошибка при проверке: {e}")
 
 
+async def probe_for_changes(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Пробы источников между полными сборами: изменившийся источник становится «пора»,
+    и его соберёт ближайший тик расписания. Во время проверки пробы не нужны,
+    а проверка, запрошенная во время проб, ждёт их окончания: обе пишут расписание.
+    """
+    if _busy():
+        return
+    
+    try:
+        loop = asyncio.get_running_loop()
+        flight = await probes.run(lambda: loop.run_in_executor(None, probe_sources, DB_PATH))
+        for outcome in flight.value:
+            if outcome.status in ("hit", "error"):
+                print(f"🔎 {outcome.summary()}")
+    except Exception as e:
+        print(f"❌ Ошибка пробы источников: {e}")
+
+
+def _local_time(utc: datetime) -> datetime:
+    """Время из расписания (UTC) в местном времени - для пользователя."""
+    return utc + (datetime.now() - datetime.utcnow())
+
+
+def next_run_line() -> str:
+    """Строка о следующей плановой проверке для /stats."""
+    planned = next_run(load_schedule(DB_PATH))
+    if planned is None:
+        return "🗓 Следующая проверка: при ближайшем тике расписания"
+    return f"🗓 Следующая проверка: {planned.company} в {_local_time(planned.next_run_at):%d.%m %H:%M}"
+
+
 async def send_digest_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда для принудительной отправки дайджеста."""
-    await update.message.reply_text("🔄 Проверяю источники...")
+    age = checks.age()
+    if checks.running:
+        await delivery.reply(update, "⏳ Проверка уже идёт, пришлю её результат...")
+    elif scheduled.running:
+        await delivery.reply(update, "⏳ Идёт плановая проверка части источников, после неё проверю все...")
+    elif age is None or age >= CHECK_FRESHNESS_SEC:
+        await delivery.reply(update, "🔄 Проверяю источники...")
     
     try:
-        loop = asyncio.get_event_loop()
-        internships = await loop.run_in_executor(None, collect_all_internships)
+        # Плановая проверка собирает не все источники, пробы пишут расписание: ждём их
+        # и запускаем полную. Между окончанием ожидания и checks.run() нет await -
+        # новый тик или проба не вклинятся
+        while scheduled.running or probes.running:
+            await scheduled.wait()
+            await probes.wait()
+        flight = await checks.run(run_check)
+        result = flight.value
+        failed = [o for o in result.outcomes if o.status != "ok"]
         
-        if not internships:
-            await update.message.reply_text("⚠️ Не удалось получить данные")
+        if not result.collected:
+            await delivery.reply(update, "⚠️ Не удалось получить данные" + _format_failed_sources(failed))
             return
         
-        changes = await loop.run_in_executor(None, upsert_and_get_changes, DB_PATH, internships)
-        new_list = [c.internship for c in changes if c.is_new]
-        updated_list = [c.internship for c in changes if not c.is_new]
+        if flight.origin == FLIGHT_OWN:
+            header = "✅ Проверка выполнена."
+        elif flight.origin == FLIGHT_JOINED:
+            header = f"✅ Проверка, которая уже шла, закончилась в {flight.finished_at:%H:%M}."
+        elif flight.origin == FLIGHT_CACHED:
+            header = f"ℹ️ Источники проверены в {flight.finished_at:%H:%M}, повторно не собираю."
+        new_count = sum(c.is_new for c in result.changes)
         
-        if changes:
-            text = build_digest_message(new_list, updated_list)
-            await context.bot.send_message(chat_id=CHAT_ID, text=text, parse_mode='HTML')
-            await update.message.reply_text(
-                f"✅ Дайджест отправлен в канал!\n"
-                f"🆕 Новых: {len(new_list)}\n"
-                f"🔄 Обновлений: {len(updated_list)}"
+        if result.changes:
+            await delivery.reply(update,
+                f"{header}\n"
+                f"📨 Дайджест отправлен в канал и подписчикам ({result.delivered} чатов)\n"
+                f"🆕 Новых: {new_count}\n"
+                f"🔄 Обновлений: {len(result.changes) - new_count}"
+                + _format_failed_sources(failed)
             )
-        else:
+        elif flight.origin == FLIGHT_OWN:
+            # Сводку в канал отправляет только тот, кто запустил проверку
+            loop = asyncio.get_running_loop()
             total = await loop.run_in_executor(None, get_internships_count, DB_PATH)
             text = build_no_changes_message(total)
-            await context.bot.send_message(chat_id=CHAT_ID, text=text, parse_mode='HTML')
-            await update.message.reply_text("✅ Сводка отправлена (изменений нет)")
+            await delivery.send(CHAT_ID, text, parse_mode='HTML')
+            await delivery.reply(update, "✅ Сводка отправлена (изменений нет)" + _format_failed_sources(failed))
+        else:
+            await delivery.reply(update, f"{header}\nИзменений нет." + _format_failed_sources(failed))
             
     except Exception as e:
-        await update.message.reply_text(f"❌ Ошибка: {e}")
+        await delivery.reply(update, f"❌ Ошибка: {e}")
 
 
 async def show_open_internships(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать открытые стажировки."""
-    internships = get_open_internships()
+    page = lists.first(LIST_OPEN)
     
-    if not internships:
-        await update.message.reply_text(
+    if not page:
+        await delivery.reply(update,
             "😔 Сейчас нет открытых стажировок.\n"
             "Используйте /stats для статистики."
         )
         return
     
-    message_parts = [f"🆕 <b>Открытые стажировки ({len(internships)}):</b>\n"]
-    
-    for company, title, status, url in internships:
-        block = f"\n🏢 <b>{escape_html(company)}</b> — {escape_html(title)}"
-        if status:
-            block += f"\n🔓 {escape_html(status)}"
-        block += f'\n🔗 <a href="{escape_html(url)}">Ссылка</a>\n'
-        message_parts.append(block)
-    
-    full_message = "".join(message_parts)
-    
-    if len(full_message) > 4000:
-        chunks = []
-        current = message_parts[0]
-        for part in message_parts[1:]:
-            if len(current) + len(part) < 4000:
-                current += part
-            else:
-                chunks.append(current)
-                current = part
-        if current:
-            chunks.append(current)
-        
-        for chunk in chunks:
-            await update.message.reply_text(chunk, parse_mode='HTML', disable_web_page_preview=True)
-    else:
-        await update.message.reply_text(full_message, parse_mode='HTML', disable_web_page_preview=True)
+    await delivery.reply(update,
+        page.text, parse_mode='HTML', reply_markup=page.markup, disable_web_page_preview=True
+    )
 
 
 async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Показать статистику."""
-    stats = get_stats()
+    """Показать статистику и состояние проверок."""
+    message = stats_message()
+    status = html.escape(f"{progress.describe()}\n{next_run_line()}", quote=False)
     
-    if not stats:
-        await update.message.reply_text("📭 База данных пуста")
+    if not message:
+        await delivery.reply(update, f"📭 База данных пуста\n\n{status}", parse_mode='HTML')
         return
     
-    message = f"""
-📊 <b>Статистика:</b>
-
-📚 Всего стажировок: <b>{stats['total']}</b>
-🟢 Открыт набор: <b>{stats['open']}</b>
-🔴 Набор закрыт: <b>{stats['total'] - stats['open']}</b>
-🏢 Компаний: <b>{stats['companies']}</b>
-
-⏰ Автопроверка: каждые {CHECK_INTERVAL_HOURS} часа
-"""
-    
-    await update.message.reply_text(message, parse_mode='HTML')
+    await delivery.reply(update, f"{message}\n{status}", parse_mode='HTML')
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Приветствие."""
-    text = f"""
+    text = """
 👋 <b>Привет! Бот для отслеживания стажировок.</b>
 
 🤖 <b>Автоматический режим:</b>
-Каждые {CHECK_INTERVAL_HOURS} часа бот проверяет источники и отправляет дайджест в канал при появлении новых стажировок.
+Бот проверяет источники по расписанию и отправляет дайджест в канал при появлении новых стажировок. Источник с недавними изменениями или набором «скоро откроется» проверяется чаще, стабильный — реже.
 
 📋 <b>Команды:</b>
 
@@ -231,25 +397,25 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 Бот работает 24/7! ⚡
 """
-    await update.message.reply_text(text, parse_mode='HTML')
+    await delivery.reply(update, text, parse_mode='HTML')
 
 
 async def post_init(application: Application):
     """Действия после инициализации бота."""
-    # Настраиваем периодическую проверку каждые 4 часа
+    # Тик расписания: раз в SCHEDULE_TICK_SEC проверяются источники, у которых подошло время
     job_queue = application.job_queue
     
-    # Запускаем сразу при старте
-    await check_and_send_digest(application)
+    # Первый тик - сразу после старта и фоновой задачей: команды обслуживаются
+    # из базы с первой секунды, ход проверки виден в /stats. Расписание хранится в БД,
+    # поэтому после перезапуска собираются только источники, чьё время уже подошло
+    job_queue.run_repeating(check_and_send_digest, interval=SCHEDULE_TICK_SEC, first=0, name="schedule")
+    # Между полными сборами - дешёвые пробы: изменившийся источник собирается сразу, а не по расписанию
+    job_queue.run_repeating(probe_for_changes, interval=PROBE_INTERVAL_SEC, first=PROBE_INTERVAL_SEC, name="probes")
     
-    # И потом каждые 4 часа
-    job_queue.run_repeating(
-        check_and_send_digest,
-        interval=CHECK_INTERVAL_HOURS * 3600,  # в секундах
-        first=CHECK_INTERVAL_HOURS * 3600
+    print(
+        f"✅ Автопроверка настроена: расписание проверяется каждые {SCHEDULE_TICK_SEC:.0f} с, "
+        f"пробы источников - каждые {PROBE_INTERVAL_SEC:.0f} с"
     )
-    
-    print(f"✅ Автопроверка настроена: каждые {CHECK_INTERVAL_HOURS} часа")
 
 
 async def main():
@@ -261,22 +427,25 @@ async def main():
     print("🤖 Запуск бота с автоматической проверкой...")
     print(f"📊 База данных: {DB_PATH}")
     print(f"📢 Канал: {CHAT_ID}")
-    print(f"⏰ Интервал проверки: каждые {CHECK_INTERVAL_HOURS} часа\n")
+    print("⏰ Проверка источников: по расписанию каждого (scheduler.py)\n")
     
     # Создаем приложение
-    app = Application.builder().token(BOT_TOKEN).build()
+    app = build_application(BOT_TOKEN)
+    delivery.attach(app.bot)
     
     # Команды
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("check", send_digest_now))
     app.add_handler(CommandHandler("internships", show_open_internships))
     app.add_handler(CommandHandler("stats", show_stats))
+    app.add_handler(lists.handler())
     
     # Запускаем
     await app.initialize()
     await post_init(app)
     await app.start()
-    await app.updater.start_polling()
+    mode = await start_receiving(app)
+    print(f"📡 Приём апдейтов: {mode}")
     
     print("✅ Бот запущен и работает!")
     print("\nДоступные команды:")
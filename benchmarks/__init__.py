@@ -0,0 +1,3 @@
+"""
+Бенчмарки проекта. Запуск из корня репозитория: python -m benchmarks.<модуль>
+"""
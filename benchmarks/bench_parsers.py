@@ -0,0 +1,84 @@
+"""
+Бенчмарк парсеров на записанных фикстурах (см. benchmarks/replay.py), без сети.
+По каждому источнику: время прогона целиком, время в браузере (жизнь BrowserContext),
+пик памяти Python (tracemalloc) и совпадение результата с эталоном фикстуры.
+
+Запуск: python -m benchmarks.bench_parsers --repeat 5 [--source VK]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.replay import (
+    FixtureBrowser,
+    diff_items,
+    fixture_dir,
+    has_fixture,
+    load_fixture,
+    replay_source,
+    select_sources,
+)
+from parsers.base import Internship, Source
+
+
+async def bench_source(source: Source, repeat: int) -> dict:
+    """repeat прогонов парсера по фикстуре; Chromium запускается один раз на источник."""
+    expected = [Internship(**item) for item in load_fixture(source)["items"]]
+    browser = FixtureBrowser(fixture_dir(source) / "network.har") if source.uses_browser else None
+    wall: list[float] = []
+    in_browser: list[float] = []
+    peaks: list[int] = []
+    mismatches = 0
+    try:
+        for _ in range(repeat):
+            context_time = browser.context_time if browser else 0.0
+            tracemalloc.start()
+            started = time.perf_counter()
+            items = await replay_source(source, browser=browser)
+            wall.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            in_browser.append(browser.context_time - context_time if browser else 0.0)
+            if diff_items(expected, items):
+                mismatches += 1
+    finally:
+        if browser is not None:
+            await browser.close()
+    return {
+        "launch": browser.launch_time if browser else 0.0,
+        "wall": statistics.median(wall),
+        "browser": statistics.median(in_browser),
+        "peak_kib": max(peaks) / 1024,
+        "count": len(items),
+        "mismatches": mismatches,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    print(
+        f"{'источник':<18} {'записей':>7} {'прогон, с':>10} {'браузер, с':>11} "
+        f"{'запуск, с':>10} {'пик, КиБ':>9}  результат"
+    )
+    for source in select_sources(args.source):
+        if not has_fixture(source):
+            print(f"{source.company:<18} нет фикстуры (python -m benchmarks.replay record)")
+            continue
+        r = await bench_source(source, args.repeat)
+        verdict = "ok" if not r["mismatches"] else f"расходится в {r['mismatches']} из {args.repeat}"
+        print(
+            f"{source.company:<18} {r['count']:>7} {r['wall']:>10.3f} {r['browser']:>11.3f} "
+            f"{r['launch']:>10.3f} {r['peak_kib']:>9.0f}  {verdict}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк парсеров на записанных фикстурах")
+    parser.add_argument("--repeat", type=int, default=5, help="прогонов на источник (медиана)")
+    parser.add_argument("--source", help="название компании или имя модуля парсера (по умолчанию все)")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
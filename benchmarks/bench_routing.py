@@ -0,0 +1,109 @@
+"""
+Бенчмарк маршрутизации изменений по фильтрам подписчиков: инвертированный индекс
+(routing.FilterIndex) против проверки фильтра каждого подписчика на каждое изменение.
+
+Запуск: python -m benchmarks.bench_routing --subscribers 5000 --changes 200
+"""
+import argparse
+import random
+import time
+
+from db import Change
+from parsers.base import Internship
+from routing import EVENTS, FIELD_COMPANY, FIELD_EVENT, FIELD_KEYWORD, FilterIndex, change_events, tokenize
+
+COMPANIES = ["Яндекс", "Сбер", "VK", "T-Bank", "Wildberries Tech", "Ozon", "Авито", "Касперский"]
+WORDS = [
+    "backend", "frontend", "ml", "аналитик", "qa", "ios", "android", "data", "devops", "дизайн",
+    "go", "python", "java", "product", "security", "школа", "стажировка", "разработчик",
+]
+KINDS = ["open", "soon", "closed", "unknown"]
+
+
+def make_changes(count: int, rng: random.Random) -> list[Change]:
+    changes = []
+    for n in range(count):
+        title = " ".join(rng.sample(WORDS, 3)) + f" {n}"
+        is_new = rng.random() < 0.3
+        changes.append(Change(
+            internship=Internship(rng.choice(COMPANIES), title, f"https://example.com/{n}", "статус"),
+            is_new=is_new,
+            previous_kind=None if is_new else rng.choice(KINDS),
+            kind=rng.choice(KINDS),
+        ))
+    return changes
+
+
+def make_filters(count: int, rng: random.Random) -> dict[int, dict[str, set[str]]]:
+    """Треть подписчиков без фильтра, у остальных — одно-три условия."""
+    filters = {}
+    for chat_id in range(count):
+        fields: dict[str, set[str]] = {}
+        if rng.random() < 0.5:
+            fields[FIELD_COMPANY] = {c.lower() for c in rng.sample(COMPANIES, rng.randint(1, 2))}
+        if rng.random() < 0.4:
+            fields[FIELD_KEYWORD] = set(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.4:
+            fields[FIELD_EVENT] = set(rng.sample(EVENTS, rng.randint(1, 2)))
+        filters[chat_id] = fields
+    return filters
+
+
+def linear_route(filters: dict[int, dict[str, set[str]]], changes: list[Change]) -> dict[int, list[Change]]:
+    """Прямой перебор: каждый фильтр против каждого изменения."""
+    routed: dict[int, list[Change]] = {}
+    for chat_id, fields in filters.items():
+        matched = []
+        for change in changes:
+            if FIELD_COMPANY in fields and change.internship.company.lower() not in fields[FIELD_COMPANY]:
+                continue
+            if FIELD_KEYWORD in fields and not tokenize(change.internship.title) & fields[FIELD_KEYWORD]:
+                continue
+            if FIELD_EVENT in fields and not change_events(change) & fields[FIELD_EVENT]:
+                continue
+            matched.append(change)
+        if matched:
+            routed[chat_id] = matched
+    return routed
+
+
+def index_route(filters: dict[int, dict[str, set[str]]], changes: list[Change]) -> dict[int, list[Change]]:
+    """Через индекс (включая его построение — в рассылке он строится на каждую пачку)."""
+    return {
+        chat_id: route.changes
+        for route in FilterIndex(filters).route(changes)
+        for chat_id in route.chat_ids
+    }
+
+
+def _bench(label: str, fn, repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<36} {best * 1000:8.1f} мс")
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк маршрутизации изменений по фильтрам.")
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    changes = make_changes(args.changes, rng)
+    filters = make_filters(args.subscribers, rng)
+
+    print(f"{args.subscribers} подписчиков, {args.changes} изменений")
+    linear, expected = _bench("перебор фильтров", lambda: linear_route(filters, changes), args.repeat)
+    indexed, routed = _bench("инвертированный индекс", lambda: index_route(filters, changes), args.repeat)
+    assert routed == expected, "расхождение с перебором"
+    digests = len({tuple(id(c) for c in matched) for matched in routed.values()})
+    print(f"  ускорение x{linear / indexed:.1f}; разных дайджестов: {digests} на {len(routed)} чатов")
+
+
+if __name__ == "__main__":
+    main()
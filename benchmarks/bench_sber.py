@@ -0,0 +1,91 @@
+"""
+Бенчмарк разбора страницы Сбера: прежний цикл (html.parser, find_parent + get_text
+на каждый заголовок) против одного прохода scan_headings() по дереву lxml.
+
+Запуск: python -m benchmarks.bench_sber --cards 2000 [--flat]
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from parsers.soup import make_soup, scan_headings
+from parsers.status import smart_status_detection
+
+STATUSES = ["Набор открыт", "Скоро", "Набор закрыт", ""]
+
+
+def make_page(cards: int, flat: bool = False, depth: int = 6) -> bytes:
+    """
+    Синтетическая страница: карточки внутри нескольких уровней обёрток.
+    flat=True — заголовки без своих блоков, все в одной общей обёртке
+    (худший случай для get_text() на каждый заголовок).
+    """
+    items = []
+    for n in range(cards):
+        card = (
+            f'<h4>Направление #{n}</h4>'
+            f'<p>Описание программы, оплачиваемая стажировка, {STATUSES[n % len(STATUSES)]}</p>'
+            f'<a href="/internship/{n}">Подробнее</a>'
+        )
+        items.append(card if flat else f'<div class="card">{card}</div>')
+    body = "".join(items)
+    for level in range(depth):
+        body = f'<section class="wrap-{level}"><div>{body}</div></section>'
+    return f"<html><head><meta charset='utf-8'></head><body>{body}</body></html>".encode("utf-8")
+
+
+def legacy_parse(content: bytes) -> list[tuple[str, str, str]]:
+    """Прежний разбор: строка -> html.parser, find_parent() и get_text() на каждый заголовок."""
+    soup = BeautifulSoup(content.decode("utf-8"), "html.parser")
+    result = []
+    for heading in soup.find_all(["h3", "h4", "h5"]):
+        title = heading.get_text(strip=True)
+        parent = heading.find_parent(["div", "section", "article"])
+        if not parent:
+            continue
+        status = smart_status_detection(parent.get_text())
+        link_el = parent.find("a", href=True)
+        result.append((title, status, link_el["href"] if link_el else ""))
+    return result
+
+
+def fast_parse(content: bytes) -> list[tuple[str, str, str]]:
+    """Новый разбор (как в parse_sber): байты -> lxml, один проход scan_headings()."""
+    page = scan_headings(make_soup(content, "utf-8"))
+    result = []
+    statuses: dict[int, str] = {}
+    for found in page.headings:
+        if found.block is None:
+            continue
+        key = id(found.block)
+        if key not in statuses:
+            statuses[key] = smart_status_detection(found.text)
+        status = statuses[key]
+        result.append((found.title, status, found.link["href"] if found.link else ""))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора страницы Сбера")
+    parser.add_argument("--cards", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--flat", action="store_true", help="все заголовки в одном общем блоке")
+    args = parser.parse_args()
+
+    for cards in args.cards:
+        content = make_page(cards, flat=args.flat)
+        started = time.perf_counter()
+        legacy = legacy_parse(content)
+        legacy_time = time.perf_counter() - started
+        started = time.perf_counter()
+        fast = fast_parse(content)
+        fast_time = time.perf_counter() - started
+        assert legacy == fast, "результаты разбора расходятся"
+        print(
+            f"карточек: {cards:>6}  html.parser+find_parent: {legacy_time:.3f} с  "
+            f"lxml+scan_headings: {fast_time:.3f} с  (x{legacy_time / fast_time:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Микробенчмарк определения статуса: общий скомпилированный классификатор
+против прежней реализации (до ~25 отдельных re.search на каждую карточку).
+
+Запуск: python -m benchmarks.bench_status --cards 2000
+"""
+import argparse
+import random
+import re
+import time
+
+from parsers.status import smart_status_detection
+
+# Фрагменты, из которых собираются карточки и тексты родительских блоков (как на страницах источников)
+FILLER = [
+    "Стажировка для студентов старших курсов и выпускников",
+    "Бэкенд-разработка на Go и Python", "Аналитика данных", "Мобильная разработка",
+    "Оплачиваемая стажировка, 3 месяца, гибкий график", "Москва, Санкт-Петербург, удалённо",
+    "Наставник из команды и реальные задачи", "Программирование Управление Тестирование",
+    "Уровень Джун Мидл Другое Бесплатно", "Показать 6 курсов", "Часто задаваемые вопросы",
+    "Политика обработки персональных данных", "Присоединиться к сообществу", "ВКонтакте Телеграм",
+]
+STATUS_PHRASES = [
+    "Набор открыт", "Идёт набор", "Приём заявок до 15 марта", "Подать заявку",
+    "Скоро", "Старт весна 2026", "Откроем в ближайшее время",
+    "Набор закрыт", "Приём завершен", "",
+]
+
+
+def legacy_status_detection(text: str) -> str:
+    """Прежняя реализация из parsers/sber.py: по одному re.search на шаблон."""
+    text_lower = text.lower()
+    open_patterns = [
+        r'набор\s+открыт', r'открыт\s+набор', r'прием\s+заявок', r'приём\s+заявок',
+        r'идет\s+набор', r'идёт\s+набор', r'принимаем\s+заявки', r'подать\s+заявку',
+        r'registration\s+open', r'applications\s+open', r'recruiting', r'apply\s+now',
+    ]
+    for pattern in open_patterns:
+        if re.search(pattern, text_lower):
+            return "Открыт набор"
+    soon_patterns = [
+        r'скоро', r'ближайшее\s+время', r'весна\s+\d{4}', r'лето\s+\d{4}',
+        r'осень\s+\d{4}', r'зима\s+\d{4}', r'coming\s+soon', r'opens\s+soon',
+    ]
+    for pattern in soon_patterns:
+        if re.search(pattern, text_lower):
+            return "Скоро откроется"
+    closed_patterns = [
+        r'набор\s+закрыт', r'закрыт\s+набор', r'прием\s+завершен', r'приём\s+завершен',
+        r'завершен', r'applications\s+closed', r'closed',
+    ]
+    for pattern in closed_patterns:
+        if re.search(pattern, text_lower):
+            return "Набор закрыт"
+    return ""
+
+
+def make_cards(count: int, seed: int = 42) -> list[str]:
+    """Карточка = заголовок + статус + текст родительского блока (обычно длинный)."""
+    rng = random.Random(seed)
+    cards = []
+    for _ in range(count):
+        parts = rng.sample(FILLER, k=rng.randint(3, len(FILLER)))
+        parts.insert(rng.randint(0, len(parts)), rng.choice(STATUS_PHRASES))
+        cards.append("\n".join(parts * rng.randint(1, 4)))
+    return cards
+
+
+def _bench(label: str, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<36} {best * 1000:8.1f} мс")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк определения статуса.")
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    expected = [legacy_status_detection(text) for text in cards]
+    assert [smart_status_detection(text) for text in cards] == expected, "расхождение с прежней реализацией"
+
+    avg_len = sum(map(len, cards)) // len(cards)
+    print(f"{len(cards)} карточек, средняя длина {avg_len} символов")
+    legacy = _bench("прежняя (re.search на шаблон)", lambda: [legacy_status_detection(t) for t in cards], args.repeat)
+    single = _bench("общий классификатор", lambda: [smart_status_detection(t) for t in cards], args.repeat)
+    print(f"  ускорение: x{legacy / single:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк upsert_and_get_changes() на большом числе отслеживаемых стажировок.
+Сравнивает пакетный diff (одно чтение состояния + executemany) с прежним построчным алгоритмом.
+
+Запуск: python -m benchmarks.bench_upsert --rows 100000
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from db import Change, upsert_and_get_changes, write_connection
+from parsers.base import Internship
+
+COMPANIES = ["T-Bank", "Сбер", "Wildberries Tech", "Яндекс", "VK"]
+STATUSES = ["Открыт набор", "Скоро откроется", "Набор закрыт", "Уточните на сайте"]
+
+
+def make_batch(rows: int, changed_share: float = 0.0, new_share: float = 0.0) -> list[Internship]:
+    """Синтетическая пачка: rows стажировок, часть со сменой статуса, часть новых."""
+    changed_every = int(1 / changed_share) if changed_share else 0
+    batch = []
+    for n in range(rows):
+        status = STATUSES[n % len(STATUSES)]
+        if changed_every and n % changed_every == 0:
+            status = STATUSES[(n + 1) % len(STATUSES)]
+        company = COMPANIES[n % len(COMPANIES)]
+        batch.append(Internship(company, f"Стажировка #{n}", f"https://example.com/{company}/{n}", status))
+    for n in range(int(rows * new_share)):
+        batch.append(Internship("Новая компания", f"Программа #{n}", f"https://example.com/new/{n}", STATUSES[0]))
+    return batch
+
+
+def legacy_upsert(db_path: Path, internships: list[Internship]) -> list[Change]:
+    """Прежний алгоритм: SELECT и, возможно, INSERT/UPDATE на каждую стажировку."""
+    changes: list[Change] = []
+    now = "bench"
+    with write_connection(db_path) as conn:
+        for i in internships:
+            uid = i.unique_key()
+            row = conn.execute("SELECT status FROM internships WHERE id = ?", (uid,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO internships (id, company, title, url, status, updated_at, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (uid, i.company, i.title, i.url, i.status, now, i.fingerprint()),
+                )
+                changes.append(Change(internship=i, is_new=True))
+            elif row["status"] != i.status:
+                conn.execute(
+                    "UPDATE internships SET url = ?, status = ?, updated_at = ?, fingerprint = ? WHERE id = ?",
+                    (i.url, i.status, now, i.fingerprint(), uid),
+                )
+                changes.append(Change(internship=i, is_new=False))
+    return changes
+
+
+def _timed(label: str, fn, db_path: Path, batch: list[Internship]) -> None:
+    started = time.perf_counter()
+    changes = fn(db_path, batch)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<34} {elapsed * 1000:9.1f} мс  изменений: {len(changes)}")
+
+
+def run(rows: int, legacy: bool) -> None:
+    baseline = make_batch(rows)
+    steady = make_batch(rows)
+    churn = make_batch(rows, changed_share=0.01, new_share=0.01)
+
+    variants = [("batch", upsert_and_get_changes)]
+    if legacy:
+        variants.append(("legacy", legacy_upsert))
+
+    for name, fn in variants:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            print(f"{name}: {rows} отслеживаемых стажировок (SQLite {sqlite3.sqlite_version})")
+            _timed("первая загрузка (все новые)", fn, db_path, baseline)
+            _timed("повтор без изменений", fn, db_path, steady)
+            _timed("1% смен статуса + 1% новых", fn, db_path, churn)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк upsert_and_get_changes().")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy", action="store_true", help="Прогнать и построчный алгоритм для сравнения")
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Запись и воспроизведение страниц источников — проверка парсеров без сети.
+
+Фикстура источника лежит в benchmarks/fixtures/<модуль парсера>/:
+- page.html     — сырой ответ страницы (источники на requests);
+- network.har   — сетевые ответы страницы (Playwright-источники, route_from_har);
+- fixture.json  — URL, время записи, Content-Type и ожидаемый результат парсера.
+
+При воспроизведении вызываются настоящие parse_*: requests-источник получает
+страницу с локального HTTP-сервера, Playwright-источник — из HAR (в сеть запросы не уходят).
+
+Запуск:
+    python -m benchmarks.replay record [--source VK]   # записать фикстуры с живых сайтов
+    python -m benchmarks.replay update [--source VK]   # пересобрать эталон по записи (без сети)
+    python -m benchmarks.replay check  [--source VK]   # сравнить парсеры с записанным
+
+В репозитории лежит синтетическая фикстура Сбера (fixtures/sber): страница
+написана вручную по разметке sberstudent.ru, чтобы check и bench_parsers
+работали без сети и без Chromium.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from parsers import SOURCES
+from parsers.base import Internship, Source
+from parsers.browser import SharedBrowser
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def fixture_dir(source: Source) -> Path:
+    """Каталог фикстуры: по имени модуля парсера (parsers.vk -> fixtures/vk)."""
+    return FIXTURES_DIR / source.parse_fn.__module__.rsplit(".", 1)[-1]
+
+
+def has_fixture(source: Source) -> bool:
+    return (fixture_dir(source) / "fixture.json").exists()
+
+
+def load_fixture(source: Source) -> dict:
+    return json.loads((fixture_dir(source) / "fixture.json").read_text(encoding="utf-8"))
+
+
+class FixtureBrowser(SharedBrowser):
+    """
+    Общий браузер, у которого каждый контекст ходит в сеть через HAR-файл:
+    record=True — ответы дописываются в HAR, иначе отдаются только из него
+    (чего нет в записи — обрывается). Заодно считает время жизни контекстов —
+    «время браузера» источника без запуска Chromium.
+    """
+
+    def __init__(self, har_path: Path, record: bool = False, headless: bool | None = None) -> None:
+        super().__init__(headless=headless)
+        self.har_path = har_path
+        self.record = record
+        self.launch_time = 0.0
+        self.context_time = 0.0
+
+    async def _ensure_browser(self):
+        started = time.perf_counter()
+        browser = await super()._ensure_browser()
+        if not self.launch_time:
+            self.launch_time = time.perf_counter() - started
+        return browser
+
+    async def new_context(self):
+        context = await super().new_context()
+        opened = time.perf_counter()
+
+        def on_close(_context) -> None:
+            self.context_time += time.perf_counter() - opened
+
+        context.on("close", on_close)
+        await context.route_from_har(
+            self.har_path,
+            not_found="fallback" if self.record else "abort",
+            update=self.record,
+            update_content="embed",
+        )
+        return context
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Отдаёт одну и ту же записанную страницу на любой путь."""
+    body = b""
+    content_type = "text/html; charset=utf-8"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", self.content_type)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@contextmanager
+def serve_page(source: Source, body: bytes, content_type: str) -> Iterator[str]:
+    """Локальный сервер со страницей источника; возвращает URL с тем же путём и query."""
+    handler = type("Handler", (_FixtureHandler,), {"body": body, "content_type": content_type})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    parts = urlsplit(source.url)
+    url = f"http://127.0.0.1:{server.server_address[1]}{parts.path or '/'}"
+    if parts.query:
+        url += f"?{parts.query}"
+    try:
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+async def replay_source(source: Source, browser: FixtureBrowser | None = None) -> list[Internship]:
+    """
+    Прогнать настоящий парсер источника по записанной фикстуре.
+    Для Playwright-источника можно передать свой FixtureBrowser (чтобы снять его время).
+    """
+    directory = fixture_dir(source)
+    if source.uses_browser:
+        if browser is not None:
+            return await source.parse_fn(source.url, browser=browser)
+        async with FixtureBrowser(directory / "network.har") as own:
+            return await source.parse_fn(source.url, browser=own)
+
+    meta = load_fixture(source)
+    body = (directory / "page.html").read_bytes()
+    with serve_page(source, body, meta["content_type"]) as local_url:
+        if inspect.iscoroutinefunction(source.parse_fn):
+            items = await source.parse_fn(local_url)
+        else:
+            items = await asyncio.to_thread(source.parse_fn, local_url)
+    # Заглушки парсеров ссылаются на переданный URL - возвращаем вместо локального исходный
+    return [
+        Internship(i.company, i.title, source.url if i.url == local_url else i.url, i.status)
+        for i in items
+    ]
+
+
+async def record_source(source: Source) -> list[Internship]:
+    """Записать страницу источника с живого сайта и сохранить результат разбора записи."""
+    directory = fixture_dir(source)
+    directory.mkdir(parents=True, exist_ok=True)
+    content_type = "text/html; charset=utf-8"
+
+    if source.uses_browser:
+        har_path = directory / "network.har"
+        har_path.unlink(missing_ok=True)
+        # HAR дописывается при закрытии контекста, т.е. по выходу из парсера
+        async with FixtureBrowser(har_path, record=True) as browser:
+            await source.parse_fn(source.url, browser=browser)
+    else:
+        import requests
+        from config import REQUESTS_TIMEOUT_SEC
+
+        resp = requests.get(source.url, timeout=REQUESTS_TIMEOUT_SEC)
+        resp.raise_for_status()
+        content_type = resp.headers.get("Content-Type", content_type)
+        (directory / "page.html").write_bytes(resp.content)
+
+    meta = {
+        "company": source.company,
+        "url": source.url,
+        "recorded_at": datetime.utcnow().isoformat() + "Z",
+        "content_type": content_type,
+        "items": [],
+    }
+    _save_fixture(source, meta)
+    return await update_source(source)
+
+
+def _save_fixture(source: Source, meta: dict) -> None:
+    text = json.dumps(meta, ensure_ascii=False, indent=2) + "\n"
+    (fixture_dir(source) / "fixture.json").write_text(text, encoding="utf-8")
+
+
+async def update_source(source: Source) -> list[Internship]:
+    """Пересобрать эталон по уже записанной странице (без сети) — после намеренной правки парсера."""
+    # Эталон — разбор именно записи: так check сравнивает парсер с самим собой, а не с сайтом
+    items = await replay_source(source)
+    meta = load_fixture(source)
+    meta["items"] = [asdict(i) for i in items]
+    _save_fixture(source, meta)
+    return items
+
+
+def diff_items(expected: list[Internship], actual: list[Internship]) -> list[str]:
+    """Расхождения результата с эталоном — по строке на пропавшую, лишнюю или изменённую запись."""
+    expected_by_key = {i.unique_key(): i for i in expected}
+    actual_by_key = {i.unique_key(): i for i in actual}
+    lines = []
+    for key, item in expected_by_key.items():
+        got = actual_by_key.get(key)
+        if got is None:
+            lines.append(f"- {item.title} ({item.status})")
+        elif got != item:
+            lines.append(f"~ {item.title}: {item.status} {item.url} -> {got.status} {got.url}")
+    for key, item in actual_by_key.items():
+        if key not in expected_by_key:
+            lines.append(f"+ {item.title} ({item.status})")
+    if not lines and [i.unique_key() for i in expected] != [i.unique_key() for i in actual]:
+        lines.append("порядок записей изменился")
+    return lines
+
+
+async def check_source(source: Source) -> list[str]:
+    """Прогнать парсер по фикстуре и сравнить с эталоном."""
+    expected = [Internship(**item) for item in load_fixture(source)["items"]]
+    return diff_items(expected, await replay_source(source))
+
+
+def select_sources(name: str | None) -> list[Source]:
+    if name is None:
+        return list(SOURCES)
+    selected = [s for s in SOURCES if name.lower() in (s.company.lower(), fixture_dir(s).name)]
+    if not selected:
+        raise SystemExit(f"Неизвестный источник: {name}")
+    return selected
+
+
+async def _main(args: argparse.Namespace) -> int:
+    failed = 0
+    for source in select_sources(args.source):
+        if args.command == "record":
+            try:
+                items = await record_source(source)
+            except Exception as e:
+                failed += 1
+                print(f"[{source.company}] не записан: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            print(f"[{source.company}] записан: {fixture_dir(source)}, записей: {len(items)}")
+            continue
+
+        if not has_fixture(source):
+            print(f"[{source.company}] нет фикстуры, пропуск")
+            continue
+        if args.command == "update":
+            items = await update_source(source)
+            print(f"[{source.company}] эталон обновлён: {fixture_dir(source)}, записей: {len(items)}")
+            continue
+        try:
+            lines = await check_source(source)
+        except Exception as e:
+            lines = [f"ошибка: {type(e).__name__}: {e}"]
+        if lines:
+            failed += 1
+            print(f"[{source.company}] расхождения с фикстурой:")
+            for line in lines:
+                print(f"  {line}")
+        else:
+            print(f"[{source.company}] ok")
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Запись и проверка фикстур парсеров")
+    parser.add_argument("command", choices=["record", "update", "check"])
+    parser.add_argument("--source", help="название компании или имя модуля парсера (по умолчанию все)")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
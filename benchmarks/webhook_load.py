@@ -0,0 +1,233 @@
+"""
+Локальная проверка webhook-режима бота без Telegram.
+
+Поднимается заглушка Bot API (getMe, setWebhook, sendMessage, ...), бот запускается
+отдельным процессом в webhook-режиме против неё (TELEGRAM_API_URL, WEBHOOK_*) на копии БД,
+и на вебхук POST'ом отправляются синтетические апдейты с командой от разных чатов.
+Задержка команды — от POST апдейта до прихода ответа этому чату в заглушку (sendMessage).
+Заодно проверяется, что апдейт с неверным секретом отклоняется.
+
+Лимиты доставки в процессе бота сняты (DELIVERY_*_RATE), чтобы мерить приём и обработку,
+а не token bucket'ы.
+
+Запуск: python -m benchmarks.webhook_load --updates 200 [--command /stats] [--bot interactive_bot.py]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import requests
+
+from config import BASE_DIR, DB_PATH
+
+TOKEN = "123456:LOCAL-TEST"
+SECRET = "local-test-secret"
+
+
+class FakeBotApi:
+    """Заглушка Bot API: отвечает на вызовы бота и запоминает, когда какой чат получил ответ."""
+
+    def __init__(self) -> None:
+        self.replies: dict[int, float] = {}  # chat_id -> время первого sendMessage
+        self.calls: dict[str, int] = {}
+        self.webhook_set = threading.Event()
+        self._lock = threading.Lock()
+        self._message_id = 0
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if "json" in (self.headers.get("Content-Type") or ""):
+                    params = json.loads(body or b"{}")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+                result = api.handle(self.path.rsplit("/", 1)[-1], params)
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def handle(self, method: str, params: dict):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Test", "username": "test_bot"}
+        if method == "setWebhook":
+            self.webhook_set.set()
+            return True
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            with self._lock:
+                self._message_id += 1
+                self.replies.setdefault(chat_id, time.perf_counter())
+                message_id = self._message_id
+            return {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        return True
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Апдейт с командой от пользователя в личке, как его присылает Telegram."""
+    command = text.split()[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "Test"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"вебхук не поднялся на порту {port}")
+
+
+def run(args: argparse.Namespace) -> int:
+    api = FakeBotApi()
+    workdir = Path(tempfile.mkdtemp(prefix="webhook_load_"))
+    port = _free_port()
+    if DB_PATH.exists():
+        shutil.copy(DB_PATH, workdir / "internships.db")
+    env = {
+        **os.environ,
+        "TELEGRAM_BOT_TOKEN": TOKEN,
+        "TELEGRAM_CHAT_ID": "-1001",
+        "TELEGRAM_API_URL": api.url,
+        "DB_PATH": str(workdir / "internships.db"),
+        "WEBHOOK_URL": f"http://127.0.0.1:{port}",
+        "WEBHOOK_LISTEN": "127.0.0.1",
+        "WEBHOOK_PORT": str(port),
+        "WEBHOOK_PATH": "telegram",
+        "WEBHOOK_SECRET": SECRET,
+        "DELIVERY_GLOBAL_RATE": "100000",
+        "DELIVERY_CHAT_RATE": "100000",
+        "DELIVERY_GROUP_RATE": "100000",
+    }
+    if args.concurrency:
+        env["BOT_CONCURRENT_UPDATES"] = str(args.concurrency)
+    bot = subprocess.Popen(
+        [sys.executable, str(BASE_DIR / args.bot)],
+        env=env,
+        cwd=BASE_DIR,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    hook = f"http://127.0.0.1:{port}/telegram"
+    try:
+        if not api.webhook_set.wait(args.startup_timeout):
+            print("Бот не зарегистрировал вебхук (--verbose покажет его вывод)")
+            return 1
+        _wait_for_port(port, args.startup_timeout)
+
+        # Чужой запрос: без верного секрета апдейт не должен дойти до обработчиков
+        rejected = requests.post(
+            hook, json=make_update(1, 1, args.command),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}, timeout=5,
+        )
+
+        session = requests.Session()
+        sent_at: dict[int, float] = {}
+
+        def post(n: int) -> int:
+            chat_id = 10_000 + n
+            sent_at[chat_id] = time.perf_counter()
+            resp = session.post(
+                hook, json=make_update(100 + n, chat_id, args.command),
+                headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}, timeout=10,
+            )
+            return resp.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            codes = list(pool.map(post, range(args.updates)))
+        deadline = time.monotonic() + args.reply_timeout
+        while time.monotonic() < deadline and len(set(sent_at) & set(api.replies)) < args.updates:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(
+            (api.replies[chat_id] - sent_at[chat_id]) * 1000 for chat_id in sent_at if chat_id in api.replies
+        )
+        print(f"бот: {args.bot}, команда: {args.command}, апдейтов: {args.updates}, клиентов: {args.clients}")
+        print(f"  ответ вебхука: {codes.count(200)} из {len(codes)} — 200")
+        print(f"  неверный секрет: HTTP {rejected.status_code}, ответов в чат 1: {int(1 in api.replies)}")
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f"  ответов: {len(latencies)}; задержка мс: медиана {statistics.median(latencies):.1f}, "
+                f"p95 {p95:.1f}, макс. {latencies[-1]:.1f}; {len(latencies) / elapsed:.0f} команд/с"
+            )
+        ok = rejected.status_code == 403 and 1 not in api.replies and len(latencies) == args.updates
+        return 0 if ok else 1
+    finally:
+        bot.terminate()
+        try:
+            bot.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+        api.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Синтетические апдейты на webhook бота (без Telegram)")
+    parser.add_argument("--bot", default="interactive_bot.py", help="скрипт бота")
+    parser.add_argument("--command", default="/stats", help="текст команды в апдейтах")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16, help="параллельных POST'ов")
+    parser.add_argument("--concurrency", type=int, help="BOT_CONCURRENT_UPDATES для бота")
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    parser.add_argument("--reply-timeout", type=float, default=30)
+    parser.add_argument("--verbose", action="store_true", help="показать вывод бота")
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
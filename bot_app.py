@@ -0,0 +1,43 @@
+"""
+Общий запуск ботов (interactive_bot.py, auto_digest_bot.py).
+- апдейты обрабатываются параллельно (BOT_CONCURRENT_UPDATES): медленная команда
+  не задерживает ответы другим пользователям;
+- апдейты приходят long polling'ом или, если задан WEBHOOK_URL, на webhook —
+  встроенный сервер python-telegram-bot (extra [webhooks]). Запросы без верного
+  заголовка X-Telegram-Bot-Api-Secret-Token сервер отклоняет сам (403).
+"""
+import secrets
+
+from telegram.ext import Application
+
+import config
+
+
+def build_application(token: str) -> Application:
+    """Application с параллельной обработкой апдейтов и, если задан, своим сервером Bot API."""
+    builder = Application.builder().token(token).concurrent_updates(config.BOT_CONCURRENT_UPDATES)
+    if config.TELEGRAM_API_URL:
+        api = config.TELEGRAM_API_URL.rstrip("/")
+        builder = builder.base_url(f"{api}/bot").base_file_url(f"{api}/file/bot")
+    return builder.build()
+
+
+async def start_receiving(app: Application) -> str:
+    """
+    Начать приём апдейтов: webhook, если задан WEBHOOK_URL, иначе long polling.
+    Вебхук регистрируется в Telegram при каждом запуске; без WEBHOOK_SECRET
+    секрет генерируется заново. Возвращает описание режима для лога.
+    """
+    if not config.WEBHOOK_URL:
+        await app.updater.start_polling()
+        return "long polling"
+
+    path = config.WEBHOOK_PATH.strip("/")
+    await app.updater.start_webhook(
+        listen=config.WEBHOOK_LISTEN,
+        port=config.WEBHOOK_PORT,
+        url_path=path,
+        webhook_url=f"{config.WEBHOOK_URL.rstrip('/')}/{path}",
+        secret_token=config.WEBHOOK_SECRET or secrets.token_urlsafe(32),
+    )
+    return f"webhook на {config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}/{path}"
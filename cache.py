@@ -0,0 +1,146 @@
+"""
+Кэш в памяти процесса для ответов ботов.
+- VersionedCache: результаты запросов и готовые сообщения живут, пока не сменилась
+  версия данных в БД (db_version, её увеличивает upsert_and_get_changes()).
+  Серия одинаковых команд стоит одного запроса и одной сборки сообщения;
+- BlockCache: HTML-блоки стажировок по ключу (id, отпечаток строки) —
+  общие для списков ботов и дайджестов;
+- SingleFlight: одна выполняющаяся задача на всех вызывающих (проверка источников в боте)
+  плюс окно свежести её результата.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Generic, Hashable, NamedTuple, TypeVar
+
+from db import get_db_version
+
+T = TypeVar("T")
+
+
+class VersionedCache:
+    """Значения, действительные для одной версии БД; при смене версии кэш очищается целиком."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self._version: int | None = None
+        self._values: dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], T]) -> T:
+        """Значение по ключу; если его нет или версия БД сменилась — build() и запомнить."""
+        # Базы ещё нет: кэшировать нечего, и создавать файл ради версии не нужно
+        if not self.db_path.exists():
+            return build()
+        version = get_db_version(self.db_path)
+        with self._lock:
+            if version != self._version:
+                self._values.clear()
+                self._version = version
+            elif key in self._values:
+                return self._values[key]
+        value = build()
+        with self._lock:
+            if self._version == version:
+                self._values[key] = value
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._version = None
+
+
+class BlockCache:
+    """LRU-кэш отрендеренных блоков: ключ включает отпечаток, поэтому устаревших записей не бывает."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        self._blocks: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, render: Callable[[], str]) -> str:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+        block = render()
+        with self._lock:
+            self._blocks[key] = block
+            if len(self._blocks) > self.maxsize:
+                self._blocks.popitem(last=False)
+        return block
+
+
+# Откуда вызывающий получил результат SingleFlight.run()
+FLIGHT_OWN = "own"  # запустил задачу сам
+FLIGHT_JOINED = "joined"  # присоединился к уже идущей
+FLIGHT_CACHED = "cached"  # получил свежий результат прошлого запуска
+
+
+class FlightResult(NamedTuple, Generic[T]):
+    value: T
+    finished_at: datetime
+    origin: str  # FLIGHT_OWN / FLIGHT_JOINED / FLIGHT_CACHED
+
+
+class SingleFlight(Generic[T]):
+    """
+    Дорогая async-задача, которая не выполняется параллельно сама с собой:
+    вызовы во время выполнения ждут тот же запуск, а результат моложе max_age секунд
+    отдаётся без нового запуска. Ошибка запуска получают все его ожидающие, она не кэшируется.
+    Отмена одного ожидающего не отменяет запуск для остальных.
+    """
+
+    def __init__(self, max_age: float) -> None:
+        self.max_age = max_age
+        self._task: asyncio.Task | None = None
+        self._value: T | None = None
+        self._finished: float | None = None  # time.monotonic() окончания последнего удачного запуска
+        self._finished_at: datetime | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def last(self) -> FlightResult[T] | None:
+        """Результат последнего удачного запуска (как бы давно он ни был)."""
+        if self._finished_at is None:
+            return None
+        return FlightResult(self._value, self._finished_at, FLIGHT_CACHED)
+
+    def age(self) -> float | None:
+        """Сколько секунд назад закончился последний удачный запуск."""
+        return None if self._finished is None else time.monotonic() - self._finished
+
+    async def run(self, fn: Callable[[], Awaitable[T]], max_age: float | None = None) -> FlightResult[T]:
+        """Результат fn(): свежий из прошлого запуска, из идущего запуска или из нового."""
+        max_age = self.max_age if max_age is None else max_age
+        age = self.age()
+        if self._task is None and age is not None and age < max_age:
+            return FlightResult(self._value, self._finished_at, FLIGHT_CACHED)
+        origin = FLIGHT_JOINED
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(fn))
+            origin = FLIGHT_OWN
+        value = await asyncio.shield(self._task)
+        return FlightResult(value, self._finished_at, origin)
+
+    async def wait(self) -> None:
+        """Дождаться идущего запуска, если он есть (его ошибка не пробрасывается)."""
+        if self._task is not None:
+            await asyncio.wait([self._task])
+
+    async def _run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await fn()
+        finally:
+            self._task = None
+        self._value = value
+        self._finished = time.monotonic()
+        self._finished_at = datetime.now()
+        return value
@@ -20,14 +20,66 @@ def _env(key: str, default: str | None = None) -> str | None:
 # Telegram
 TELEGRAM_BOT_TOKEN: str | None = _env("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID: str | None = _env("TELEGRAM_CHAT_ID")  # ID чата или @channel_username
+# Свой сервер Bot API (локальный telegram-bot-api или заглушка для проверки), по умолчанию api.telegram.org
+TELEGRAM_API_URL: str | None = _env("TELEGRAM_API_URL")
+
+# Боты: сколько апдейтов обрабатывать одновременно
+BOT_CONCURRENT_UPDATES: int = int(_env("BOT_CONCURRENT_UPDATES", "16"))
+# Webhook вместо long polling: задан WEBHOOK_URL (публичный адрес) — апдейты принимает встроенный сервер
+WEBHOOK_URL: str | None = _env("WEBHOOK_URL")
+WEBHOOK_LISTEN: str = _env("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT: int = int(_env("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH: str = _env("WEBHOOK_PATH", "telegram")
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token (1–256 символов A-Z a-z 0-9 _ -)
+WEBHOOK_SECRET: str | None = _env("WEBHOOK_SECRET")
 
 # База данных
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH: Path = Path(_env("DB_PATH") or str(BASE_DIR / "internships.db"))
+# Сколько ждать снятия блокировки записи другим процессом (cron и бот пишут в один файл)
+DB_BUSY_TIMEOUT_SEC: float = float(_env("DB_BUSY_TIMEOUT_SEC", "10"))
 
 # Playwright
 PLAYWRIGHT_HEADLESS: bool = (_env("PLAYWRIGHT_HEADLESS", "true").lower() in ("1", "true", "yes"))
 PLAYWRIGHT_TIMEOUT_MS: int = int(_env("PLAYWRIGHT_TIMEOUT_MS", "15000"))
 
+# Сбор источников: сколько источников парсить одновременно и дедлайн на один источник
+COLLECT_MAX_WORKERS: int = int(_env("COLLECT_MAX_WORKERS", "3"))
+SOURCE_TIMEOUT_SEC: float = float(_env("SOURCE_TIMEOUT_SEC", "90"))
+# Расписание опроса источников (scheduler.py), секунды: базовый интервал, частый опрос после изменений,
+# опрос при статусе «скоро откроется», потолок для стабильных и падающих источников
+SCHEDULE_BASE_SEC: float = float(_env("SCHEDULE_BASE_SEC", str(4 * 3600)))
+SCHEDULE_MIN_SEC: float = float(_env("SCHEDULE_MIN_SEC", "1800"))
+SCHEDULE_SOON_SEC: float = float(_env("SCHEDULE_SOON_SEC", "3600"))
+SCHEDULE_MAX_SEC: float = float(_env("SCHEDULE_MAX_SEC", str(12 * 3600)))
+# Во сколько раз растёт интервал после прогона без изменений; случайный сдвиг запуска (доля интервала)
+SCHEDULE_BACKOFF: float = float(_env("SCHEDULE_BACKOFF", "1.5"))
+SCHEDULE_JITTER: float = float(_env("SCHEDULE_JITTER", "0.1"))
+# Здоровье источников: после скольких ошибок подряд цепь размыкается (источник ждёт паузу,
+# отдаётся прошлый результат) и во сколько раз должно упасть число записей, чтобы счесть это обвалом
+SOURCE_BREAKER_THRESHOLD: int = int(_env("SOURCE_BREAKER_THRESHOLD", "3"))
+SOURCE_COLLAPSE_RATIO: float = float(_env("SOURCE_COLLAPSE_RATIO", "0.5"))
+# Как часто бот смотрит, не подошло ли время какого-нибудь источника
+SCHEDULE_TICK_SEC: float = float(_env("SCHEDULE_TICK_SEC", "60"))
+# Пробы источников (parsers/probe.py): как часто запускать и сколько минимум ждать
+# после полного сбора, прежде чем изменившаяся проба запустит новый
+PROBE_INTERVAL_SEC: float = float(_env("PROBE_INTERVAL_SEC", "300"))
+PROBE_COOLDOWN_SEC: float = float(_env("PROBE_COOLDOWN_SEC", "900"))
+# Бот: результат проверки источников моложе этого окна (секунды) отдаётся /check без нового сбора
+CHECK_FRESHNESS_SEC: float = float(_env("CHECK_FRESHNESS_SEC", "300"))
+
+# Доставка в Telegram: лимиты (сообщений в секунду) и число повторов при 429 и сетевых ошибках
+DELIVERY_GLOBAL_RATE: float = float(_env("DELIVERY_GLOBAL_RATE", "25"))
+DELIVERY_CHAT_RATE: float = float(_env("DELIVERY_CHAT_RATE", "1"))
+DELIVERY_GROUP_RATE: float = float(_env("DELIVERY_GROUP_RATE", str(20 / 60)))
+DELIVERY_MAX_RETRIES: int = int(_env("DELIVERY_MAX_RETRIES", "5"))
+# Рассылка подписчикам: одновременных запросов к Bot API и ошибок доставки подряд до отключения чата
+DELIVERY_CONCURRENCY: int = int(_env("DELIVERY_CONCURRENCY", "16"))
+SUBSCRIBER_MAX_FAILURES: int = int(_env("SUBSCRIBER_MAX_FAILURES", "5"))
+
 # Requests
 REQUESTS_TIMEOUT_SEC: int = int(_env("REQUESTS_TIMEOUT_SEC", "15"))
+# Дисковый кэш HTTP-ответов (ETag / Last-Modified) для условных запросов
+HTTP_CACHE_DIR: Path = Path(_env("HTTP_CACHE_DIR") or str(BASE_DIR / ".cache" / "http"))
+# Парсер HTML для BeautifulSoup: lxml (быстрый, C) или html.parser (встроенный)
+HTML_PARSER: str = _env("HTML_PARSER", "lxml")
@@ -1,14 +1,23 @@
 """
 Работа с SQLite: хранение стажировок и определение новых/изменённых.
 """
+import json
 import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
 from pathlib import Path
-from typing import NamedTuple
+from typing import Iterable, Iterator, NamedTuple
 
-from parsers.base import Internship
+from config import DB_BUSY_TIMEOUT_SEC
+from parsers.base import Internship, SourceSnapshot
+from parsers.status import KIND_OPEN, KIND_UNKNOWN, status_kind
 
 
-# Таблица: уникальный ключ (company|title), все поля, дата последнего обновления
+# Таблица: уникальный ключ (company|title), все поля, отпечаток url+status, дата последнего обновления.
+# status — текст от парсера как есть, status_kind — он же, нормализованный при записи
+# (open / soon / closed / unknown, см. parsers.status.status_kind)
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS internships (
     id TEXT PRIMARY KEY,
@@ -16,40 +25,571 @@ CREATE TABLE IF NOT EXISTS internships (
     title TEXT NOT NULL,
     url TEXT NOT NULL,
     status TEXT NOT NULL,
-    updated_at TEXT NOT NULL
+    updated_at TEXT NOT NULL,
+    fingerprint TEXT,
+    status_kind TEXT
 );
 CREATE INDEX IF NOT EXISTS idx_internships_updated ON internships(updated_at);
+-- Порядок вывода списков: постраничная выборка идёт по этому индексу от курсора (company, title)
+CREATE INDEX IF NOT EXISTS idx_internships_company_title ON internships(company, title);
+
+-- Счётчики для /stats, ведутся триггерами (см. DERIVED_SCHEMA): по компаниям и итог одной строкой.
+-- Стажировок с неизвестным статусом (unknown) = total - open - soon - closed
+CREATE TABLE IF NOT EXISTS company_stats (
+    company TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    open INTEGER NOT NULL DEFAULT 0,
+    soon INTEGER NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS stats_summary (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total INTEGER NOT NULL DEFAULT 0,
+    open INTEGER NOT NULL DEFAULT 0,
+    soon INTEGER NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    companies INTEGER NOT NULL DEFAULT 0
+);
+
+-- Версия данных: увеличивается при каждом изменении internships через upsert_and_get_changes().
+-- По ней кэши в процессах ботов понимают, что ответы пора пересобрать
+CREATE TABLE IF NOT EXISTS db_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO db_version (id, version) VALUES (1, 0);
+
+-- Подписчики дайджеста (/subscribe). active = 0 — отписался или чат недоступен;
+-- failures — ошибки доставки подряд, сбрасываются первой успешной отправкой
+CREATE TABLE IF NOT EXISTS subscribers (
+    chat_id INTEGER PRIMARY KEY,
+    title TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    subscribed_at TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    last_sent_at TEXT
+);
+
+-- Фильтры подписчиков (/filter): строка на значение условия, field — company / keyword / event
+-- (см. routing.py). Условий нет — чат получает все изменения
+CREATE TABLE IF NOT EXISTS subscriber_filters (
+    chat_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (chat_id, field, value)
+) WITHOUT ROWID;
+
+-- Расписание и здоровье источников (scheduler.py): свой интервал и время следующего запуска у каждого,
+-- ошибки подряд (цепь размыкается после SOURCE_BREAKER_THRESHOLD), последняя ошибка и отпечаток
+-- обвалившегося результата, ждущего подтверждения. Время — UTC в ISO-формате, как updated_at
+CREATE TABLE IF NOT EXISTS source_schedule (
+    company TEXT PRIMARY KEY,
+    interval_sec REAL NOT NULL,
+    next_run_at TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_run_at TEXT,
+    last_change_at TEXT,
+    last_error TEXT NOT NULL DEFAULT '',
+    suspect_fingerprint TEXT NOT NULL DEFAULT ''
+);
+
+-- Последний отпечаток пробы источника (parsers/probe.py); время — UTC в ISO-формате
+CREATE TABLE IF NOT EXISTS source_probes (
+    company TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    probed_at TEXT NOT NULL
+);
+
+-- Последний результат каждого источника: отпечаток, стажировки в JSON
+-- и отпечаток сырых данных страницы, из которых они собраны (parsers.base.check_payload)
+CREATE TABLE IF NOT EXISTS source_snapshots (
+    company TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    items TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    payload_fingerprint TEXT NOT NULL DEFAULT ''
+);
+"""
+
+# Индексы и триггеры по колонкам, которые в старых базах появляются только после _migrate()
+DERIVED_SCHEMA = """
+-- Открытые стажировки в порядке вывода: /internships и счётчик открытых читают только этот индекс
+CREATE INDEX IF NOT EXISTS idx_internships_open ON internships(company, title) WHERE status_kind = 'open';
+
+-- Счётчики статистики обновляются в той же транзакции, что и строки internships.
+-- IS вместо =: строка без status_kind (NULL) не должна обнулять счётчик
+CREATE TRIGGER IF NOT EXISTS trg_stats_insert AFTER INSERT ON internships
+BEGIN
+    INSERT OR IGNORE INTO company_stats (company) VALUES (NEW.company);
+    UPDATE company_stats SET
+        total = total + 1,
+        open = open + (NEW.status_kind IS 'open'),
+        soon = soon + (NEW.status_kind IS 'soon'),
+        closed = closed + (NEW.status_kind IS 'closed')
+    WHERE company = NEW.company;
+    UPDATE stats_summary SET
+        total = total + 1,
+        open = open + (NEW.status_kind IS 'open'),
+        soon = soon + (NEW.status_kind IS 'soon'),
+        closed = closed + (NEW.status_kind IS 'closed'),
+        companies = companies + (SELECT total = 1 FROM company_stats WHERE company = NEW.company)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_delete AFTER DELETE ON internships
+BEGIN
+    UPDATE company_stats SET
+        total = total - 1,
+        open = open - (OLD.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed')
+    WHERE company = OLD.company;
+    UPDATE stats_summary SET
+        total = total - 1,
+        open = open - (OLD.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed'),
+        companies = companies - (SELECT total = 0 FROM company_stats WHERE company = OLD.company)
+    WHERE id = 1;
+    DELETE FROM company_stats WHERE company = OLD.company AND total = 0;
+END;
+
+-- Смена статуса внутри компании: число строк и компаний не меняется
+CREATE TRIGGER IF NOT EXISTS trg_stats_status AFTER UPDATE OF status_kind ON internships
+WHEN OLD.company IS NEW.company AND OLD.status_kind IS NOT NEW.status_kind
+BEGIN
+    UPDATE company_stats SET
+        open = open - (OLD.status_kind IS 'open') + (NEW.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon') + (NEW.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed') + (NEW.status_kind IS 'closed')
+    WHERE company = NEW.company;
+    UPDATE stats_summary SET
+        open = open - (OLD.status_kind IS 'open') + (NEW.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon') + (NEW.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed') + (NEW.status_kind IS 'closed')
+    WHERE id = 1;
+END;
+
+-- Переезд строки в другую компанию: вычитание из старой и прибавление к новой
+CREATE TRIGGER IF NOT EXISTS trg_stats_move AFTER UPDATE OF company, status_kind ON internships
+WHEN OLD.company IS NOT NEW.company
+BEGIN
+    UPDATE company_stats SET
+        total = total - 1,
+        open = open - (OLD.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed')
+    WHERE company = OLD.company;
+    INSERT OR IGNORE INTO company_stats (company) VALUES (NEW.company);
+    UPDATE company_stats SET
+        total = total + 1,
+        open = open + (NEW.status_kind IS 'open'),
+        soon = soon + (NEW.status_kind IS 'soon'),
+        closed = closed + (NEW.status_kind IS 'closed')
+    WHERE company = NEW.company;
+    UPDATE stats_summary SET
+        open = open - (OLD.status_kind IS 'open') + (NEW.status_kind IS 'open'),
+        soon = soon - (OLD.status_kind IS 'soon') + (NEW.status_kind IS 'soon'),
+        closed = closed - (OLD.status_kind IS 'closed') + (NEW.status_kind IS 'closed'),
+        companies = companies
+            - (SELECT total = 0 FROM company_stats WHERE company = OLD.company)
+            + (SELECT total = 1 FROM company_stats WHERE company = NEW.company)
+    WHERE id = 1;
+    DELETE FROM company_stats WHERE company = OLD.company AND total = 0;
+END;
 """
 
+# Настройки каждого соединения. journal_mode=WAL хранится в самом файле БД:
+# читатели не блокируют писателя и наоборот, cron-запись не мешает боту читать.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # в WAL безопасно и без fsync на каждый commit
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # ~16 МБ страничного кэша
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA foreign_keys = ON",
+)
+
+# Размер кэша подготовленных выражений на соединение (соединения живут долго, кэш работает)
+STATEMENT_CACHE_SIZE = 256
+
 
 class Change(NamedTuple):
     """Изменение: новая запись или обновлённый статус."""
     internship: Internship
     is_new: bool  # True = новая, False = изменился статус
+    previous_kind: str | None = None  # вид статуса до изменения (None у новой записи)
+    kind: str = KIND_UNKNOWN  # вид статуса после изменения (parsers.status.status_kind)
 
 
-def get_connection(db_path: Path) -> sqlite3.Connection:
-    """Подключение к SQLite с включённым foreign_keys и row_factory."""
-    conn = sqlite3.connect(str(db_path))
+def get_connection(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Новое подключение к SQLite: WAL, настроенные PRAGMA, busy timeout и row_factory.
+    Напрямую не используется: соединения раздаёт ConnectionManager.
+    """
+    conn = sqlite3.connect(
+        str(db_path),
+        timeout=DB_BUSY_TIMEOUT_SEC,
+        check_same_thread=check_same_thread,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+class ConnectionManager:
+    """
+    Долгоживущие соединения к одному файлу БД:
+    - читатель кэшируется на поток (sqlite3-соединение нельзя делить между потоками);
+    - писатель один на процесс, доступ к нему сериализуется блокировкой.
+    Схема создаётся и мигрируется один раз, при первом обращении к писателю;
+    _writer выставляется только после коммита схемы, так что по нему видно, что она готова.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._writer: sqlite3.Connection | None = None
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            conn = get_connection(self.db_path, check_same_thread=False)
+            conn.executescript(SCHEMA)
+            # Миграцию и счётчики другой процесс может выполнять одновременно - под блокировкой записи
+            conn.execute("BEGIN IMMEDIATE")
+            _migrate(conn)
+            conn.commit()
+            conn.executescript(DERIVED_SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+            _init_stats(conn)
+            conn.commit()
+            self._writer = conn
+        return self._writer
+
+    def init(self) -> None:
+        """
+        Создать схему, если её ещё нет. Когда схема уже есть, блокировка писателя
+        не берётся: чтения не ждут чужую транзакцию записи.
+        """
+        if self._writer is not None:
+            return
+        with self._write_lock:
+            self._get_writer()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Соединение для чтения, закреплённое за текущим потоком."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = get_connection(self.db_path)
+            self._local.conn = conn
+        yield conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Единственный писатель: транзакция коммитится при выходе, откатывается при ошибке.
+        Транзакция начинается с BEGIN IMMEDIATE: блокировка записи берётся сразу, и другой
+        процесс (main.py по cron) не может вклиниться между чтением и записью одной секции.
+        """
+        with self._write_lock:
+            conn = self._get_writer()
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+
+_managers: dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path: Path) -> ConnectionManager:
+    """Менеджер соединений для файла БД (один на путь в пределах процесса)."""
+    key = str(Path(db_path).resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = ConnectionManager(Path(db_path))
+        return manager
+
+
+def read_connection(db_path: Path):
+    """Контекст с кэшированным соединением для чтения (см. ConnectionManager.reader)."""
+    return get_manager(db_path).reader()
+
+
+def write_connection(db_path: Path):
+    """Контекст с единственным соединением для записи (см. ConnectionManager.writer)."""
+    return get_manager(db_path).writer()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """
+    Довести схему старой базы до текущей: колонки fingerprint и status_kind и их заполнение,
+    колонки здоровья в source_schedule, отпечаток сырых данных в source_snapshots.
+    """
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(source_schedule)")}
+    for column in ("last_error", "suspect_fingerprint"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE source_schedule ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(source_snapshots)")}
+    if "payload_fingerprint" not in columns:
+        conn.execute("ALTER TABLE source_snapshots ADD COLUMN payload_fingerprint TEXT NOT NULL DEFAULT ''")
+
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(internships)")}
+    if "fingerprint" not in columns:
+        conn.execute("ALTER TABLE internships ADD COLUMN fingerprint TEXT")
+    if "status_kind" not in columns:
+        conn.execute("ALTER TABLE internships ADD COLUMN status_kind TEXT")
+
+    rows = conn.execute(
+        "SELECT id, company, title, url, status FROM internships WHERE fingerprint IS NULL"
+    ).fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE internships SET fingerprint = ? WHERE id = ?",
+            [(_row_to_internship(row).fingerprint(), row["id"]) for row in rows],
+        )
+
+    # Прежний общий триггер обновления прибавлял компанию на каждую смену статуса
+    # в компании из одной строки; его заменили trg_stats_status и trg_stats_move
+    conn.execute("DROP TRIGGER IF EXISTS trg_stats_update")
+
+    rows = conn.execute("SELECT id, status FROM internships WHERE status_kind IS NULL").fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE internships SET status_kind = ? WHERE id = ?",
+            [(status_kind(row["status"] or ""), row["id"]) for row in rows],
+        )
+
+
+def _init_stats(conn: sqlite3.Connection) -> None:
+    """
+    Заполнить счётчики статистики по текущим строкам, если их ещё нет
+    (новая база или база до появления триггеров). Дальше их ведут триггеры.
+    У существующих счётчиков сверяется число компаний.
+    """
+    if conn.execute("SELECT 1 FROM stats_summary WHERE id = 1").fetchone():
+        # Число компаний могло уползти из-за прежнего триггера: сверяем с company_stats
+        conn.execute("UPDATE stats_summary SET companies = (SELECT COUNT(*) FROM company_stats) WHERE id = 1")
+        return
+    conn.execute("DELETE FROM company_stats")
+    conn.execute("""
+        INSERT INTO company_stats (company, total, open, soon, closed)
+        SELECT company, COUNT(*),
+               SUM(status_kind IS 'open'), SUM(status_kind IS 'soon'), SUM(status_kind IS 'closed')
+        FROM internships
+        GROUP BY company
+    """)
+    conn.execute("""
+        INSERT INTO stats_summary (id, total, open, soon, closed, companies)
+        SELECT 1, IFNULL(SUM(total), 0), IFNULL(SUM(open), 0), IFNULL(SUM(soon), 0),
+               IFNULL(SUM(closed), 0), COUNT(*)
+        FROM company_stats
+    """)
+
+
 def init_db(db_path: Path) -> None:
-    """Создать таблицы, если их нет."""
-    with get_connection(db_path) as conn:
-        conn.executescript(SCHEMA)
+    """Создать таблицы, если их нет, и мигрировать старую схему (один раз за процесс)."""
+    get_manager(db_path).init()
 
 
 def get_internships_count(db_path: Path) -> int:
     """Вернуть количество стажировок в базе."""
     init_db(db_path)
-    with get_connection(db_path) as conn:
+    with read_connection(db_path) as conn:
         row = conn.execute("SELECT COUNT(*) FROM internships").fetchone()
         return row[0] if row else 0
 
 
+def get_db_version(db_path: Path) -> int:
+    """Версия данных (см. таблицу db_version): сменилась — закэшированные ответы устарели."""
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        return conn.execute("SELECT version FROM db_version WHERE id = 1").fetchone()[0]
+
+
+# Колонки строки списка; rowid — курсор страницы (короткий, помещается в callback_data)
+_LIST_COLUMNS = "rowid, company, title, status, url, id, fingerprint, status_kind"
+
+
+def get_internships_page(
+    db_path: Path,
+    only_open: bool = False,
+    after: int | None = None,
+    before: int | None = None,
+    limit: int = 10,
+) -> list[sqlite3.Row]:
+    """
+    Страница списка в порядке company, title — keyset-выборка по индексу, без OFFSET.
+    after / before — rowid строки-курсора: следующая страница начинается сразу после неё,
+    предыдущая заканчивается прямо перед ней. Без курсора — первая страница.
+    Если строки-курсора уже нет в базе, тоже возвращается первая страница.
+    """
+    init_db(db_path)
+    where = ["status_kind = ?"] if only_open else []
+    params: list = [KIND_OPEN] if only_open else []
+    with read_connection(db_path) as conn:
+        cursor_id = after if after is not None else before
+        cursor = None
+        if cursor_id is not None:
+            cursor = conn.execute(
+                "SELECT company, title FROM internships WHERE rowid = ?", (cursor_id,)
+            ).fetchone()
+        backwards = cursor is not None and after is None
+        if cursor is not None:
+            where.append("(company, title) < (?, ?)" if backwards else "(company, title) > (?, ?)")
+            params += [cursor["company"], cursor["title"]]
+        order = "company DESC, title DESC" if backwards else "company, title"
+        query = f"SELECT {_LIST_COLUMNS} FROM internships"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        rows = conn.execute(f"{query} ORDER BY {order} LIMIT ?", (*params, limit)).fetchall()
+    return rows[::-1] if backwards else rows
+
+
+def get_stats(db_path: Path) -> dict:
+    """
+    Статистика для /stats одним чтением строки stats_summary:
+    всего, по видам статуса (open / soon / closed / unknown) и число компаний.
+    """
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT total, open, soon, closed, companies FROM stats_summary WHERE id = 1"
+        ).fetchone()
+    stats = dict(row)
+    stats["unknown"] = stats["total"] - stats["open"] - stats["soon"] - stats["closed"]
+    return stats
+
+
+def get_company_stats(db_path: Path) -> list[sqlite3.Row]:
+    """Счётчики по компаниям (company, total, open, soon, closed) по алфавиту."""
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        return conn.execute(
+            "SELECT company, total, open, soon, closed FROM company_stats ORDER BY company"
+        ).fetchall()
+
+
+def add_subscriber(db_path: Path, chat_id: int, title: str | None = None) -> bool:
+    """Подписать чат на дайджест (или вернуть отключённого). False — чат уже был подписан."""
+    init_db(db_path)
+    now = datetime.utcnow().isoformat() + "Z"
+    with write_connection(db_path) as conn:
+        row = conn.execute("SELECT active FROM subscribers WHERE chat_id = ?", (chat_id,)).fetchone()
+        conn.execute(
+            "INSERT INTO subscribers (chat_id, title, subscribed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET title = excluded.title, active = 1, failures = 0, "
+            "last_error = NULL, subscribed_at = CASE WHEN active THEN subscribed_at ELSE excluded.subscribed_at END",
+            (chat_id, title, now),
+        )
+    return row is None or not row["active"]
+
+
+def remove_subscriber(db_path: Path, chat_id: int) -> bool:
+    """Отписать чат. False — чат не был подписан."""
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        cursor = conn.execute(
+            "UPDATE subscribers SET active = 0 WHERE chat_id = ? AND active = 1", (chat_id,)
+        )
+        return cursor.rowcount > 0
+
+
+def get_subscribers(db_path: Path) -> list[int]:
+    """ID чатов активных подписчиков."""
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        return [row[0] for row in conn.execute("SELECT chat_id FROM subscribers WHERE active = 1")]
+
+
+def set_subscriber_filter(db_path: Path, chat_id: int, field: str, values: Iterable[str]) -> None:
+    """Заменить значения одного условия фильтра чата (пустой values — снять условие)."""
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        conn.execute("DELETE FROM subscriber_filters WHERE chat_id = ? AND field = ?", (chat_id, field))
+        conn.executemany(
+            "INSERT OR IGNORE INTO subscriber_filters (chat_id, field, value) VALUES (?, ?, ?)",
+            [(chat_id, field, value) for value in values],
+        )
+
+
+def clear_subscriber_filters(db_path: Path, chat_id: int) -> None:
+    """Снять все условия фильтра чата."""
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        conn.execute("DELETE FROM subscriber_filters WHERE chat_id = ?", (chat_id,))
+
+
+def get_subscriber_filters(db_path: Path, chat_id: int | None = None) -> dict[int, dict[str, set[str]]]:
+    """
+    Фильтры активных подписчиков: chat_id -> {поле: значения}.
+    У подписчика без фильтров — пустой словарь. С chat_id — фильтр одного чата
+    (подписан он или нет).
+    """
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        if chat_id is not None:
+            filters: dict[int, dict[str, set[str]]] = {chat_id: {}}
+            rows = conn.execute(
+                "SELECT chat_id, field, value FROM subscriber_filters WHERE chat_id = ?", (chat_id,)
+            )
+        else:
+            active = conn.execute("SELECT chat_id FROM subscribers WHERE active = 1")
+            filters = {row[0]: {} for row in active}
+            rows = conn.execute(
+                "SELECT f.chat_id, f.field, f.value FROM subscriber_filters AS f "
+                "JOIN subscribers AS s ON s.chat_id = f.chat_id WHERE s.active = 1"
+            )
+        for row in rows:
+            filters[row["chat_id"]].setdefault(row["field"], set()).add(row["value"])
+    return filters
+
+
+def record_deliveries(db_path: Path, results: Iterable, max_failures: int) -> list[int]:
+    """
+    Записать итоги рассылки (delivery.ChatDelivery) по подписчикам: успех сбрасывает
+    счётчик ошибок, ошибка увеличивает его. Подписчик отключается, если чат недоступен
+    насовсем (gone) или ошибок подряд набралось max_failures. Чаты не из таблицы
+    (например, канал из TELEGRAM_CHAT_ID) пропускаются. Возвращает отключённые chat_id.
+    """
+    init_db(db_path)
+    results = list(results)
+    now = datetime.utcnow().isoformat() + "Z"
+    delivered = [(now, r.chat_id) for r in results if r.ok and isinstance(r.chat_id, int)]
+    # Недоступному чату счётчик сразу доводится до порога
+    failed = [
+        (max_failures if r.gone else 0, r.error, r.chat_id)
+        for r in results if not r.ok and isinstance(r.chat_id, int)
+    ]
+    with write_connection(db_path) as conn:
+        conn.executemany(
+            "UPDATE subscribers SET failures = 0, last_error = NULL, last_sent_at = ? WHERE chat_id = ?",
+            delivered,
+        )
+        conn.executemany(
+            "UPDATE subscribers SET failures = max(failures + 1, ?), last_error = ? WHERE chat_id = ?",
+            failed,
+        )
+        disabled = [
+            row[0] for row in conn.execute(
+                "SELECT chat_id FROM subscribers WHERE active = 1 AND failures >= ?", (max_failures,)
+            )
+        ]
+        conn.executemany("UPDATE subscribers SET active = 0 WHERE chat_id = ?", [(c,) for c in disabled])
+    return disabled
+
+
 def _row_to_internship(row: sqlite3.Row) -> Internship:
     return Internship(
         company=row["company"],
@@ -59,42 +599,195 @@ def _row_to_internship(row: sqlite3.Row) -> Internship:
     )
 
 
+def load_source_snapshots(db_path: Path) -> dict[str, SourceSnapshot]:
+    """Последние сохранённые результаты источников по компаниям (для collect_all_internships)."""
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        rows = conn.execute(
+            "SELECT company, fingerprint, items, payload_fingerprint FROM source_snapshots"
+        ).fetchall()
+    return {
+        row["company"]: SourceSnapshot(
+            company=row["company"],
+            fingerprint=row["fingerprint"],
+            items=[Internship(**item) for item in json.loads(row["items"])],
+            payload=row["payload_fingerprint"],
+        )
+        for row in rows
+    }
+
+
+def load_source_schedule(db_path: Path) -> list[sqlite3.Row]:
+    """
+    Расписание и здоровье источников (company, interval_sec, next_run_at, failures,
+    last_run_at, last_change_at, last_error, suspect_fingerprint).
+    """
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        return conn.execute(
+            "SELECT company, interval_sec, next_run_at, failures, last_run_at, last_change_at, "
+            "last_error, suspect_fingerprint FROM source_schedule"
+        ).fetchall()
+
+
+def save_source_schedule(db_path: Path, rows: Iterable[tuple]) -> None:
+    """Записать расписание источников: кортежи в порядке колонок load_source_schedule()."""
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO source_schedule "
+            "(company, interval_sec, next_run_at, failures, last_run_at, last_change_at, "
+            "last_error, suspect_fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def advance_source_runs(db_path: Path, rows: Iterable[tuple[str, str, str | None]]) -> None:
+    """
+    Перенести следующий запуск источников не позже указанного: кортежи
+    (company, next_run_at, last_run_at, каким его видел вызывающий). Меняется только
+    next_run_at, и только если с тех пор источник не собирался: прогон, закончившийся
+    в это время, уже выставил своё расписание, и его не затираем.
+    """
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        conn.executemany(
+            "UPDATE source_schedule SET next_run_at = MIN(next_run_at, ?) "
+            "WHERE company = ? AND last_run_at IS ?",
+            [(next_run_at, company, last_run_at) for company, next_run_at, last_run_at in rows],
+        )
+
+
+def load_probe_signatures(db_path: Path) -> dict[str, str]:
+    """Последние отпечатки проб по компаниям."""
+    init_db(db_path)
+    with read_connection(db_path) as conn:
+        return dict(conn.execute("SELECT company, signature FROM source_probes").fetchall())
+
+
+def save_probe_signatures(db_path: Path, signatures: dict[str, str], probed_at: str) -> None:
+    """Записать отпечатки проб (company -> signature)."""
+    init_db(db_path)
+    with write_connection(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO source_probes (company, signature, probed_at) VALUES (?, ?, ?)",
+            [(company, signature, probed_at) for company, signature in signatures.items()],
+        )
+
+
+def _save_source_snapshots(
+    conn: sqlite3.Connection,
+    internships: list[Internship],
+    outcomes: Iterable,
+    now: str,
+) -> None:
+    """
+    Запомнить отпечатки и результаты источников, собранных в этом прогоне заново
+    (и тех, у кого при прежних записях сменились сырые данные страницы).
+    """
+    fresh = [
+        o for o in outcomes
+        if o.status == "ok" and o.fingerprint and (not o.unchanged or o.payload_fingerprint)
+    ]
+    if not fresh:
+        return
+    by_company: dict[str, list[dict]] = {o.company: [] for o in fresh}
+    for i in internships:
+        if i.company in by_company:
+            by_company[i.company].append(asdict(i))
+    conn.executemany(
+        "INSERT OR REPLACE INTO source_snapshots (company, fingerprint, items, updated_at, payload_fingerprint) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                o.company, o.fingerprint, json.dumps(by_company[o.company], ensure_ascii=False), now,
+                o.payload_fingerprint,
+            )
+            for o in fresh
+        ],
+    )
+
+
+def _known_rows(conn: sqlite3.Connection, companies: set[str]) -> dict[str, tuple[str, str, str | None]]:
+    """id -> (url, status, status_kind) для уже сохранённых стажировок указанных компаний."""
+    if not companies:
+        return {}
+    # Кортежи вместо sqlite3.Row: на сотнях тысяч строк это заметно быстрее
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    placeholders = ", ".join("?" * len(companies))
+    rows = cursor.execute(
+        f"SELECT id, url, status, status_kind FROM internships WHERE company IN ({placeholders})",
+        tuple(companies),
+    )
+    return {uid: (url, status, kind) for uid, url, status, kind in rows}
+
+
 def upsert_and_get_changes(
     db_path: Path,
     internships: list[Internship],
+    outcomes: Iterable | None = None,
 ) -> list[Change]:
     """
     Сохранить стажировки в БД. Вернуть список изменений:
     - новые стажировки (is_new=True);
     - стажировки с изменившимся статусом (is_new=False).
+
+    Текущее состояние компаний из пачки читается одним запросом (_known_rows), diff
+    считается по словарю, запись — executemany в одной транзакции. Вид статуса и отпечаток
+    считаются только для новых и изменившихся строк. Строки, у которых поменялся
+    только url, тихо обновляются без попадания в дайджест.
+
+    outcomes - итоги источников из collect_all_internships(): строки источников
+    с unchanged=True пропускаются целиком, отпечатки остальных сохраняются в той же транзакции.
     """
-    init_db(db_path)
+    outcomes = list(outcomes or [])
+    collected = internships
+    skipped = {o.company for o in outcomes if o.unchanged}
+    if skipped:
+        internships = [i for i in internships if i.company not in skipped]
+
     changes: list[Change] = []
-    now = __import__("datetime").datetime.utcnow().isoformat() + "Z"
+    now = datetime.utcnow().isoformat() + "Z"
 
-    with get_connection(db_path) as conn:
+    with write_connection(db_path) as conn:
+        _save_source_snapshots(conn, collected, outcomes, now)
+        known = _known_rows(conn, {i.company for i in internships})
+        seen: set[str] = set()
+        inserts: list[tuple] = []
+        updates: list[tuple] = []
         for i in internships:
             uid = i.unique_key()
-            row = conn.execute(
-                "SELECT company, title, url, status FROM internships WHERE id = ?",
-                (uid,),
-            ).fetchone()
+            # При повторе ключа в пачке побеждает первое вхождение
+            if uid in seen:
+                continue
+            seen.add(uid)
+            previous = known.get(uid)
+            if previous is None:
+                kind = status_kind(i.status)
+                inserts.append((uid, i.company, i.title, i.url, i.status, kind, now, i.fingerprint()))
+                changes.append(Change(internship=i, is_new=True, kind=kind))
+                continue
+            url, status, previous_kind = previous
+            if url == i.url and status == i.status:
+                continue
+            kind = status_kind(i.status)
+            updates.append((i.url, i.status, kind, now, i.fingerprint(), uid))
+            if status != i.status:
+                changes.append(Change(internship=i, is_new=False, previous_kind=previous_kind, kind=kind))
 
-            if row is None:
-                conn.execute(
-                    "INSERT INTO internships (id, company, title, url, status, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-                    (uid, i.company, i.title, i.url, i.status, now),
-                )
-                changes.append(Change(internship=i, is_new=True))
-            else:
-                prev = _row_to_internship(row)
-                if prev.status != i.status:
-                    conn.execute(
-                        "UPDATE internships SET url = ?, status = ?, updated_at = ? WHERE id = ?",
-                        (i.url, i.status, now, uid),
-                    )
-                    changes.append(Change(internship=i, is_new=False))
-
-        conn.commit()
+        conn.executemany(
+            "INSERT INTO internships (id, company, title, url, status, status_kind, updated_at, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            inserts,
+        )
+        conn.executemany(
+            "UPDATE internships SET url = ?, status = ?, status_kind = ?, updated_at = ?, fingerprint = ? "
+            "WHERE id = ?",
+            updates,
+        )
+        if inserts or updates:
+            conn.execute("UPDATE db_version SET version = version + 1 WHERE id = 1")
 
     return changes
@@ -0,0 +1,279 @@
+"""
+Доставка сообщений в Telegram — общая для main.py и ботов.
+- один Bot (одна HTTP-сессия) на процесс;
+- лимиты Telegram через token bucket: общий (~30 сообщений/с) и на чат
+  (~1/с в личке, ~20/мин в группах и каналах);
+- сообщения в один чат уходят строго по очереди;
+- очередь и лимит чата держатся в памяти, пока чат активен: простаивающие выбрасываются;
+- при 429 (RetryAfter) чат ставится на паузу ровно на retry_after и отправка повторяется,
+  сетевые ошибки повторяются с экспоненциальной паузой;
+- рассылка во много чатов (fan_out): чаты параллельно, ошибка одного чата не мешает остальным;
+- метрики: сколько сообщений ждут отправки и задержка от вызова send() до доставки.
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Iterable, NamedTuple
+
+from telegram import Bot, Message
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+import config
+
+
+class TokenBucket:
+    """Не больше rate отправок в секунду, всплеск до capacity; pause() — принудительная пауза (429)."""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Дождаться и забрать один токен (ожидающие обслуживаются по очереди)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def idle(self) -> bool:
+        """Никто не ждёт, паузы нет и токены восстановились: новый bucket вёл бы себя так же."""
+        now = time.monotonic()
+        if self._lock.locked() or now < self._paused_until:
+            return False
+        return self._tokens + (now - self._updated) * self.rate >= self.capacity
+
+
+class ChatState:
+    """Очередь и лимит одного чата; users — сколько send() сейчас работает с чатом."""
+
+    def __init__(self, rate: float) -> None:
+        self.bucket = TokenBucket(rate)
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+    def idle(self) -> bool:
+        return self.users == 0 and self.bucket.idle()
+
+
+class DeliveryStats(NamedTuple):
+    """Снимок метрик доставки."""
+    queued: int  # сообщения, которые сейчас ждут отправки (глубина очереди)
+    sent: int
+    failed: int
+    retried: int  # повторные попытки (429 и сетевые ошибки)
+    latency_avg: float  # секунды от send() до доставки, по последним сообщениям
+    latency_max: float
+
+    def summary(self) -> str:
+        return (
+            f"доставка: отправлено {self.sent}, ошибок {self.failed}, повторов {self.retried}, "
+            f"в очереди {self.queued}, задержка ср. {self.latency_avg:.2f} с / макс. {self.latency_max:.2f} с"
+        )
+
+
+class ChatDelivery(NamedTuple):
+    """Итог рассылки в один чат."""
+    chat_id: int | str
+    sent: int  # сколько сообщений дошло
+    error: str | None = None
+    gone: bool = False  # чат недоступен насовсем: бот заблокирован или удалён, чата нет
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def normalize_chat_id(chat_id: int | str) -> int | str:
+    """ID чата из .env: число, если это число, иначе @username как есть."""
+    try:
+        return int(chat_id)
+    except (TypeError, ValueError):
+        return chat_id
+
+
+def _is_gone(error: Exception) -> bool:
+    """Ошибка, после которой в чат писать бессмысленно."""
+    if isinstance(error, Forbidden):
+        return True
+    return isinstance(error, BadRequest) and "chat not found" in str(error).lower()
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+# С какого числа чатов в памяти начинать выбрасывать простаивающие (см. DeliveryEngine._chat)
+CHAT_STATE_SWEEP = 1024
+
+
+class DeliveryEngine:
+    """
+    Отправка с соблюдением лимитов Telegram и повторами.
+    Бот либо передаётся готовый (attach(application.bot) — сессия приложения),
+    либо создаётся по токену и живёт внутри async with.
+    """
+
+    def __init__(
+        self,
+        bot: Bot | None = None,
+        token: str | None = None,
+        global_rate: float | None = None,
+        chat_rate: float | None = None,
+        group_rate: float | None = None,
+        max_retries: int | None = None,
+        concurrency: int | None = None,
+    ) -> None:
+        self.bot = bot
+        self._token = token
+        self._owns_bot = False
+        self.max_retries = config.DELIVERY_MAX_RETRIES if max_retries is None else max_retries
+        self._chat_rate = chat_rate or config.DELIVERY_CHAT_RATE
+        self._group_rate = group_rate or config.DELIVERY_GROUP_RATE
+        self._global = TokenBucket(global_rate or config.DELIVERY_GLOBAL_RATE)
+        # Одновременных запросов к Bot API не больше concurrency
+        self._in_flight = asyncio.Semaphore(concurrency or config.DELIVERY_CONCURRENCY)
+        # Состояние только тех чатов, которым недавно писали: простаивающие выбрасываются
+        self._chats: dict[int | str, ChatState] = {}
+        self._sweep_at = CHAT_STATE_SWEEP
+        self._queued = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._latencies: deque[float] = deque(maxlen=256)
+
+    def attach(self, bot: Bot) -> None:
+        """Отправлять через уже созданного бота (например, Application.bot)."""
+        self.bot = bot
+
+    async def __aenter__(self) -> "DeliveryEngine":
+        if self.bot is None:
+            self.bot = Bot(token=self._token)
+            self._owns_bot = True
+            await self.bot.initialize()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._owns_bot and self.bot is not None:
+            await self.bot.shutdown()
+            self.bot = None
+            self._owns_bot = False
+
+    def _chat(self, chat_id: int | str) -> ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            if len(self._chats) >= self._sweep_at:
+                # Чат без отправок и с полным bucket ничем не отличается от нового - его можно забыть.
+                # Следующая чистка - когда чатов станет вдвое больше оставшихся: в среднем O(1) на чат
+                self._chats = {cid: s for cid, s in self._chats.items() if not s.idle()}
+                self._sweep_at = max(CHAT_STATE_SWEEP, 2 * len(self._chats))
+            # Личка - положительный ID; группы и каналы - отрицательный ID или @username
+            private = isinstance(chat_id, int) and chat_id > 0
+            state = self._chats[chat_id] = ChatState(self._chat_rate if private else self._group_rate)
+        return state
+
+    async def send(self, chat_id: int | str, text: str, **kwargs: Any) -> Message:
+        """
+        Отправить сообщение (kwargs - как у Bot.send_message).
+        Сообщения в один чат уходят в порядке вызовов. Ошибки, которые не лечатся повтором
+        (BadRequest, Forbidden), и исчерпанные повторы пробрасываются.
+        """
+        chat_id = normalize_chat_id(chat_id)
+        started = time.monotonic()
+        self._queued += 1
+        state = self._chat(chat_id)
+        state.users += 1
+        try:
+            async with state.lock:
+                message = await self._send_with_retries(chat_id, state.bucket, text, kwargs)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._queued -= 1
+            state.users -= 1
+        self._sent += 1
+        self._latencies.append(time.monotonic() - started)
+        return message
+
+    async def send_many(self, chat_id: int | str, texts: Iterable[str], **kwargs: Any) -> list[Message]:
+        """Несколько сообщений подряд в один чат (например, дайджест из нескольких частей)."""
+        return [await self.send(chat_id, text, **kwargs) for text in texts]
+
+    async def fan_out(self, chat_ids: Iterable[int | str], texts: list[str], **kwargs: Any) -> list[ChatDelivery]:
+        """
+        Одни и те же сообщения во много чатов: чаты параллельно, части в каждом — по порядку.
+        Ограничено число одновременных запросов, а не чатов, поэтому чат на паузе после 429
+        или в ожидании повтора никого не задерживает. Ошибка чата не прерывает рассылку:
+        она возвращается в ChatDelivery этого чата, оставшиеся его части не отправляются.
+        """
+        async def deliver(chat_id: int | str) -> ChatDelivery:
+            sent = 0
+            try:
+                for text in texts:
+                    await self.send(chat_id, text, **kwargs)
+                    sent += 1
+            except Exception as e:
+                return ChatDelivery(chat_id, sent, f"{type(e).__name__}: {e}", _is_gone(e))
+            return ChatDelivery(chat_id, sent)
+
+        unique = dict.fromkeys(normalize_chat_id(chat_id) for chat_id in chat_ids)
+        return list(await asyncio.gather(*(deliver(chat_id) for chat_id in unique)))
+
+    async def reply(self, update, text: str, **kwargs: Any) -> Message:
+        """Ответ в чат, откуда пришла команда."""
+        return await self.send(update.effective_chat.id, text, **kwargs)
+
+    async def _send_with_retries(self, chat_id: int | str, bucket: TokenBucket, text: str, kwargs: dict) -> Message:
+        error: Exception | None = None
+        for attempt in range(self.max_retries + 1):
+            # Сначала лимит чата (ждать можно долго), потом общий - чтобы не держать общий токен
+            await bucket.acquire()
+            await self._global.acquire()
+            try:
+                async with self._in_flight:
+                    return await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                # Флуд-контроль: чат молчит ровно столько, сколько просит Telegram
+                error = e
+                wait = _retry_seconds(e)
+                bucket.pause(wait)
+                print(f"Telegram 429 для чата {chat_id}: пауза {wait:.0f} с")
+            except BadRequest:
+                # Ошибка в самом сообщении (разметка, chat not found): повтор не поможет
+                raise
+            except NetworkError as e:
+                error = e
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(2 ** attempt, 30))
+            if attempt < self.max_retries:
+                self._retried += 1
+        raise error
+
+    def stats(self) -> DeliveryStats:
+        latencies = list(self._latencies)
+        return DeliveryStats(
+            queued=self._queued,
+            sent=self._sent,
+            failed=self._failed,
+            retried=self._retried,
+            latency_avg=sum(latencies) / len(latencies) if latencies else 0.0,
+            latency_max=max(latencies) if latencies else 0.0,
+        )
@@ -5,94 +5,43 @@
   /internships или /стажировки - показать открытые стажировки
   /all - показать все стажировки (включая закрытые)
   /stats - статистика
+  /subscribe, /unsubscribe - подписка на дайджест в этот чат
+  /filter - фильтр подписки: компании, слова в названии, события
 """
 import os
 import asyncio
 from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.ext import CommandHandler, ContextTypes
 from dotenv import load_dotenv
-import sqlite3
 from pathlib import Path
 
+import db
+from bot_app import build_application, start_receiving
+from cache import VersionedCache
+from delivery import DeliveryEngine
+from routing import EVENTS, FIELD_COMPANY, FIELD_EVENT, FIELD_KEYWORD, normalize, tokenize
+from telegram_bot import LIST_ALL, LIST_OPEN, ListPages
+
 load_dotenv()
 
 # Настройки
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 DB_PATH = Path(os.getenv("DB_PATH", "./internships.db"))
 
+# Готовые ответы на команды: живут до следующего изменения данных в БД
+read_cache = VersionedCache(DB_PATH)
+# Постраничные списки /internships и /all: страницы из read_cache, кнопки навигации
+lists = ListPages(DB_PATH, read_cache)
 
-def get_open_internships():
-    """Получить стажировки со статусом 'Открыт набор' или похожим."""
-    if not DB_PATH.exists():
-        return []
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Ищем стажировки где в статусе есть слова о наборе
-    cursor.execute("""
-        SELECT company, title, status, url 
-        FROM internships 
-        WHERE status LIKE '%Открыт%' 
-           OR status LIKE '%набор%'
-           OR status LIKE '%Идет%'
-           OR status LIKE '%Прием заявок%'
-           OR status LIKE '%Приём заявок%'
-        ORDER BY company, title
-    """)
-    
-    results = cursor.fetchall()
-    conn.close()
-    return results
-
-
-def get_all_internships():
-    """Получить все стажировки."""
-    if not DB_PATH.exists():
-        return []
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT company, title, status, url 
-        FROM internships 
-        ORDER BY company, title
-    """)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+# Все сообщения бота идут через один движок доставки: лимиты Telegram и повторы при 429
+delivery = DeliveryEngine()
 
 
 def get_stats():
     """Получить статистику по стажировкам."""
     if not DB_PATH.exists():
         return None
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM internships")
-    total = cursor.fetchone()[0]
-    
-    cursor.execute("""
-        SELECT COUNT(*) FROM internships 
-        WHERE status LIKE '%Открыт%' 
-           OR status LIKE '%набор%'
-           OR status LIKE '%Идет%'
-           OR status LIKE '%Прием заявок%'
-           OR status LIKE '%Приём заявок%'
-    """)
-    open_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT company) FROM internships")
-    companies = cursor.fetchone()[0]
-    
-    conn.close()
-    return {
-        'total': total,
-        'open': open_count,
-        'companies': companies
-    }
+    return db.get_stats(DB_PATH)
 
 
 def escape_html(text):
@@ -100,6 +49,34 @@ def escape_html(text):
     return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
 
 
+def stats_message() -> str | None:
+    """Текст ответа на /stats (None - базы нет)."""
+    def build():
+        stats = get_stats()
+        if not stats:
+            return None
+        
+        message = f"""
+📊 <b>Статистика базы данных:</b>
+
+📚 Всего стажировок: <b>{stats['total']}</b>
+🟢 Открыт набор: <b>{stats['open']}</b>
+🟡 Скоро откроется: <b>{stats['soon']}</b>
+🔴 Набор закрыт: <b>{stats['closed']}</b>
+❔ Статус уточняется: <b>{stats['unknown']}</b>
+🏢 Компаний: <b>{stats['companies']}</b>
+"""
+        
+        # Разбивка по компаниям: всего и сколько из них открыто
+        by_company = db.get_company_stats(DB_PATH)
+        if by_company:
+            message += "\n<b>По компаниям:</b>\n"
+            for row in by_company:
+                message += f"• {escape_html(row['company'])}: {row['total']} (🟢 {row['open']})\n"
+        return message
+    return read_cache.get("stats", build)
+
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start."""
     welcome_text = """
@@ -110,115 +87,152 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /internships или /стажировки - показать открытые стажировки
 /all - показать все стажировки
 /stats - статистика по базе данных
+/subscribe - присылать дайджест изменений в этот чат
+/unsubscribe - отписаться от дайджеста
+/filter - получать только нужные изменения (компании, слова, события)
 
 Бот автоматически проверяет источники и присылает обновления в канал!
 """
-    await update.message.reply_text(welcome_text, parse_mode='HTML')
+    await delivery.reply(update, welcome_text, parse_mode='HTML')
 
 
 async def internships_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /internships - показать открытые стажировки."""
-    internships = get_open_internships()
+    page = lists.first(LIST_OPEN)
     
-    if not internships:
-        await update.message.reply_text(
+    if not page:
+        await delivery.reply(update,
             "😔 К сожалению, сейчас нет открытых стажировок.\n\n"
             "Используйте /all чтобы увидеть все стажировки."
         )
         return
     
-    # Формируем сообщение
-    message_parts = [f"🆕 <b>Открытые стажировки ({len(internships)}):</b>\n"]
-    
-    for company, title, status, url in internships:
-        block = f"\n🏢 <b>{escape_html(company)}</b> — {escape_html(title)}"
-        if status:
-            block += f"\n🔓 {escape_html(status)}"
-        block += f'\n🔗 <a href="{escape_html(url)}">Ссылка</a>\n'
-        message_parts.append(block)
-    
-    full_message = "".join(message_parts)
-    
-    # Telegram ограничение 4096 символов
-    if len(full_message) > 4000:
-        # Разбиваем на части
-        chunks = []
-        current_chunk = message_parts[0]
-        
-        for part in message_parts[1:]:
-            if len(current_chunk) + len(part) < 4000:
-                current_chunk += part
-            else:
-                chunks.append(current_chunk)
-                current_chunk = part
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        for chunk in chunks:
-            await update.message.reply_text(chunk, parse_mode='HTML', disable_web_page_preview=True)
-    else:
-        await update.message.reply_text(full_message, parse_mode='HTML', disable_web_page_preview=True)
+    await delivery.reply(update,
+        page.text, parse_mode='HTML', reply_markup=page.markup, disable_web_page_preview=True
+    )
 
 
 async def all_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /all - показать все стажировки."""
-    internships = get_all_internships()
+    page = lists.first(LIST_ALL)
     
-    if not internships:
-        await update.message.reply_text("📭 База данных пуста. Запустите main.py для сбора данных.")
+    if not page:
+        await delivery.reply(update, "📭 База данных пуста. Запустите main.py для сбора данных.")
         return
     
-    message_parts = [f"📋 <b>Все стажировки ({len(internships)}):</b>\n"]
-    
-    for company, title, status, url in internships:
-        block = f"\n🏢 <b>{escape_html(company)}</b> — {escape_html(title)}"
-        if status:
-            block += f"\n📊 {escape_html(status)}"
-        block += f'\n🔗 <a href="{escape_html(url)}">Ссылка</a>\n'
-        message_parts.append(block)
-    
-    full_message = "".join(message_parts)
-    
-    # Разбиваем на части если слишком длинное
-    if len(full_message) > 4000:
-        chunks = []
-        current_chunk = message_parts[0]
-        
-        for part in message_parts[1:]:
-            if len(current_chunk) + len(part) < 4000:
-                current_chunk += part
-            else:
-                chunks.append(current_chunk)
-                current_chunk = part
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        for chunk in chunks:
-            await update.message.reply_text(chunk, parse_mode='HTML', disable_web_page_preview=True)
-    else:
-        await update.message.reply_text(full_message, parse_mode='HTML', disable_web_page_preview=True)
+    await delivery.reply(update,
+        page.text, parse_mode='HTML', reply_markup=page.markup, disable_web_page_preview=True
+    )
 
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /stats - показать статистику."""
-    stats = get_stats()
+    message = stats_message()
     
-    if not stats:
-        await update.message.reply_text("📭 База данных пуста.")
+    if not message:
+        await delivery.reply(update, "📭 База данных пуста.")
         return
     
-    message = f"""
-📊 <b>Статистика базы данных:</b>
+    await delivery.reply(update, message, parse_mode='HTML')
 
-📚 Всего стажировок: <b>{stats['total']}</b>
-🟢 Открыт набор: <b>{stats['open']}</b>
-🔴 Набор закрыт: <b>{stats['total'] - stats['open']}</b>
-🏢 Компаний: <b>{stats['companies']}</b>
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /subscribe - подписать чат на дайджест."""
+    chat = update.effective_chat
+    title = chat.title or chat.username or chat.full_name
+    loop = asyncio.get_running_loop()
+    added = await loop.run_in_executor(None, db.add_subscriber, DB_PATH, chat.id, title)
+    
+    if added:
+        await delivery.reply(update, "✅ Подписка оформлена: дайджест изменений будет приходить в этот чат.")
+    else:
+        await delivery.reply(update, "ℹ️ Этот чат уже подписан. Отписаться: /unsubscribe")
+
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /unsubscribe - отписать чат от дайджеста."""
+    loop = asyncio.get_running_loop()
+    removed = await loop.run_in_executor(None, db.remove_subscriber, DB_PATH, update.effective_chat.id)
+    
+    if removed:
+        await delivery.reply(update, "👋 Подписка отменена. Вернуться: /subscribe")
+    else:
+        await delivery.reply(update, "ℹ️ Этот чат не подписан. Подписаться: /subscribe")
+
+
+# Поля /filter: как пишет пользователь -> поле фильтра
+FILTER_ALIASES = {
+    "company": FIELD_COMPANY, "компания": FIELD_COMPANY,
+    "keyword": FIELD_KEYWORD, "слова": FIELD_KEYWORD,
+    "event": FIELD_EVENT, "status": FIELD_EVENT, "события": FIELD_EVENT,
+}
+FILTER_LABELS = {FIELD_COMPANY: "Компании", FIELD_KEYWORD: "Слова в названии", FIELD_EVENT: "События"}
+
+FILTER_HELP = f"""
+<b>Фильтр подписки</b> — дайджест будет содержать только подходящие изменения.
+
+/filter company Яндекс, Сбер — компании (через запятую)
+/filter keyword backend ml — слова в названии стажировки
+/filter event {" ".join(EVENTS)} — события:
+  new — новая стажировка, opened / soon / closed — набор открылся / скоро / закрылся,
+  changed — статус изменился без смены вида
+/filter company — без значений: снять условие
+/filter reset — снять все условия
+
+Внутри условия достаточно одного совпадения, условия должны выполняться все.
 """
+
+
+def parse_filter_values(field: str, args: list[str]) -> list[str]:
+    """Значения условия из аргументов /filter (ValueError - неизвестное событие)."""
+    text = " ".join(args)
+    if field == FIELD_COMPANY:
+        return [normalize(v) for v in text.split(",") if normalize(v)]
+    if field == FIELD_KEYWORD:
+        return sorted(tokenize(text))
+    events = sorted(tokenize(text))
+    unknown = [e for e in events if e not in EVENTS]
+    if unknown:
+        raise ValueError(f"Неизвестные события: {', '.join(unknown)}. Доступны: {', '.join(EVENTS)}")
+    return events
+
+
+def format_filter(fields: dict[str, set[str]]) -> str:
+    """Текущий фильтр чата для ответа на /filter."""
+    if not fields:
+        return "🔎 Фильтра нет: приходят все изменения."
+    lines = ["🔎 <b>Текущий фильтр:</b>"]
+    for field, label in FILTER_LABELS.items():
+        if fields.get(field):
+            lines.append(f"• {label}: {escape_html(', '.join(sorted(fields[field])))}")
+    return "\n".join(lines)
+
+
+async def filter_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /filter - показать или изменить фильтр подписки."""
+    chat_id = update.effective_chat.id
+    args = context.args or []
+    loop = asyncio.get_running_loop()
+    
+    if args and args[0].lower() == "reset":
+        await loop.run_in_executor(None, db.clear_subscriber_filters, DB_PATH, chat_id)
+    elif args:
+        field = FILTER_ALIASES.get(args[0].lower())
+        if field is None:
+            await delivery.reply(update, FILTER_HELP, parse_mode='HTML')
+            return
+        try:
+            values = parse_filter_values(field, args[1:])
+        except ValueError as e:
+            await delivery.reply(update, f"⚠️ {e}")
+            return
+        await loop.run_in_executor(None, db.set_subscriber_filter, DB_PATH, chat_id, field, values)
     
-    await update.message.reply_text(message, parse_mode='HTML')
+    filters = await loop.run_in_executor(None, db.get_subscriber_filters, DB_PATH, chat_id)
+    message = format_filter(filters[chat_id])
+    if not args:
+        message += "\n" + FILTER_HELP
+    await delivery.reply(update, message, parse_mode='HTML')
 
 
 async def main():
@@ -232,24 +246,32 @@ async def main():
     print("✅ Бот готов к работе!\n")
     
     # Создаем приложение
-    app = Application.builder().token(BOT_TOKEN).build()
+    app = build_application(BOT_TOKEN)
+    delivery.attach(app.bot)
     
     # Регистрируем обработчики команд
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("internships", internships_command))
     app.add_handler(CommandHandler("all", all_command))
     app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CommandHandler("subscribe", subscribe_command))
+    app.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    app.add_handler(CommandHandler("filter", filter_command))
+    app.add_handler(lists.handler())
     
     # Запускаем бота
     await app.initialize()
     await app.start()
-    await app.updater.start_polling()
+    mode = await start_receiving(app)
+    print(f"📡 Приём апдейтов: {mode}")
     
     print("Доступные команды:")
     print("  /start - приветствие")
     print("  /internships - открытые стажировки")
     print("  /all - все стажировки")
-    print("  /stats - статистика\n")
+    print("  /stats - статистика")
+    print("  /subscribe, /unsubscribe - подписка на дайджест")
+    print("  /filter - фильтр подписки\n")
     
     # Ждем
     await asyncio.Event().wait()
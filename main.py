@@ -2,14 +2,17 @@
 Точка входа: запуск парсеров, сравнение с БД, отправка дайджеста в Telegram.
 По умолчанию сообщение отправляется только при изменениях.
 С флагом --send сводка отправляется всегда (по запросу).
+С флагом --due собираются только источники, у которых подошло время по расписанию
+(scheduler.py) или чья дешёвая проба показала изменение — удобно для частого запуска из cron.
 """
 import argparse
 import sys
 
 import config
-from db import get_internships_count, upsert_and_get_changes
+from db import get_internships_count, load_source_snapshots, upsert_and_get_changes
 from parsers import collect_all_internships
-from telegram_bot import build_digest_message, build_no_changes_message, send_digest
+from scheduler import due_sources, load_schedule, probe_sources, source_health, update_schedule
+from telegram_bot import broadcast_digest, build_no_changes_message, send_digest
 
 
 def main() -> None:
@@ -21,6 +24,11 @@ def main() -> None:
         action="store_true",
         help="Всегда отправить сводку (даже если изменений нет). Удобно для запроса по желанию.",
     )
+    parser.add_argument(
+        "--due",
+        action="store_true",
+        help="Собрать только источники, которым пора по расписанию или изменившиеся по пробе (для cron).",
+    )
     args = parser.parse_args()
     force_send = args.send
 
@@ -29,19 +37,35 @@ def main() -> None:
         sys.exit(1)
 
     # Собрать стажировки со всех источников
-    internships = collect_all_internships()
+    # Источники, чей результат совпал с прошлым прогоном, в БД не пишутся
+    # Упавший источник отдаёт прошлый удачный результат, с разомкнутой цепью — не собирается
+    sources = None
+    if args.due:
+        for probe in probe_sources(config.DB_PATH):
+            print(probe.summary())
+        sources = due_sources(load_schedule(config.DB_PATH))
+        if not sources:
+            print("По расписанию проверять пока нечего.")
+            sys.exit(0)
+    snapshots = load_source_snapshots(config.DB_PATH)
+    health = source_health(load_schedule(config.DB_PATH))
+    internships, outcomes = collect_all_internships(snapshots=snapshots, sources=sources, health=health)
+    for outcome in outcomes:
+        print(outcome.summary())
     if not internships:
+        update_schedule(config.DB_PATH, outcomes, [], [])
         print("Не удалось получить ни одной стажировки.", file=sys.stderr)
         sys.exit(0)
 
     # Сохранить в БД и получить список изменений (новые + с изменённым статусом)
-    changes = upsert_and_get_changes(config.DB_PATH, internships)
+    changes = upsert_and_get_changes(config.DB_PATH, internships, outcomes)
+    update_schedule(config.DB_PATH, outcomes, internships, changes)
     new_list = [c.internship for c in changes if c.is_new]
     updated_list = [c.internship for c in changes if not c.is_new]
 
     if changes:
-        text = build_digest_message(new_list, updated_list)
-        send_digest(config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID, text)
+        # Канал получает все изменения, подписчики — прошедшие их фильтры
+        broadcast_digest(config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID, changes, config.DB_PATH)
         print(f"Отправлен дайджест: {len(new_list)} новых, {len(updated_list)} обновлений.")
     elif force_send:
         total = get_internships_count(config.DB_PATH)
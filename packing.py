@@ -0,0 +1,141 @@
+"""
+Упаковка HTML-блоков в сообщения Telegram.
+- сообщение режется только по границам блоков: блок — законченный HTML, теги не рвутся;
+- длина считается в единицах UTF-16, как её считает Telegram, и по сырому HTML —
+  теги и сущности в лимит не входят, так что оценка с запасом;
+- блоки одной группы (компании) по возможности попадают в одно сообщение;
+- группы раскладываются по сообщениям first-fit decreasing: крупные первыми, каждая —
+  в первое сообщение, где хватает места. Сообщений получается минимум или почти минимум,
+  а внутри сообщения блоки идут в исходном порядке.
+"""
+import re
+from typing import Hashable, Iterable, NamedTuple
+
+# Лимит длины сообщения с запасом до 4096 символов Telegram
+MESSAGE_LIMIT = 4000
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_PARTIAL_ENTITY_RE = re.compile(r"&[^;\s]*$")
+
+
+def message_length(text: str) -> int:
+    """Длина текста так, как её ограничивает Telegram: в единицах UTF-16 (эмодзи — две)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class Section(NamedTuple):
+    """Раздел сообщения: заголовок и группы блоков."""
+    header: str  # повторяется в каждом сообщении, куда попали блоки раздела
+    groups: list[list[str]]  # группы блоков, которые желательно не разрывать (например, компания)
+
+
+def group_blocks(blocks: Iterable[tuple[Hashable, str]]) -> list[list[str]]:
+    """Блоки (ключ группы, блок) по группам; группы — в порядке первого появления ключа."""
+    groups: dict[Hashable, list[str]] = {}
+    for key, block in blocks:
+        groups.setdefault(key, []).append(block)
+    return list(groups.values())
+
+
+class _Item(NamedTuple):
+    section: int
+    order: int  # место в исходном порядке
+    text: str
+    size: int
+
+
+class _Message:
+    def __init__(self) -> None:
+        self.items: list[_Item] = []
+        self.sections: set[int] = set()
+        self.size = 0  # сумма (длина части + перевод строки) по заголовкам и блокам
+
+
+def _clip_line(line: str, capacity: int) -> str:
+    """Последнее средство для строки длиннее сообщения: текст без тегов, обрезанный с многоточием."""
+    text = _TAG_RE.sub("", line)
+    while message_length(text) > capacity - 1:
+        text = text[: max(len(text) - (message_length(text) - capacity + 1), 0)]
+    return _PARTIAL_ENTITY_RE.sub("", text) + "…"
+
+
+def _split_block(block: str, capacity: int) -> list[str]:
+    """Блок длиннее сообщения — по строкам (строки блока — законченный HTML)."""
+    pieces: list[str] = []
+    current: list[str] = []
+    for line in block.split("\n"):
+        if message_length(line) > capacity:
+            line = _clip_line(line, capacity)
+        if current and message_length("\n".join([*current, line])) > capacity:
+            pieces.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def _split_group(group: list[str], capacity: int) -> list[str]:
+    """Группа целиком, если помещается в сообщение; иначе — подряд идущие куски по границам блоков."""
+    text = "\n".join(group)
+    if message_length(text) <= capacity:
+        return [text]
+    chunks: list[str] = []
+    current: list[str] = []
+    for block in group:
+        if message_length(block) > capacity:
+            if current:
+                chunks.append("\n".join(current))
+                current = []
+            chunks.extend(_split_block(block, capacity))
+            continue
+        if current and message_length("\n".join([*current, block])) > capacity:
+            chunks.append("\n".join(current))
+            current = []
+        current.append(block)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def pack_sections(sections: list[Section], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    Разложить разделы по наименьшему числу сообщений не длиннее limit.
+    Если всё помещается в одно сообщение, оно совпадает с простой склейкой
+    заголовков и блоков через перевод строки. Пустые разделы пропускаются.
+    """
+    header_sizes = [message_length(s.header) + 1 for s in sections]
+    items: list[_Item] = []
+    for index, section in enumerate(sections):
+        capacity = limit - header_sizes[index]
+        for group in section.groups:
+            for text in _split_group(group, capacity):
+                items.append(_Item(index, len(items), text, message_length(text) + 1))
+
+    messages: list[_Message] = []
+    for item in sorted(items, key=lambda i: i.size, reverse=True):
+        for message in messages:
+            cost = item.size + (0 if item.section in message.sections else header_sizes[item.section])
+            # Последний перевод строки в сообщение не попадает
+            if message.size + cost - 1 <= limit:
+                break
+        else:
+            message = _Message()
+            messages.append(message)
+        if item.section not in message.sections:
+            message.sections.add(item.section)
+            message.size += header_sizes[item.section]
+        message.items.append(item)
+        message.size += item.size
+
+    result: list[str] = []
+    for message in sorted(messages, key=lambda m: min(i.order for i in m.items)):
+        parts: list[str] = []
+        section = None
+        for item in sorted(message.items, key=lambda i: i.order):
+            if item.section != section:
+                section = item.section
+                parts.append(sections[section].header)
+            parts.append(item.text)
+        result.append("\n".join(parts).strip())
+    return result
@@ -1,32 +1,246 @@
 """
 Регистрация и запуск всех парсеров источников стажировок.
+Результат источника проверяется до того, как попадёт в БД и дайджест:
+- записи-заглушки («Проверьте на сайте», «Ошибка загрузки») отбрасываются;
+- если источник упал, отдал одни заглушки или число записей обвалилось
+  (меньше SOURCE_COLLAPSE_RATIO от прошлого результата), вместо результата берётся
+  последний удачный снимок (source_snapshots), а строки в БД не трогаются. Обвал
+  принимается, только если следующий прогон вернул тот же результат;
+- источник с разомкнутой цепью (несколько ошибок подряд, см. scheduler.py) до конца
+  паузы не собирается вовсе — сразу отдаётся снимок.
 """
-from parsers.base import Internship
+import asyncio
+import inspect
+import sys
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from parsers.base import (
+    Internship,
+    PayloadUnchanged,
+    Source,
+    SourceHealth,
+    SourceSnapshot,
+    fingerprint_items,
+    is_placeholder,
+    track_payload,
+)
+from parsers.browser import SharedBrowser, track_load_stats
+from parsers.probe import page_probe
 from parsers.sber import parse_sber
 from parsers.tbank import parse_tbank
 from parsers.vk import parse_vk
 from parsers.wildberries import parse_wildberries
 from parsers.yandex import parse_yandex
 
-# URL источников (строго по ТЗ): (название, URL, функция парсинга)
+# URL источников (строго по ТЗ): (название, URL, функция парсинга, нужен ли браузер, проба изменений)
 SOURCES = [
-    ("T-Bank", "https://education.tbank.ru/start/", parse_tbank),
-    ("Сбер", "https://sberstudent.ru/internship/", parse_sber),
-    ("Wildberries Tech", "https://tech.wildberries.ru/courses?status_id=2&status_id=5", parse_wildberries),
-    ("Яндекс", "https://yandex.ru/yaintern/internship", parse_yandex),
-    ("VK", "https://internship.vk.company/vacancy", parse_vk),
+    Source("T-Bank", "https://education.tbank.ru/start/", parse_tbank, uses_browser=True, probe=page_probe()),
+    Source("Сбер", "https://sberstudent.ru/internship/", parse_sber, probe=page_probe()),
+    Source(
+        "Wildberries Tech", "https://tech.wildberries.ru/courses?status_id=2&status_id=5", parse_wildberries,
+        uses_browser=True, probe=page_probe(),
+    ),
+    Source("Яндекс", "https://yandex.ru/yaintern/internship", parse_yandex, uses_browser=True, probe=page_probe()),
+    Source("VK", "https://internship.vk.company/vacancy", parse_vk, uses_browser=True, probe=page_probe()),
 ]
 
 
-def collect_all_internships() -> list[Internship]:
-    """Запустить все парсеры и собрать объединённый список стажировок."""
-    result: list[Internship] = []
-    for company, url, parse_fn in SOURCES:
+class SourceOutcome(NamedTuple):
+    """Итог одного источника за прогон."""
+    company: str
+    # "ok" / "timeout" / "error" / "empty" — одни заглушки / "suspect" — обвал числа записей /
+    # "open" — цепь разомкнута, источник не собирался
+    status: str
+    duration: float  # секунды
+    count: int = 0
+    error: str = ""
+    fingerprint: str = ""  # отпечаток результата источника (только для "ok")
+    unchanged: bool = False  # True = результат совпал с прошлым прогоном, строки в БД не трогаем
+    blocked_requests: int = 0  # запросы страницы, оборванные load_page() (картинки, шрифты, трекеры)
+    fallback: bool = False  # True = вместо результата отдан последний удачный снимок источника
+    payload_fingerprint: str = ""  # отпечаток новых сырых данных страницы (пусто — данные прежние или их нет)
+
+    def summary(self) -> str:
+        """Короткая строка для логов и отчётов."""
+        line = f"[{self.company}] {self.status} за {self.duration:.1f} с"
+        if self.status == "ok":
+            line += f", записей: {self.count}"
+            if self.unchanged:
+                line += ", без изменений"
+            if self.blocked_requests:
+                line += f", заблокировано запросов: {self.blocked_requests}"
+        elif self.error:
+            line += f": {self.error}"
+        if self.fallback:
+            line += f" — взят прошлый результат ({self.count} записей)"
+        return line
+
+
+class CollectionResult(NamedTuple):
+    """Результат прогона: стажировки в порядке SOURCES и итоги по источникам."""
+    internships: list[Internship]
+    outcomes: list[SourceOutcome]
+
+
+async def _run_source(source: Source, browser: SharedBrowser) -> list[Internship]:
+    """Вызвать парсер источника: async-парсер в текущем loop, синхронный — в потоке."""
+    kwargs = {"browser": browser} if source.uses_browser else {}
+    if inspect.iscoroutinefunction(source.parse_fn):
+        return await source.parse_fn(source.url, **kwargs)
+    return await asyncio.to_thread(source.parse_fn, source.url, **kwargs)
+
+
+async def _collect_source(
+    source: Source,
+    browser: SharedBrowser,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    snapshot: SourceSnapshot | None,
+    health: SourceHealth | None,
+    on_outcome: Callable[[SourceOutcome], None] | None = None,
+) -> tuple[list[Internship], SourceOutcome]:
+    """
+    Собрать один источник с ограничением параллелизма и собственным дедлайном.
+    Если отпечаток результата совпал с прошлым прогоном, возвращаются сохранённые
+    стажировки, а итог помечается unchanged. on_outcome вызывается сразу по готовности источника.
+    """
+    if health is not None and health.open_until is not None and datetime.utcnow() < health.open_until:
+        outcome = SourceOutcome(source.company, "open", 0.0, error=f"цепь разомкнута до {health.open_until:%H:%M} UTC")
+        items, outcome = _fall_back(outcome, snapshot)
+    else:
+        items, outcome = await _collect_source_once(source, browser, semaphore, timeout, snapshot, health)
+    if on_outcome is not None:
+        on_outcome(outcome)
+    return items, outcome
+
+
+async def _collect_source_once(
+    source: Source,
+    browser: SharedBrowser,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    snapshot: SourceSnapshot | None,
+    health: SourceHealth | None,
+) -> tuple[list[Internship], SourceOutcome]:
+    async with semaphore:
+        started = time.monotonic()
         try:
-            items = parse_fn(url)
-            result.extend(items)
+            with track_load_stats() as load_stats, track_payload(snapshot.payload if snapshot else "") as payload:
+                items = await asyncio.wait_for(_run_source(source, browser), timeout=timeout)
+        except PayloadUnchanged:
+            # Парсер узнал прошлые сырые данные до классификации: записи — из снимка
+            outcome = SourceOutcome(
+                source.company, "ok", time.monotonic() - started,
+                count=len(snapshot.items), fingerprint=snapshot.fingerprint, unchanged=True,
+                blocked_requests=load_stats.blocked,
+            )
+            return snapshot.items, outcome
+        except asyncio.TimeoutError:
+            outcome = SourceOutcome(
+                source.company, "timeout", time.monotonic() - started,
+                error=f"превышен дедлайн {timeout:.0f} с",
+            )
+            return _fall_back(outcome, snapshot)
         except Exception as e:
-            # Логируем и продолжаем со следующими источниками
-            import sys
-            print(f"[{company}] Ошибка парсинга: {e}", file=sys.stderr)
-    return result
+            outcome = SourceOutcome(source.company, "error", time.monotonic() - started, error=str(e))
+            return _fall_back(outcome, snapshot)
+        items = [i for i in items if not is_placeholder(i)]
+        fingerprint = fingerprint_items(items)
+        if not items:
+            outcome = SourceOutcome(
+                source.company, "empty", time.monotonic() - started, error="на странице не нашлось программ",
+            )
+            return _fall_back(outcome, snapshot)
+        if _collapsed(items, snapshot) and (health is None or health.suspect != fingerprint):
+            # Обвал откладывается до подтверждения: отпечаток запомнит расписание
+            outcome = SourceOutcome(
+                source.company, "suspect", time.monotonic() - started, fingerprint=fingerprint,
+                error=f"записей {len(items)} вместо {len(snapshot.items)}",
+            )
+            return _fall_back(outcome, snapshot)
+        unchanged = snapshot is not None and snapshot.fingerprint == fingerprint
+        if unchanged:
+            items = snapshot.items
+        outcome = SourceOutcome(
+            source.company, "ok", time.monotonic() - started,
+            count=len(items), fingerprint=fingerprint, unchanged=unchanged,
+            blocked_requests=load_stats.blocked, payload_fingerprint=payload.fingerprint,
+        )
+        return items, outcome
+
+
+def _collapsed(items: list[Internship], snapshot: SourceSnapshot | None) -> bool:
+    """Число записей резко упало относительно прошлого удачного результата."""
+    from config import SOURCE_COLLAPSE_RATIO
+
+    return snapshot is not None and len(items) < len(snapshot.items) * SOURCE_COLLAPSE_RATIO
+
+
+def _fall_back(outcome: SourceOutcome, snapshot: SourceSnapshot | None) -> tuple[list[Internship], SourceOutcome]:
+    """Неудачный прогон: вместо результата — последний удачный снимок (строки в БД не трогаются)."""
+    items = [i for i in snapshot.items if not is_placeholder(i)] if snapshot is not None else []
+    if not items:
+        return [], outcome
+    return items, outcome._replace(count=len(items), unchanged=True, fallback=True)
+
+
+async def collect_all_internships_async(
+    max_workers: int | None = None,
+    timeout: float | None = None,
+    snapshots: dict[str, SourceSnapshot] | None = None,
+    on_outcome: Callable[[SourceOutcome], None] | None = None,
+    sources: list[Source] | None = None,
+    health: dict[str, SourceHealth] | None = None,
+) -> CollectionResult:
+    """
+    Собрать все источники параллельно (не больше max_workers одновременно).
+    Каждый источник ограничен своим дедлайном; результаты склеиваются в порядке SOURCES,
+    поэтому дайджест не зависит от того, какой сайт ответил первым.
+    snapshots - результаты прошлого прогона по компаниям (db.load_source_snapshots()).
+    on_outcome - вызывается с итогом каждого источника по мере готовности (ход прогона).
+    sources - собрать только эти источники (по умолчанию все SOURCES, см. scheduler.py).
+    health - здоровье источников по компаниям (scheduler.source_health()).
+    """
+    from config import COLLECT_MAX_WORKERS, SOURCE_TIMEOUT_SEC
+
+    snapshots = snapshots or {}
+    health = health or {}
+    semaphore = asyncio.Semaphore(max_workers or COLLECT_MAX_WORKERS)
+    async with SharedBrowser() as browser:
+        collected = await asyncio.gather(*(
+            _collect_source(
+                source, browser, semaphore, timeout or SOURCE_TIMEOUT_SEC, snapshots.get(source.company),
+                health.get(source.company), on_outcome,
+            )
+            for source in (SOURCES if sources is None else sources)
+        ))
+
+    result: list[Internship] = []
+    outcomes: list[SourceOutcome] = []
+    for items, outcome in collected:
+        result.extend(items)
+        outcomes.append(outcome)
+        if outcome.status != "ok":
+            # Логируем и продолжаем с остальными источниками
+            print(f"Ошибка парсинга {outcome.summary()}", file=sys.stderr)
+    return CollectionResult(result, outcomes)
+
+
+def collect_all_internships(
+    max_workers: int | None = None,
+    timeout: float | None = None,
+    snapshots: dict[str, SourceSnapshot] | None = None,
+    on_outcome: Callable[[SourceOutcome], None] | None = None,
+    sources: list[Source] | None = None,
+    health: dict[str, SourceHealth] | None = None,
+) -> CollectionResult:
+    """
+    Запустить все парсеры и собрать объединённый список стажировок.
+    Playwright-источники работают в одном общем браузере (каждый в своём контексте),
+    браузер закрывается по окончании прогона.
+    Синхронная обёртка над collect_all_internships_async(): вызывать вне event loop
+    (из main.py или через run_in_executor).
+    """
+    return asyncio.run(collect_all_internships_async(max_workers, timeout, snapshots, on_outcome, sources, health))
@@ -1,8 +1,15 @@
 """
 Базовые типы и контракт для парсеров.
 """
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Protocol
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Protocol
 
 
 @dataclass
@@ -17,6 +24,113 @@ class Internship:
         """Ключ для дедупликации: company + title."""
         return f"{self.company}|{self.title}"
 
+    def fingerprint(self) -> str:
+        """Отпечаток изменяемых полей (url + status): по нему БД находит изменившиеся строки."""
+        payload = f"{self.url}\n{self.status}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+# Статусы-заглушки: парсер не нашёл программ (или не загрузил страницу) и вернул одну запись
+# «смотрите сайт». Это не данные: до БД и дайджеста такие записи не доходят
+PLACEHOLDER_STATUSES = frozenset({"Проверьте на сайте", "Ошибка загрузки"})
+
+
+def is_placeholder(item: Internship) -> bool:
+    """Запись-заглушка вместо настоящей стажировки."""
+    return item.status in PLACEHOLDER_STATUSES
+
+
+def fingerprint_items(items: list[Internship]) -> str:
+    """Отпечаток всего, что источник отдал за прогон (порядок важен: он же порядок в дайджесте)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        digest.update(f"{item.unique_key()}\n{item.fingerprint()}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def parser_version() -> str:
+    """
+    Отпечаток кода извлечения: всех модулей пакета parsers (парсеры, классификатор статусов,
+    разбор HTML). Входит в отпечаток сырых данных и в кэш разбора HTTP-клиента, так что после
+    деплоя с исправленным парсером прежние результаты по неизменившимся страницам не отдаются.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        digest.update(path.name.encode("utf-8") + b"\n" + path.read_bytes())
+    return digest.hexdigest()
+
+
+class SourceSnapshot(NamedTuple):
+    """Последний сохранённый результат источника: отпечаток и сами стажировки."""
+    company: str
+    fingerprint: str
+    items: list[Internship]
+    payload: str = ""  # отпечаток сырых данных страницы, из которых собраны items (см. check_payload)
+
+
+class PayloadUnchanged(Exception):
+    """Сырые данные страницы совпали с прошлым прогоном: классифицировать и собирать записи не нужно."""
+
+
+class PayloadCheck:
+    """Отпечаток сырых данных источника за прогон и отпечаток из прошлого снимка."""
+
+    def __init__(self, previous: str = "") -> None:
+        self.previous = previous
+        self.fingerprint = ""
+
+
+# Проверка текущего источника: collect_all_internships() заводит свою на каждую задачу
+_current_payload: ContextVar[PayloadCheck | None] = ContextVar("payload_check", default=None)
+
+
+@contextmanager
+def track_payload(previous: str = "") -> Iterator[PayloadCheck]:
+    """Сравнивать сырые данные парсера (check_payload) с previous в пределах блока."""
+    check = PayloadCheck(previous)
+    token = _current_payload.set(check)
+    try:
+        yield check
+    finally:
+        _current_payload.reset(token)
+
+
+def check_payload(payload: Any) -> None:
+    """
+    Вызывается парсером сразу после извлечения сырых данных (JSON из evaluate),
+    до классификации статусов. Запоминает отпечаток данных и версии парсеров (parser_version);
+    если он совпал с прошлым снимком источника — PayloadUnchanged, и сборщик берёт записи из снимка.
+    Вне track_payload() (парсер вызван отдельно) ничего не делает.
+    """
+    check = _current_payload.get()
+    if check is None:
+        return
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    digest = hashlib.blake2b(digest_size=16)
+    # Тот же код извлечения - иначе прошлые записи собраны прежним парсером и не годятся
+    digest.update(parser_version().encode("utf-8") + b"\n")
+    digest.update(raw)
+    check.fingerprint = digest.hexdigest()
+    if check.fingerprint == check.previous:
+        raise PayloadUnchanged
+
+
+class SourceHealth(NamedTuple):
+    """Здоровье источника перед сбором (ведёт scheduler.py)."""
+    company: str
+    open_until: datetime | None = None  # цепь разомкнута: до этого времени (UTC) источник не собирается
+    suspect: str = ""  # отпечаток обвалившегося результата, отложенного прошлым прогоном
+
+
+class Source(NamedTuple):
+    """Источник: компания, URL страницы и функция парсинга."""
+    company: str
+    url: str
+    parse_fn: Callable[..., list[Internship]]
+    uses_browser: bool = False  # True = парсеру нужен общий браузер Playwright
+    probe: Callable[[str], str] | None = None  # дешёвая проба: url -> отпечаток страницы (parsers/probe.py)
+
 
 class ParserProtocol(Protocol):
     """Контракт парсера: имя источника и функция парсинга."""
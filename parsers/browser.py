@@ -0,0 +1,239 @@
+"""
+Общий браузер Playwright на один прогон сбора.
+Chromium запускается один раз, каждый источник получает свой чистый BrowserContext.
+Используется async API Playwright: контексты одного браузера можно вести
+параллельно из одного event loop (объекты sync API привязаны к своему потоку).
+"""
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterator
+from urllib.parse import urlsplit
+
+# Типы ресурсов, не нужные для чтения DOM. Стили не блокируем: от них зависит innerText
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "manifest", "ping"})
+
+# Счётчики и рекламные сети (совпадение по домену и всем поддоменам)
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "mc.yandex.ru",
+    "mc.yandex.com",
+    "an.yandex.ru",
+    "top-fwz1.mail.ru",
+    "counter.yadro.ru",
+    "connect.facebook.net",
+    "vk.com/rtrg",
+)
+
+# «Контент готов»: совпавших узлов больше нуля и их число не меняется READY_SETTLE_MS миллисекунд
+READY_SETTLE_MS = 300
+READY_JS = """
+([selector, settleMs]) => {
+    const count = document.querySelectorAll(selector).length;
+    const probe = window.__readyProbe || (window.__readyProbe = {count: -1, since: 0});
+    const now = performance.now();
+    if (count !== probe.count) {
+        probe.count = count;
+        probe.since = now;
+        return false;
+    }
+    return count > 0 && now - probe.since >= settleMs;
+}
+"""
+
+
+class SharedBrowser:
+    """
+    Один Chromium на весь прогон.
+    Браузер запускается лениво (при первом запросе контекста),
+    поэтому прогон без Playwright-источников его не поднимает.
+    """
+
+    def __init__(self, headless: bool | None = None) -> None:
+        from config import PLAYWRIGHT_HEADLESS
+
+        self._headless = PLAYWRIGHT_HEADLESS if headless is None else headless
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self._headless)
+        return self._browser
+
+    async def new_context(self):
+        """Новый изолированный BrowserContext (свои cookies, кэш, страницы)."""
+        from config import PLAYWRIGHT_TIMEOUT_MS
+
+        browser = await self._ensure_browser()
+        context = await browser.new_context()
+        context.set_default_timeout(PLAYWRIGHT_TIMEOUT_MS)
+        return context
+
+    async def close(self) -> None:
+        """Закрыть браузер и драйвер Playwright."""
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        finally:
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+
+    async def __aenter__(self) -> "SharedBrowser":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+@asynccontextmanager
+async def browser_context(browser: SharedBrowser | None = None) -> AsyncIterator:
+    """
+    Контекст для одного источника.
+    Если общий браузер не передан (парсер вызван отдельно), запускается временный.
+    """
+    if browser is None:
+        async with SharedBrowser() as own:
+            async with browser_context(own) as context:
+                yield context
+        return
+
+    context = await browser.new_context()
+    try:
+        yield context
+    finally:
+        await context.close()
+
+
+# Извлечение карточек за один вызов evaluate: вся выборка, обрезка вложенных и повторов
+# и чтение текста делаются в странице, наружу уходит один JSON-массив.
+# Вложенные совпадения отбрасываются: карточкой считается самый внешний узел,
+# если только он не контейнер-список (в нём два и больше совпавших узла) -
+# тогда карточками становятся его дети.
+EXTRACT_CARDS_JS = """
+(selector) => {
+    const nodes = Array.from(document.querySelectorAll(selector));
+    const matched = new Set(nodes);
+    const nearest = new Map();
+    const children = new Map();
+    for (const el of nodes) {
+        let parent = el.parentElement;
+        while (parent && !matched.has(parent)) parent = parent.parentElement;
+        nearest.set(el, parent);
+        if (parent) children.set(parent, (children.get(parent) || 0) + 1);
+    }
+    const isContainer = (el) => (children.get(el) || 0) >= 2;
+    const isCard = (el) => {
+        if (isContainer(el)) return false;
+        for (let p = nearest.get(el); p; p = nearest.get(p)) {
+            if (!isContainer(p)) return false;
+        }
+        return true;
+    };
+
+    const seen = new Set();
+    const cards = [];
+    for (const el of nodes) {
+        if (!isCard(el)) continue;
+        const title = (el.innerText || "").trim();
+        if (!title || seen.has(title)) continue;
+        seen.add(title);
+        cards.push({
+            title,
+            href: el.getAttribute("href") || "",
+            context: el.parentElement ? el.parentElement.textContent || "" : "",
+        });
+    }
+    return cards;
+}
+"""
+
+
+async def extract_cards(page, selector: str) -> list[dict]:
+    """Карточки по селектору: [{"title", "href", "context"}] за один round trip."""
+    return await page.evaluate(EXTRACT_CARDS_JS, selector)
+
+
+@dataclass
+class LoadStats:
+    """Сколько запросов страницы пропущено и сколько заблокировано (по типам)."""
+    allowed: int = 0
+    blocked: int = 0
+    blocked_by_type: Counter = field(default_factory=Counter)
+
+    def summary(self) -> str:
+        total = self.allowed + self.blocked
+        return f"заблокировано запросов: {self.blocked} из {total}"
+
+
+# Статистика текущего источника: collect_all_internships() заводит свою на каждую задачу
+_current_stats: ContextVar[LoadStats | None] = ContextVar("load_stats", default=None)
+
+
+@contextmanager
+def track_load_stats() -> Iterator[LoadStats]:
+    """Собирать статистику всех load_page() внутри блока (в пределах текущей задачи asyncio)."""
+    stats = LoadStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _is_tracker(url: str) -> bool:
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    for blocked in BLOCKED_HOSTS:
+        blocked_host, _, blocked_path = blocked.partition("/")
+        if host == blocked_host or host.endswith("." + blocked_host):
+            if not blocked_path or parts.path.lstrip("/").startswith(blocked_path):
+                return True
+    return False
+
+
+async def load_page(context, url: str, ready: str | None = None):
+    """
+    Открыть страницу без лишнего трафика и дождаться контента.
+    - картинки, шрифты, медиа и трекеры обрываются на уровне route;
+    - вместо networkidle и фиксированной паузы ждём, пока по селектору ready
+      появятся узлы и их число перестанет расти. Не дождались за таймаут -
+      идём дальше с тем, что есть (парсер вернёт заглушку, если пусто).
+    Возвращает (page, LoadStats).
+    """
+    stats = _current_stats.get() or LoadStats()
+
+    async def handle(route) -> None:
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or _is_tracker(request.url):
+            stats.blocked += 1
+            stats.blocked_by_type[request.resource_type] += 1
+            await route.abort()
+        else:
+            stats.allowed += 1
+            # fallback, а не continue_: запрос уходит следующему обработчику
+            # (например, route_from_har при воспроизведении записанных страниц)
+            await route.fallback()
+
+    await context.route("**/*", handle)
+    page = await context.new_page()
+    await page.goto(url, wait_until="domcontentloaded")
+    if ready:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            await page.wait_for_function(READY_JS, arg=[ready, READY_SETTLE_MS], polling=100)
+        except PlaywrightTimeoutError:
+            pass
+    return page, stats
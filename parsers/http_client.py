@@ -0,0 +1,126 @@
+"""
+Общий HTTP-клиент для источников без браузера (requests).
+- одна requests.Session с пулом keep-alive соединений;
+- дисковый кэш: тело ответа, ETag и Last-Modified по каждому URL;
+- условные запросы (If-None-Match / If-Modified-Since): при 304 страница не скачивается,
+  а парсер может вернуть сохранённый результат разбора, не запуская BeautifulSoup
+  (если с тех пор не менялся код парсеров, см. parsers.base.parser_version).
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from parsers.base import parser_version
+
+
+class FetchResult(NamedTuple):
+    """Ответ с учётом кэша."""
+    url: str
+    content: bytes  # тело ответа (при not_modified — из кэша)
+    not_modified: bool  # True = сервер ответил 304, страница не менялась
+    payload: Any = None  # результат разбора из remember() (только при not_modified и той же версии парсеров)
+    encoding: str | None = None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpClient:
+    """Клиент с пулом соединений и дисковым кэшем условных запросов."""
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        timeout: float | None = None,
+        pool_size: int = 10,
+    ) -> None:
+        from config import HTTP_CACHE_DIR, REQUESTS_TIMEOUT_SEC
+
+        self.cache_dir = Path(cache_dir or HTTP_CACHE_DIR)
+        self.timeout = timeout or REQUESTS_TIMEOUT_SEC
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._lock = threading.Lock()
+
+    def _entry_paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _load_entry(self, url: str) -> tuple[dict | None, bytes | None]:
+        meta_path, body_path = self._entry_paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return meta, body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+
+    def _save_entry(self, url: str, meta: dict, body: bytes | None = None) -> None:
+        meta_path, body_path = self._entry_paths(url)
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                body_path.write_bytes(body)
+            tmp_path = meta_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(meta_path)
+
+    def get(self, url: str) -> FetchResult:
+        """GET с валидаторами из кэша. Ошибки HTTP пробрасываются (raise_for_status)."""
+        meta, cached_body = self._load_entry(url)
+        headers = {}
+        if meta is not None and cached_body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        resp = self._session.get(url, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304 and meta is not None and cached_body is not None:
+            # Результат разбора годится, только если его собрал тот же код парсеров
+            payload = meta.get("payload") if meta.get("parser_version") == parser_version() else None
+            return FetchResult(url, cached_body, True, payload, meta.get("encoding"))
+        resp.raise_for_status()
+
+        new_meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "encoding": resp.encoding,
+            "payload": None,
+        }
+        if new_meta["etag"] or new_meta["last_modified"]:
+            self._save_entry(url, new_meta, resp.content)
+        return FetchResult(url, resp.content, False, None, resp.encoding)
+
+    def remember(self, url: str, payload: Any) -> None:
+        """Сохранить результат разбора страницы (JSON-совместимый), чтобы вернуть его при 304."""
+        meta, _ = self._load_entry(url)
+        if meta is None:
+            return
+        meta["payload"] = payload
+        meta["parser_version"] = parser_version()
+        self._save_entry(url, meta)
+
+    def close(self) -> None:
+        self._session.close()
+
+
+_client: HttpClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Общий клиент процесса: соединения переиспользуются между прогонами и источниками."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,46 @@
+"""
+Дешёвые пробы источников: узнать, менялась ли страница, без полного разбора.
+Проба — один HTTP-запрос через общий клиент (условный: при 304 страница не скачивается)
+и отпечаток устойчивой части страницы: видимый текст и ссылки выбранного блока,
+без script/style и атрибутов, где живут nonce, токены и имена сборок.
+Полный парсер (Playwright) запускается только когда отпечаток пробы изменился (scheduler.py).
+"""
+import hashlib
+import re
+from typing import Callable
+
+from parsers.http_client import get_http_client
+from parsers.soup import make_soup
+
+# Теги, содержимое которых в отпечаток не входит: меняется от запроса к запросу или не видно
+_NOISE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe")
+_SPACE_RE = re.compile(r"\s+")
+
+ProbeFn = Callable[[str], str]
+
+
+def region_signature(content: bytes, encoding: str | None, selectors: tuple[str, ...]) -> str:
+    """Отпечаток первого найденного по selectors блока (или всей страницы): текст и href ссылок."""
+    soup = make_soup(content, encoding)
+    region = next((found for found in map(soup.select_one, selectors) if found is not None), soup)
+    for tag in region.find_all(_NOISE_TAGS):
+        tag.decompose()
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_SPACE_RE.sub(" ", region.get_text(" ")).strip().encode("utf-8"))
+    for link in region.find_all("a", href=True):
+        digest.update(b"\n" + link["href"].encode("utf-8"))
+    return digest.hexdigest()
+
+
+def page_probe(*selectors: str) -> ProbeFn:
+    """
+    Проба по HTML страницы: selectors — CSS-селекторы устойчивого блока по порядку
+    предпочтения (по умолчанию main, затем body). Ошибки HTTP пробрасываются.
+    """
+    selectors = selectors or ("main", "body")
+
+    def probe(url: str) -> str:
+        resp = get_http_client().get(url)
+        return region_signature(resp.content, resp.encoding, selectors)
+
+    return probe
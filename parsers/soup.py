@@ -0,0 +1,127 @@
+"""
+Разбор HTML для источников без браузера.
+- дерево строится быстрым парсером (lxml, если установлен) прямо из байтов ответа;
+- блоки с заголовками и их текст собираются одним проходом по дереву:
+  текст каждого блока — срез общего текста страницы, а не отдельный get_text().
+"""
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup
+from bs4.element import CData, NavigableString, Tag
+
+# Строки, которые попадают в get_text() (комментарии, doctype, script/style - нет)
+_TEXT_TYPES = (NavigableString, CData)
+
+
+def html_parser() -> str:
+    """Парсер для BeautifulSoup: из HTML_PARSER, при отсутствии lxml — встроенный html.parser."""
+    from config import HTML_PARSER
+
+    if HTML_PARSER == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return "html.parser"
+    return HTML_PARSER
+
+
+def make_soup(content: bytes, encoding: str | None = None) -> BeautifulSoup:
+    """Дерево из сырых байтов ответа: декодирует сам парсер, без промежуточной строки."""
+    return BeautifulSoup(content, html_parser(), from_encoding=encoding)
+
+
+class HeadingBlock(NamedTuple):
+    """Заголовок и ближайший к нему блок-предок."""
+    heading: Tag
+    block: Tag | None  # ближайший предок из block_tags (None — заголовок вне блоков)
+    title: str  # текст заголовка, как heading.get_text(strip=True)
+    text: str  # текст блока, как block.get_text()
+    link: Tag | None  # первая ссылка с href внутри блока
+
+
+class PageScan(NamedTuple):
+    """Результат прохода по странице."""
+    headings: list[HeadingBlock]
+    text: str  # весь текст страницы, как soup.get_text()
+
+
+def scan_headings(
+    soup: BeautifulSoup,
+    heading_tags: tuple[str, ...] = ("h3", "h4", "h5"),
+    block_tags: tuple[str, ...] = ("div", "section", "article"),
+) -> PageScan:
+    """
+    Один проход по дереву вместо find_parent() + get_text() на каждый заголовок.
+    Во время обхода копятся строки страницы, у каждого блока запоминается
+    диапазон [начало, конец) в общем тексте и первая ссылка; текст блока
+    вырезается один раз, даже если в блоке несколько заголовков.
+    """
+    headings = set(heading_tags)
+    blocks = set(block_tags)
+    parts: list[str] = []
+    length = 0
+
+    spans: dict[int, list[int]] = {}  # id(блока) -> [начало, конец]
+    links: dict[int, Tag] = {}  # id(блока) -> первая ссылка
+    open_blocks: list[Tag] = []
+    found: list[tuple[Tag, Tag | None, list[str]]] = []
+    open_headings: list[list[str]] = []  # строки заголовков, внутри которых идёт обход
+
+    # Обход в глубину без рекурсии: (узел, True) — вход, (узел, False) — выход
+    stack: list[tuple] = [(soup, True)]
+    while stack:
+        node, entering = stack.pop()
+        if not isinstance(node, Tag):
+            parts.append(node)
+            length += len(node)
+            for strings in open_headings:
+                strings.append(node)
+            continue
+        if not entering:
+            if node.name in blocks:
+                spans[id(node)][1] = length
+                open_blocks.pop()
+            if node.name in headings:
+                open_headings.pop()
+            continue
+
+        if node.name in blocks:
+            spans[id(node)] = [length, length]
+            open_blocks.append(node)
+        if node.name in headings:
+            strings: list[str] = []
+            found.append((node, open_blocks[-1] if open_blocks else None, strings))
+            open_headings.append(strings)
+        if node.name == "a" and node.get("href") is not None:
+            # Ссылка — первая для всех открытых блоков, у которых ссылки ещё нет.
+            # Если у блока ссылка уже есть, она есть и у всех внешних блоков
+            for block in reversed(open_blocks):
+                if id(block) in links:
+                    break
+                links[id(block)] = node
+
+        stack.append((node, False))
+        for child in reversed(node.contents):
+            if isinstance(child, Tag) or type(child) in _TEXT_TYPES:
+                stack.append((child, True))
+
+    text = "".join(parts)
+    block_texts: dict[int, str] = {}
+    result: list[HeadingBlock] = []
+    for heading, block, strings in found:
+        block_text = ""
+        if block is not None:
+            key = id(block)
+            if key not in block_texts:
+                start, end = spans[key]
+                block_texts[key] = text[start:end]
+            block_text = block_texts[key]
+        title = "".join(s.strip() for s in strings)
+        result.append(HeadingBlock(
+            heading=heading,
+            block=block,
+            title=title,
+            text=block_text,
+            link=links.get(id(block)) if block is not None else None,
+        ))
+    return PageScan(headings=result, text=text)
@@ -0,0 +1,135 @@
+"""
+Умное определение статуса набора по тексту карточки — общее для всех парсеров.
+Все формулировки собраны в одно регулярное выражение с именованными группами
+(разложенное по общим префиксам), текст просматривается за один проход.
+Приоритет: открыт > скоро > закрыт.
+"""
+import re
+from functools import lru_cache
+
+STATUS_OPEN = "Открыт набор"
+STATUS_SOON = "Скоро откроется"
+STATUS_CLOSED = "Набор закрыт"
+
+# Нормализованный вид статуса (колонка status_kind в БД); исходный текст хранится отдельно
+KIND_OPEN = "open"
+KIND_SOON = "soon"
+KIND_CLOSED = "closed"
+KIND_UNKNOWN = "unknown"
+
+# Группы в порядке приоритета
+STATUS_PATTERNS: dict[str, tuple[str, ...]] = {
+    "open": (
+        r'набор\s+открыт',
+        r'открыт\s+набор',
+        r'прием\s+заявок',
+        r'приём\s+заявок',
+        r'идет\s+набор',
+        r'идёт\s+набор',
+        r'принимаем\s+заявки',
+        r'подать\s+заявку',
+        r'registration\s+open',
+        r'applications\s+open',
+        r'recruiting',
+        r'apply\s+now',
+    ),
+    "soon": (
+        r'скоро',
+        r'ближайшее\s+время',
+        r'весна\s+\d{4}',
+        r'лето\s+\d{4}',
+        r'осень\s+\d{4}',
+        r'зима\s+\d{4}',
+        r'coming\s+soon',
+        r'opens\s+soon',
+    ),
+    "closed": (
+        r'набор\s+закрыт',
+        r'закрыт\s+набор',
+        r'прием\s+завершен',
+        r'приём\s+завершен',
+        r'завершен',
+        r'applications\s+closed',
+        r'closed',
+    ),
+}
+
+_STATUS_BY_GROUP = {"open": STATUS_OPEN, "soon": STATUS_SOON, "closed": STATUS_CLOSED}
+_RANK = {"open": 0, "soon": 1, "closed": 2}
+
+# Шаблоны — литеральный текст плюс \s+ и \d{N}; на такие токены и режем при сборке дерева
+_TOKEN_RE = re.compile(r"\\s\+|\\d\{\d+\}|\\.|.")
+
+
+def _compile_classifier(patterns: dict[str, tuple[str, ...]]) -> re.Pattern:
+    """
+    Собрать все шаблоны в одну альтернативу, разложенную по общим префиксам.
+    Плоское «a|b|c|...» re перебирает все ветки в каждой позиции текста;
+    дерево префиксов отсекает несовпадающие позиции по первому символу.
+    Каждый шаблон заканчивается пустой именованной группой вида <группа>_<номер>,
+    по m.lastgroup видно, что именно совпало.
+    """
+    trie: dict = {}
+    for group, group_patterns in patterns.items():
+        for number, pattern in enumerate(group_patterns):
+            node = trie
+            for token in _TOKEN_RE.findall(pattern):
+                node = node.setdefault(token, {})
+            node[""] = f"{group}_{number}"
+
+    def rank(key: str, value) -> int:
+        """Лучший (наименьший) ранг статуса среди шаблонов ветки."""
+        if key == "":
+            return _RANK[value.rsplit("_", 1)[0]]
+        return min(rank(k, v) for k, v in value.items())
+
+    def emit(node: dict) -> str:
+        # Ветки с более приоритетными статусами пробуются первыми
+        branches = [
+            f"(?P<{value}>)" if key == "" else key + emit(value)
+            for key, value in sorted(node.items(), key=lambda item: rank(*item))
+        ]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return re.compile(emit(trie))
+
+
+_CLASSIFIER = _compile_classifier(STATUS_PATTERNS)
+
+def _group_of(match: re.Match) -> str:
+    return match.lastgroup.rsplit("_", 1)[0]
+
+
+def _detect_group(text: str) -> str | None:
+    """Лучшая группа ("open" / "soon" / "closed") среди совпадений в тексте или None."""
+    text_lower = text.lower()
+    best: str | None = None
+    pos = 0
+    while match := _CLASSIFIER.search(text_lower, pos):
+        group = _group_of(match)
+        if group == "open":
+            return group
+        if best is None or _RANK[group] < _RANK[best]:
+            best = group
+        # Следующий поиск — со следующей позиции, а не с конца совпадения:
+        # формулировки могут перекрываться («закрыт набор открыт»)
+        pos = match.start() + 1
+    return best
+
+
+def smart_status_detection(text: str) -> str:
+    """
+    Умное определение статуса стажировки по тексту.
+    Возвращает: "Открыт набор", "Набор закрыт", "Скоро откроется", или пустую строку.
+    """
+    group = _detect_group(text)
+    return _STATUS_BY_GROUP[group] if group else ""
+
+
+@lru_cache(maxsize=1024)
+def status_kind(status: str) -> str:
+    """
+    Вид статуса для записи в БД: open / soon / closed / unknown.
+    Статусы от парсеров повторяются («Набор открыт», «Уточните на сайте»), поэтому кэшируется.
+    """
+    return _detect_group(status) or KIND_UNKNOWN
@@ -4,97 +4,83 @@
 Страница: https://education.tbank.ru/start/
 Динамический контент.
 """
-from parsers.base import Internship
+from parsers.base import Internship, check_payload
+from parsers.browser import SharedBrowser, browser_context, load_page
+
+# Ссылки на программы /start/*: заголовок (h4, h3 или текст ссылки), href и текст
+# родительского блока. Служебные ссылки, пустые заголовки и повторы отсекаются в странице.
+EXTRACT_LINKS_JS = """
+() => {
+    const seen = new Set();
+    const links = [];
+    for (const link of document.querySelectorAll('a[href*="/start/"]')) {
+        const href = link.getAttribute("href") || "";
+        if (!href || href === "/start/" || href === "/start" || seen.has(href)) continue;
+        const titleEl = link.querySelector("h4") || link.querySelector("h3") || link;
+        const title = (titleEl.innerText || "").trim();
+        if (title.length < 3) continue;
+        seen.add(href);
+        links.push({
+            title,
+            href,
+            context: link.parentElement ? link.parentElement.textContent || "" : "",
+        });
+    }
+    return links;
+}
+"""
 
 
-def parse_tbank(url: str) -> list[Internship]:
+async def parse_tbank(url: str, browser: SharedBrowser | None = None) -> list[Internship]:
     """
     Парсит страницу стажировок T-Bank через Playwright.
     Ищет карточки с направлениями стажировок.
     """
-    from playwright.sync_api import sync_playwright
-    from config import PLAYWRIGHT_HEADLESS, PLAYWRIGHT_TIMEOUT_MS
-
     company = "T-Bank"
     result: list[Internship] = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=PLAYWRIGHT_HEADLESS)
-        try:
-            page = browser.new_page()
-            page.set_default_timeout(PLAYWRIGHT_TIMEOUT_MS)
-            page.goto(url, wait_until="networkidle")
-            
-            # Ждем загрузки контента
-            page.wait_for_timeout(2000)
+    async with browser_context(browser) as context:
+        # Ждем загрузки контента: появления ссылок на программы
+        page, _ = await load_page(context, url, ready='a[href*="/start/"]')
 
-            # Ищем все ссылки которые ведут на /start/* (это и есть стажировки)
-            # Исключаем ссылки на соцсети, общие страницы и т.д.
-            links = page.query_selector_all('a[href*="/start/"]')
-            
-            seen_urls = set()
-            
-            for link in links:
-                try:
-                    href = link.get_attribute("href") or ""
-                    
-                    # Пропускаем если это не стажировка
-                    if not href or href == "/start/" or href == "/start":
-                        continue
-                    
-                    # Формируем полный URL
-                    if href.startswith("http"):
-                        full_url = href
-                    elif href.startswith("/"):
-                        full_url = f"https://education.tbank.ru{href}"
-                    else:
-                        continue
-                    
-                    # Избегаем дубликатов
-                    if full_url in seen_urls:
-                        continue
-                    
-                    # Получаем заголовок (название стажировки)
-                    # Обычно это h4 внутри ссылки или текст самой ссылки
-                    title_el = link.query_selector("h4") or link.query_selector("h3") or link
-                    title = (title_el.inner_text() or "").strip()
-                    
-                    if not title or len(title) < 3:
-                        continue
-                    
-                    # Проверяем есть ли текст "Набор открыт" рядом с этой карточкой
-                    # Ищем в родительском блоке
-                    parent = link.evaluate("el => el.closest('div, section, article')")
-                    status = ""
-                    
-                    # Проверяем текст перед ссылкой в том же блоке
-                    try:
-                        # Получаем весь текст родительского блока
-                        parent_el = link.evaluate("el => el.parentElement")
-                        if parent_el:
-                            parent_text = page.evaluate("el => el.textContent", parent_el)
-                            if "Набор открыт" in parent_text:
-                                status = "Набор открыт"
-                            elif "Набор закрыт" in parent_text:
-                                status = "Набор закрыт"
-                    except:
-                        pass
-                    
-                    seen_urls.add(full_url)
-                    result.append(
-                        Internship(
-                            company=company,
-                            title=title,
-                            url=full_url,
-                            status=status
-                        )
-                    )
-                    
-                except Exception as e:
-                    continue
+        # Ищем все ссылки которые ведут на /start/* (это и есть стажировки) -
+        # заголовок, href и текст родительского блока собираются одним вызовом evaluate
+        links = await page.evaluate(EXTRACT_LINKS_JS)
 
-        finally:
-            browser.close()
+    # Те же сырые данные, что в прошлом прогоне: статусы и записи не пересобираются
+    check_payload(links)
+    seen_urls = set()
+    for link in links:
+        href = link["href"]
+        
+        # Формируем полный URL
+        if href.startswith("http"):
+            full_url = href
+        elif href.startswith("/"):
+            full_url = f"https://education.tbank.ru{href}"
+        else:
+            continue
+        
+        # Избегаем дубликатов
+        if full_url in seen_urls:
+            continue
+        
+        # Проверяем есть ли текст "Набор открыт" рядом с этой карточкой (в родительском блоке)
+        status = ""
+        if "Набор открыт" in link["context"]:
+            status = "Набор открыт"
+        elif "Набор закрыт" in link["context"]:
+            status = "Набор закрыт"
+        
+        seen_urls.add(full_url)
+        result.append(
+            Internship(
+                company=company,
+                title=link["title"],
+                url=full_url,
+                status=status
+            )
+        )
 
     # Удаляем дубликаты по title
     unique_result = []
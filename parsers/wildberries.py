@@ -4,106 +4,41 @@
 Страница: https://tech.wildberries.ru/courses?status_id=2&status_id=5
 Умное определение статусов.
 """
-import re
-from parsers.base import Internship
+from parsers.base import Internship, check_payload
+from parsers.browser import SharedBrowser, browser_context, extract_cards, load_page
+from parsers.status import smart_status_detection
 
-
-def smart_status_detection(text: str) -> str:
-    """Умное определение статуса."""
-    text_lower = text.lower()
-    
-    open_patterns = [
-        r'набор\s+открыт', r'открыт\s+набор', r'прием\s+заявок',
-        r'приём\s+заявок', r'идет\s+набор', r'идёт\s+набор',
-        r'принимаем\s+заявки', r'подать\s+заявку',
-        r'registration\s+open', r'applications\s+open',
-        r'recruiting', r'apply\s+now',
-    ]
-    
-    for pattern in open_patterns:
-        if re.search(pattern, text_lower):
-            return "Открыт набор"
-    
-    soon_patterns = [
-        r'скоро', r'ближайшее\s+время',
-        r'весна\s+\d{4}', r'лето\s+\d{4}',
-        r'coming\s+soon', r'opens\s+soon',
-    ]
-    
-    for pattern in soon_patterns:
-        if re.search(pattern, text_lower):
-            return "Скоро откроется"
-    
-    closed_patterns = [
-        r'набор\s+закрыт', r'закрыт\s+набор',
-        r'прием\s+завершен', r'приём\s+завершен',
-        r'applications\s+closed', r'closed',
-    ]
-    
-    for pattern in closed_patterns:
-        if re.search(pattern, text_lower):
-            return "Набор закрыт"
-    
-    return ""
+# Карточки программ; их появление на странице = контент загружен
+CARD_SELECTOR = 'a[href*="/courses/"], [class*="course"], [class*="card"]'
 
 
-def parse_wildberries(url: str) -> list[Internship]:
+async def parse_wildberries(url: str, browser: SharedBrowser | None = None) -> list[Internship]:
     """Парсит страницу курсов/стажировок Wildberries Tech."""
-    from playwright.sync_api import sync_playwright
-    from config import PLAYWRIGHT_HEADLESS, PLAYWRIGHT_TIMEOUT_MS
-
     company = "Wildberries Tech"
     base_url = "https://tech.wildberries.ru"
     result: list[Internship] = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=PLAYWRIGHT_HEADLESS)
-        try:
-            page = browser.new_page()
-            page.set_default_timeout(PLAYWRIGHT_TIMEOUT_MS)
-            page.goto(url, wait_until="networkidle")
-            page.wait_for_timeout(2000)
-
-            cards = page.query_selector_all(
-                'a[href*="/courses/"], [class*="course"], [class*="card"]'
-            )
+    async with browser_context(browser) as context:
+        page, _ = await load_page(context, url, ready=CARD_SELECTOR)
 
-            seen: set[str] = set()
-            for card in cards:
-                try:
-                    text = (card.inner_text() or "").strip()
-                    href = card.get_attribute("href") or ""
-                    
-                    if not text or len(text) < 3 or text in seen:
-                        continue
-                    
-                    full_url = href if href.startswith("http") else f"{base_url}{href}"
-                    
-                    parent_text = ""
-                    try:
-                        parent_text = page.evaluate(
-                            "(el) => el.parentElement?.textContent || ''",
-                            card
-                        )
-                    except:
-                        pass
-                    
-                    status = smart_status_detection(text + " " + parent_text)
-                    
-                    seen.add(text)
-                    result.append(
-                        Internship(
-                            company=company,
-                            title=text,
-                            url=full_url,
-                            status=status or "Уточните на сайте"
-                        )
-                    )
-                except Exception:
-                    continue
+        # Все карточки одним вызовом evaluate: без round trip на каждый узел
+        cards = await extract_cards(page, CARD_SELECTOR)
 
-        finally:
-            browser.close()
+    # Те же сырые данные, что в прошлом прогоне: статусы и записи не пересобираются
+    check_payload(cards)
+    cards = [card for card in cards if len(card["title"]) >= 3]
+    for card in cards:
+        status = smart_status_detection(card["title"] + " " + card["context"])
+        href = card["href"]
+        full_url = href if href.startswith("http") else f"{base_url}{href}"
+        result.append(
+            Internship(
+                company=company,
+                title=card["title"],
+                url=full_url,
+                status=status or "Уточните на сайте"
+            )
+        )
 
     if not result:
         result.append(
@@ -5,122 +5,56 @@
 Страница: https://yandex.ru/yaintern/internship
 Умное определение статусов.
 """
-from parsers.base import Internship
-import re
+from parsers.base import Internship, check_payload
+from parsers.browser import SharedBrowser, browser_context, extract_cards, load_page
+from parsers.status import smart_status_detection
 
+# Карточки или ссылки на стажировки; их появление на странице = контент загружен
+CARD_SELECTOR = (
+    'a[href*="yaintern"], a[href*="internship"], '
+    '[class*="vacancy"], [class*="card"], [class*="program"]'
+)
 
-def smart_status_detection(text: str) -> str:
-    """Умное определение статуса."""
-    text_lower = text.lower()
-    
-    open_patterns = [
-        r'набор\s+открыт', r'открыт\s+набор', r'прием\s+заявок',
-        r'приём\s+заявок', r'идет\s+набор', r'идёт\s+набор',
-        r'принимаем\s+заявки', r'подать\s+заявку',
-        r'registration\s+open', r'applications\s+open',
-        r'recruiting', r'apply\s+now',
-    ]
-    
-    for pattern in open_patterns:
-        if re.search(pattern, text_lower):
-            return "Открыт набор"
-    
-    soon_patterns = [
-        r'скоро', r'ближайшее\s+время',
-        r'весна\s+\d{4}', r'лето\s+\d{4}',
-        r'coming\s+soon', r'opens\s+soon',
-    ]
-    
-    for pattern in soon_patterns:
-        if re.search(pattern, text_lower):
-            return "Скоро откроется"
-    
-    closed_patterns = [
-        r'набор\s+закрыт', r'закрыт\s+набор',
-        r'прием\s+завершен', r'приём\s+завершен',
-        r'applications\s+closed', r'closed',
-    ]
-    
-    for pattern in closed_patterns:
-        if re.search(pattern, text_lower):
-            return "Набор закрыт"
-    
-    return ""
 
-
-def parse_yandex(url: str) -> list[Internship]:
+async def parse_yandex(url: str, browser: SharedBrowser | None = None) -> list[Internship]:
     """
     Парсит страницу стажировок Яндекса.
     """
-    from playwright.sync_api import sync_playwright
-    from config import PLAYWRIGHT_HEADLESS, PLAYWRIGHT_TIMEOUT_MS
-
     company = "Яндекс"
     result: list[Internship] = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=PLAYWRIGHT_HEADLESS)
-        try:
-            page = browser.new_page()
-            page.set_default_timeout(PLAYWRIGHT_TIMEOUT_MS)
-            page.goto(url, wait_until="networkidle")
-            page.wait_for_timeout(2000)
+    async with browser_context(browser) as context:
+        page, _ = await load_page(context, url, ready=CARD_SELECTOR)
 
-            # Ищем карточки или ссылки на стажировки
-            cards = page.query_selector_all(
-                'a[href*="yaintern"], a[href*="internship"], '
-                '[class*="vacancy"], [class*="card"], [class*="program"]'
-            )
+        # Ищем карточки или ссылки на стажировки - все одним вызовом evaluate
+        cards = await extract_cards(page, CARD_SELECTOR)
 
-            seen: set[str] = set()
-            for card in cards:
-                try:
-                    # Получаем текст и ссылку
-                    text = (card.inner_text() or "").strip()
-                    href = card.get_attribute("href") or ""
-                    
-                    # Пропускаем если это не стажировка
-                    if not text or len(text) < 3:
-                        continue
-                    
-                    # Пропускаем навигационные элементы
-                    if text in seen or text.lower() in ['главная', 'о компании', 'контакты']:
-                        continue
-                    
-                    # Формируем URL
-                    if href.startswith('http'):
-                        full_url = href
-                    elif href.startswith('/'):
-                        full_url = f"https://yandex.ru{href}"
-                    else:
-                        full_url = url
-                    
-                    # Получаем статус из родительского блока
-                    parent_text = ""
-                    try:
-                        parent_text = page.evaluate(
-                            "(el) => el.parentElement?.textContent || ''",
-                            card
-                        )
-                    except:
-                        pass
-                    
-                    status = smart_status_detection(text + " " + parent_text)
-                    
-                    seen.add(text)
-                    result.append(
-                        Internship(
-                            company=company,
-                            title=text,
-                            url=full_url,
-                            status=status or "Уточните на сайте"
-                        )
-                    )
-                except Exception:
-                    continue
-
-        finally:
-            browser.close()
+    # Те же сырые данные, что в прошлом прогоне: статусы и записи не пересобираются
+    check_payload(cards)
+    # Пропускаем короткие и навигационные элементы
+    cards = [
+        card for card in cards
+        if len(card["title"]) >= 3 and card["title"].lower() not in ['главная', 'о компании', 'контакты']
+    ]
+    for card in cards:
+        status = smart_status_detection(card["title"] + " " + card["context"])
+        # Формируем URL
+        href = card["href"]
+        if href.startswith('http'):
+            full_url = href
+        elif href.startswith('/'):
+            full_url = f"https://yandex.ru{href}"
+        else:
+            full_url = url
+        
+        result.append(
+            Internship(
+                company=company,
+                title=card["title"],
+                url=full_url,
+                status=status or "Уточните на сайте"
+            )
+        )
 
     if not result:
         result.append(
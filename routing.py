@@ -0,0 +1,131 @@
+"""
+Фильтры подписчиков и маршрутизация изменений по ним.
+Фильтр чата — до трёх условий: компании, слова в названии, события
+(new / opened / soon / closed / changed). Внутри условия — «или», между условиями — «и»;
+чат без фильтров получает всё.
+
+Фильтры компилируются в инвертированный индекс (компания -> чаты, слово -> чаты,
+событие -> чаты). Изменение находит свои чаты по спискам индекса, а не перебором фильтров:
+счётчик чата растёт на каждом совпавшем условии, чат подходит, когда совпали все его условия.
+Разбор пачки стоит O(изменений + совпадений); чаты с одинаковым набором изменений
+объединяются, и каждый отличающийся дайджест собирается один раз.
+"""
+import re
+from collections import defaultdict
+from typing import Hashable, Iterable, NamedTuple
+
+from db import Change
+from parsers.status import KIND_CLOSED, KIND_OPEN, KIND_SOON
+
+# Поля фильтра (значения колонки field в subscriber_filters)
+FIELD_COMPANY = "company"
+FIELD_KEYWORD = "keyword"
+FIELD_EVENT = "event"
+FILTER_FIELDS = (FIELD_COMPANY, FIELD_KEYWORD, FIELD_EVENT)
+
+# События изменения
+EVENT_NEW = "new"  # новая стажировка
+EVENT_OPENED = "opened"  # набор открылся (или новая стажировка сразу с открытым набором)
+EVENT_SOON = "soon"  # набор скоро откроется
+EVENT_CLOSED = "closed"  # набор закрылся
+EVENT_CHANGED = "changed"  # статус изменился, а вид статуса — нет
+EVENTS = (EVENT_NEW, EVENT_OPENED, EVENT_SOON, EVENT_CLOSED, EVENT_CHANGED)
+
+_KIND_EVENTS = {KIND_OPEN: EVENT_OPENED, KIND_SOON: EVENT_SOON, KIND_CLOSED: EVENT_CLOSED}
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(value: str) -> str:
+    """Значение фильтра и текст изменения приводятся к одному виду: регистр, ё -> е."""
+    return value.casefold().replace("ё", "е").strip()
+
+
+def tokenize(text: str) -> set[str]:
+    """Слова названия для поиска по ключевым словам."""
+    return set(_TOKEN_RE.findall(normalize(text)))
+
+
+def change_events(change: Change) -> set[str]:
+    """События изменения: новая запись и/или переход в новый вид статуса."""
+    events = {EVENT_NEW} if change.is_new else set()
+    if change.kind != change.previous_kind and change.kind in _KIND_EVENTS:
+        events.add(_KIND_EVENTS[change.kind])
+    if not events:
+        events.add(EVENT_CHANGED)
+    return events
+
+
+class Route(NamedTuple):
+    """Один вариант дайджеста: изменения и чаты, которые его получают."""
+    changes: list[Change]
+    chat_ids: list[Hashable]
+
+
+class FilterIndex:
+    """
+    Инвертированный индекс фильтров.
+    filters: chat_id -> {поле: значения}; чат без условий (пустой словарь) получает всё.
+    """
+
+    def __init__(self, filters: dict[Hashable, dict[str, Iterable[str]]]) -> None:
+        self._postings: dict[str, dict[str, list[Hashable]]] = {
+            field: defaultdict(list) for field in FILTER_FIELDS
+        }
+        self._required: dict[Hashable, int] = {}  # chat_id -> сколько условий должно совпасть
+        self.catch_all: list[Hashable] = []  # чаты без фильтров
+        for chat_id, fields in filters.items():
+            required = 0
+            for field in FILTER_FIELDS:
+                values = {normalize(v) for v in fields.get(field, ()) if normalize(v)}
+                if not values:
+                    continue
+                required += 1
+                for value in values:
+                    self._postings[field][value].append(chat_id)
+            if required:
+                self._required[chat_id] = required
+            else:
+                self.catch_all.append(chat_id)
+
+    def match(self, change: Change) -> list[Hashable]:
+        """Чаты с условиями, которым подходит изменение (без catch_all)."""
+        counts: dict[Hashable, int] = defaultdict(int)
+        keys = {
+            FIELD_COMPANY: (normalize(change.internship.company),),
+            FIELD_KEYWORD: tokenize(change.internship.title),
+            FIELD_EVENT: change_events(change),
+        }
+        for field, values in keys.items():
+            postings = self._postings[field]
+            # Чат засчитывает поле один раз, даже если совпало несколько его значений
+            matched: set[Hashable] = set()
+            for value in values:
+                matched.update(postings.get(value, ()))
+            for chat_id in matched:
+                counts[chat_id] += 1
+        return [chat_id for chat_id, count in counts.items() if count == self._required[chat_id]]
+
+    def route(self, changes: list[Change], extra: Iterable[Hashable] = ()) -> list[Route]:
+        """
+        Разложить пачку изменений по чатам. extra — чаты без фильтров вне индекса
+        (например, TELEGRAM_CHAT_ID): получают всё, как catch_all.
+        Возвращает по одному Route на каждый отличающийся набор изменений, порядок
+        изменений внутри набора — как в пачке.
+        """
+        everyone = list(dict.fromkeys([*extra, *self.catch_all]))
+        skip = set(everyone)
+        by_chat: dict[Hashable, list[int]] = defaultdict(list)
+        for position, change in enumerate(changes):
+            for chat_id in self.match(change):
+                if chat_id not in skip:
+                    by_chat[chat_id].append(position)
+
+        groups: dict[tuple[int, ...], list[Hashable]] = defaultdict(list)
+        if changes and everyone:
+            groups[tuple(range(len(changes)))].extend(everyone)
+        for chat_id, positions in by_chat.items():
+            groups[tuple(positions)].append(chat_id)
+        return [
+            Route(changes=[changes[p] for p in positions], chat_ids=chat_ids)
+            for positions, chat_ids in groups.items()
+        ]
@@ -0,0 +1,252 @@
+"""
+Адаптивное расписание опроса источников.
+У каждого источника свой интервал и время следующего запуска (таблица source_schedule,
+переживает перезапуски). После прогона источника интервал пересчитывается:
+- были изменения — частый опрос (SCHEDULE_MIN_SEC);
+- есть программы со статусом «скоро откроется» — не реже SCHEDULE_SOON_SEC;
+- результат не менялся — интервал растёт в SCHEDULE_BACKOFF раз, до SCHEDULE_MAX_SEC;
+- ошибка, таймаут, одни заглушки или обвал числа записей — пауза растёт вдвое с каждой
+  ошибкой подряд, от SCHEDULE_MIN_SEC до SCHEDULE_MAX_SEC. После SOURCE_BREAKER_THRESHOLD
+  ошибок подряд цепь источника размыкается: до конца паузы его не собирает даже /check,
+  отдаётся последний удачный результат; первый удачный прогон цепь замыкает;
+- к времени запуска добавляется случайный сдвиг ±SCHEDULE_JITTER интервала,
+  чтобы источники не собирались в один прогон.
+Источник без записи в расписании считается «пора».
+
+Между полными сборами источники с пробой (Source.probe, parsers/probe.py) раз в
+PROBE_INTERVAL_SEC проверяются дешёвым HTTP-запросом. Если отпечаток пробы изменился,
+источнику сразу становится «пора» — но не раньше PROBE_COOLDOWN_SEC после прошлого
+полного сбора, так что шумная страница не превращает пробы в постоянный сбор.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import config
+from db import (
+    Change,
+    advance_source_runs,
+    load_probe_signatures,
+    load_source_schedule,
+    save_probe_signatures,
+    save_source_schedule,
+)
+from parsers import SOURCES, SourceOutcome
+from parsers.base import Internship, Source, SourceHealth
+from parsers.status import KIND_SOON, status_kind
+
+
+class SourceSchedule(NamedTuple):
+    """Расписание одного источника (время — UTC)."""
+    company: str
+    interval: float  # секунды до следующего запуска, без сдвига
+    next_run_at: datetime
+    failures: int = 0  # ошибок подряд
+    last_run_at: datetime | None = None
+    last_change_at: datetime | None = None
+    last_error: str = ""
+    suspect: str = ""  # отпечаток обвалившегося результата, ждущего подтверждения
+
+
+class ProbeOutcome(NamedTuple):
+    """Итог пробы одного источника."""
+    company: str
+    status: str  # "hit" — отпечаток изменился / "same" / "new" — первый отпечаток / "error"
+    duration: float  # секунды
+    error: str = ""
+
+    def summary(self) -> str:
+        """Короткая строка для логов."""
+        line = f"[{self.company}] проба: {self.status} за {self.duration:.1f} с"
+        return f"{line}: {self.error}" if self.error else line
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value.rstrip("Z")) if value else None
+
+
+def _format_time(value: datetime | None) -> str | None:
+    # Всегда с микросекундами: строки сравниваются в SQL (advance_source_runs), формат должен быть один
+    return value.isoformat(timespec="microseconds") + "Z" if value else None
+
+
+def load_schedule(db_path: Path) -> dict[str, SourceSchedule]:
+    """Расписание из БД по компаниям."""
+    return {
+        row["company"]: SourceSchedule(
+            company=row["company"],
+            interval=row["interval_sec"],
+            next_run_at=_parse_time(row["next_run_at"]),
+            failures=row["failures"],
+            last_run_at=_parse_time(row["last_run_at"]),
+            last_change_at=_parse_time(row["last_change_at"]),
+            last_error=row["last_error"],
+            suspect=row["suspect_fingerprint"],
+        )
+        for row in load_source_schedule(db_path)
+    }
+
+
+def due_sources(
+    schedule: dict[str, SourceSchedule],
+    sources: Iterable[Source] = SOURCES,
+    now: datetime | None = None,
+) -> list[Source]:
+    """Источники, у которых подошло время (или которых ещё нет в расписании), в порядке SOURCES."""
+    now = now or datetime.utcnow()
+    return [
+        s for s in sources
+        if s.company not in schedule or schedule[s.company].next_run_at <= now
+    ]
+
+
+def breaker_open(planned: SourceSchedule | None) -> bool:
+    """Цепь источника разомкнута (пока не наступит next_run_at)."""
+    return planned is not None and planned.failures >= config.SOURCE_BREAKER_THRESHOLD
+
+
+def source_health(schedule: dict[str, SourceSchedule]) -> dict[str, SourceHealth]:
+    """Здоровье источников для collect_all_internships()."""
+    return {
+        company: SourceHealth(
+            company, open_until=planned.next_run_at if breaker_open(planned) else None, suspect=planned.suspect,
+        )
+        for company, planned in schedule.items()
+    }
+
+
+def next_run(schedule: dict[str, SourceSchedule], sources: Iterable[Source] = SOURCES) -> SourceSchedule | None:
+    """Источник, который опрашивается следующим (None — кого-то ещё нет в расписании)."""
+    planned = [schedule.get(s.company) for s in sources]
+    if not planned or None in planned:
+        return None
+    return min(planned, key=lambda s: s.next_run_at)
+
+
+def plan(
+    previous: SourceSchedule | None,
+    outcome: SourceOutcome,
+    changed: bool,
+    has_soon: bool,
+    now: datetime,
+    rng: random.Random | None = None,
+) -> SourceSchedule:
+    """Следующее расписание источника по итогу его прогона."""
+    rng = rng or random
+    interval = previous.interval if previous else config.SCHEDULE_BASE_SEC
+    failures = 0
+    if outcome.status != "ok":
+        failures = (previous.failures if previous else 0) + 1
+        interval = config.SCHEDULE_MIN_SEC * 2 ** (failures - 1)
+    elif changed:
+        interval = config.SCHEDULE_MIN_SEC
+    else:
+        interval *= config.SCHEDULE_BACKOFF
+    if outcome.status == "ok" and has_soon:
+        interval = min(interval, config.SCHEDULE_SOON_SEC)
+    interval = min(max(interval, config.SCHEDULE_MIN_SEC), config.SCHEDULE_MAX_SEC)
+
+    jitter = rng.uniform(-config.SCHEDULE_JITTER, config.SCHEDULE_JITTER)
+    return SourceSchedule(
+        company=outcome.company,
+        interval=interval,
+        next_run_at=now + timedelta(seconds=interval * (1 + jitter)),
+        failures=failures,
+        last_run_at=now,
+        last_change_at=now if changed else (previous.last_change_at if previous else None),
+        last_error=outcome.error if outcome.status != "ok" else "",
+        suspect=outcome.fingerprint if outcome.status == "suspect" else "",
+    )
+
+
+def update_schedule(
+    db_path: Path,
+    outcomes: Iterable[SourceOutcome],
+    internships: Iterable[Internship],
+    changes: Iterable[Change],
+    now: datetime | None = None,
+) -> dict[str, SourceSchedule]:
+    """
+    Пересчитать и сохранить расписание источников, собранных в этом прогоне
+    (источники с разомкнутой цепью не собирались — их расписание не меняется).
+    """
+    now = now or datetime.utcnow()
+    changed = {c.internship.company for c in changes}
+    soon = {i.company for i in internships if status_kind(i.status) == KIND_SOON}
+    schedule = load_schedule(db_path)
+    updated = {
+        o.company: plan(schedule.get(o.company), o, o.company in changed, o.company in soon, now)
+        for o in outcomes
+        if o.status != "open"
+    }
+    save_source_schedule(db_path, [_schedule_row(s) for s in updated.values()])
+    return updated
+
+
+def _schedule_row(s: SourceSchedule) -> tuple:
+    return (
+        s.company, s.interval, _format_time(s.next_run_at), s.failures,
+        _format_time(s.last_run_at), _format_time(s.last_change_at), s.last_error, s.suspect,
+    )
+
+
+def _run_probe(source: Source) -> tuple[str | None, ProbeOutcome]:
+    started = time.monotonic()
+    try:
+        signature = source.probe(source.url)
+    except Exception as e:
+        return None, ProbeOutcome(source.company, "error", time.monotonic() - started, str(e))
+    return signature, ProbeOutcome(source.company, "same", time.monotonic() - started)
+
+
+def probe_sources(
+    db_path: Path,
+    sources: Iterable[Source] = SOURCES,
+    now: datetime | None = None,
+    max_workers: int | None = None,
+) -> list[ProbeOutcome]:
+    """
+    Прогнать пробы источников, которым по расписанию ещё не пора (вызывать вне event loop).
+    Источникам с изменившимся отпечатком переносится время следующего полного сбора.
+    Источники с разомкнутой цепью не пробуются: их ждёт пауза.
+    """
+    now = now or datetime.utcnow()
+    schedule = load_schedule(db_path)
+    due = {s.company for s in due_sources(schedule, sources, now)}
+    probed = [
+        s for s in sources
+        if s.probe is not None and s.company not in due and not breaker_open(schedule.get(s.company))
+    ]
+    if not probed:
+        return []
+
+    known = load_probe_signatures(db_path)
+    with ThreadPoolExecutor(max_workers=max_workers or config.COLLECT_MAX_WORKERS) as pool:
+        results = list(pool.map(_run_probe, probed))
+
+    signatures: dict[str, str] = {}
+    outcomes: list[ProbeOutcome] = []
+    hits: list[tuple[str, str, str | None]] = []
+    for signature, outcome in results:
+        if signature is not None:
+            signatures[outcome.company] = signature
+            previous = known.get(outcome.company)
+            if previous is None:
+                outcome = outcome._replace(status="new")
+            elif previous != signature:
+                outcome = outcome._replace(status="hit")
+                planned = schedule[outcome.company]
+                earliest = now
+                if planned.last_run_at is not None:
+                    earliest = max(now, planned.last_run_at + timedelta(seconds=config.PROBE_COOLDOWN_SEC))
+                hits.append((outcome.company, _format_time(earliest), _format_time(planned.last_run_at)))
+        outcomes.append(outcome)
+
+    save_probe_signatures(db_path, signatures, _format_time(now))
+    # Пробы идут секунды: пишем только перенос next_run_at, а не строки из снимка расписания
+    if hits:
+        advance_source_runs(db_path, hits)
+    return outcomes
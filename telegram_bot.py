@@ -5,10 +5,37 @@
 from __future__ import annotations
 
 import asyncio
-from telegram import Bot
+from pathlib import Path
+from typing import NamedTuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ParseMode
+from telegram.error import BadRequest
+from telegram.ext import CallbackQueryHandler, ContextTypes
 
+from cache import BlockCache, VersionedCache
+from config import SUBSCRIBER_MAX_FAILURES
+from db import Change, get_internships_page, get_stats, get_subscriber_filters, record_deliveries
+from delivery import ChatDelivery, DeliveryEngine, DeliveryStats, normalize_chat_id
+from packing import MESSAGE_LIMIT, Section, group_blocks, message_length, pack_sections
 from parsers.base import Internship
+from parsers.status import KIND_CLOSED, KIND_OPEN, KIND_SOON, status_kind
+from routing import FilterIndex
+
+# Значок строки статуса по его виду
+STATUS_ICONS = {KIND_OPEN: "🔓", KIND_SOON: "⏳", KIND_CLOSED: "🔒"}
+DEFAULT_STATUS_ICON = "📊"
+
+# Постраничные списки ботов: стажировок на странице и виды списков (в callback_data)
+PAGE_SIZE = 10
+LIST_OPEN = "o"
+LIST_ALL = "a"
+_LIST_TITLES = {LIST_OPEN: "🆕 <b>Открытые стажировки</b>", LIST_ALL: "📋 <b>Все стажировки</b>"}
+# Префикс callback_data кнопок навигации: "list:<вид>:<n|p>:<rowid курсора>:<номер первой строки>"
+LIST_CALLBACK_PREFIX = "list:"
+
+# Блоки стажировок по (company|title, отпечаток url+status): одни и те же для дайджеста и списков
+_blocks = BlockCache()
 
 
 def _escape_html(s: str) -> str:
@@ -21,34 +48,175 @@ def _escape_html(s: str) -> str:
     )
 
 
-def build_digest_message(new: list[Internship], updated: list[Internship]) -> str:
+def _render_block(company: str, title: str, status: str, url: str, kind: str) -> str:
+    block = f"🏢 <b>{_escape_html(company)}</b> — {_escape_html(title)}"
+    if status:
+        block += f"\n{STATUS_ICONS.get(kind, DEFAULT_STATUS_ICON)} {_escape_html(status)}"
+    block += f'\n🔗 <a href="{_escape_html(url)}">Ссылка</a>\n'
+    return block
+
+
+def render_internship_block(i: Internship) -> str:
+    """HTML-блок одной стажировки (из кэша, если такая строка уже рендерилась)."""
+    return _blocks.get(
+        (i.unique_key(), i.fingerprint()),
+        lambda: _render_block(i.company, i.title, i.status, i.url, status_kind(i.status)),
+    )
+
+
+def render_row_block(row) -> str:
+    """То же для строки БД (db.get_internships_page): отпечаток уже посчитан."""
+    return _blocks.get(
+        (row["id"], row["fingerprint"]),
+        lambda: _render_block(row["company"], row["title"], row["status"], row["url"], row["status_kind"]),
+    )
+
+
+class ListPage(NamedTuple):
+    """Одна страница списка: текст сообщения и кнопки навигации."""
+    text: str
+    markup: InlineKeyboardMarkup | None
+
+
+def build_list_page(db_path: Path, kind: str | None = LIST_ALL, data: str | None = None) -> ListPage | None:
+    """
+    Страница списка стажировок (LIST_OPEN / LIST_ALL) — одно сообщение.
+    Без data — первая страница списка kind; data — callback_data нажатой кнопки
+    («вперёд» / «назад»), вид списка тогда берётся из неё.
+    Страница выбирается keyset-запросом от курсора, так что цена не зависит от размера базы.
+    None — список пуст.
+    """
+    direction, cursor, start = "n", None, 0
+    if data:
+        kind, direction, cursor_text, start_text = data[len(LIST_CALLBACK_PREFIX):].split(":")
+        cursor, start = int(cursor_text), int(start_text)
+
+    only_open = kind == LIST_OPEN
+    if direction == "p":
+        rows = get_internships_page(db_path, only_open, before=cursor, limit=PAGE_SIZE)
+    else:
+        rows = get_internships_page(db_path, only_open, after=cursor, limit=PAGE_SIZE)
+    if not rows:
+        return None
+
+    # Сообщение не длиннее лимита: не поместившиеся блоки уходят на соседнюю страницу.
+    # Назад страница набирается от курсора, то есть с конца
+    backwards = direction == "p"
+    budget = MESSAGE_LIMIT - 200  # запас на заголовок страницы
+    blocks: list[str] = []
+    length = 0
+    for row in reversed(rows) if backwards else rows:
+        block = "\n" + render_row_block(row)
+        size = message_length(block)
+        if blocks and length + size > budget:
+            break
+        blocks.append(block)
+        length += size
+    if backwards:
+        trimmed = len(blocks) < len(rows)
+        # Неполная выборка без обрезки - дошли до начала. Обрезанные блоки лежат раньше
+        # показанных, так что перед страницей точно есть строки и кнопка «назад» нужна
+        reached_start = len(rows) < PAGE_SIZE and not trimmed
+        rows, blocks = rows[len(rows) - len(blocks):], blocks[::-1]
+        # start - номер первой строки текущей страницы, считается по показанным строкам
+        start = 0 if reached_start else max(start - len(rows), 1 if trimmed else 0)
+    else:
+        rows = rows[:len(blocks)]
+
+    stats = get_stats(db_path)
+    total = stats["open"] if only_open else stats["total"]
+    # Номера строк справочные: между нажатиями база могла измениться
+    start = min(start, max(total - len(rows), 0))
+    header = f"{_LIST_TITLES[kind]} ({start + 1}–{start + len(rows)} из {total}):\n"
+
+    buttons = []
+    if start > 0:
+        buttons.append(InlineKeyboardButton(
+            "← Назад", callback_data=f"{LIST_CALLBACK_PREFIX}{kind}:p:{rows[0]['rowid']}:{start}",
+        ))
+    if start + len(rows) < total:
+        buttons.append(InlineKeyboardButton(
+            "Вперёд →", callback_data=f"{LIST_CALLBACK_PREFIX}{kind}:n:{rows[-1]['rowid']}:{start + len(rows)}",
+        ))
+    markup = InlineKeyboardMarkup([buttons]) if buttons else None
+    return ListPage(header + "".join(blocks), markup)
+
+
+class ListPages:
     """
-    Собрать одно сообщение-дайджест: сначала новые стажировки, потом обновления статуса.
-    Формат HTML для parse_mode=HTML.
+    Постраничные списки бота: страницы из кэша ответов (до изменения данных в БД)
+    и обработчик кнопок навигации — один на оба бота.
     """
-    parts: list[str] = []
+
+    def __init__(self, db_path: Path, cache: VersionedCache) -> None:
+        self.db_path = Path(db_path)
+        self.cache = cache
+
+    def first(self, kind: str) -> ListPage | None:
+        """Первая страница списка kind; None — список пуст или базы нет."""
+        return self._get(kind, None)
+
+    def turn(self, data: str) -> ListPage | None:
+        """Страница по нажатой кнопке (callback_data); None — список пуст или базы нет."""
+        return self._get(None, data)
+
+    def _get(self, kind: str | None, data: str | None) -> ListPage | None:
+        if not self.db_path.exists():
+            return None
+        return self.cache.get(("page", kind, data), lambda: build_list_page(self.db_path, kind, data))
+
+    async def callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Кнопки «Назад» / «Вперёд» под списком: следующая страница — правкой того же сообщения."""
+        query = update.callback_query
+        await query.answer()
+        page = self.turn(query.data)
+        try:
+            if page is None:
+                await query.edit_message_text("📭 Список пуст.")
+            else:
+                await query.edit_message_text(
+                    page.text, parse_mode=ParseMode.HTML, reply_markup=page.markup, disable_web_page_preview=True
+                )
+        except BadRequest as e:
+            # Повторное нажатие той же кнопки: страница не изменилась
+            if "not modified" not in str(e).lower():
+                raise
+
+    def handler(self) -> CallbackQueryHandler:
+        """Обработчик кнопок навигации для app.add_handler()."""
+        return CallbackQueryHandler(self.callback, pattern=f"^{LIST_CALLBACK_PREFIX}")
+
+
+def build_digest_messages(new: list[Internship], updated: list[Internship]) -> list[str]:
+    """
+    Дайджест: сначала новые стажировки, потом обновления статуса — готовые к отправке
+    сообщения в формате HTML (parse_mode=HTML), каждое не длиннее лимита Telegram.
+    Блоки одной компании держатся вместе, сообщений — как можно меньше (см. packing.py).
+    Пустой список — изменений нет.
+    """
+    sections: list[Section] = []
 
     if new:
-        parts.append("🆕 <b>Новые стажировки:</b>\n")
-        for i in new:
-            status_line = f"🔓 {_escape_html(i.status)}" if i.status else ""
-            block = f"🏢 {_escape_html(i.company)} — {_escape_html(i.title)}"
-            if status_line:
-                block += f"\n{status_line}"
-            block += f'\n🔗 <a href="{_escape_html(i.url)}">{_escape_html(i.url)}</a>\n'
-            parts.append(block)
+        sections.append(Section(
+            "🆕 <b>Новые стажировки:</b>\n",
+            group_blocks((i.company, render_internship_block(i)) for i in new),
+        ))
 
     if updated:
-        parts.append("🔄 <b>Обновление статуса:</b>\n")
-        for i in updated:
-            status_line = f"🔓 {_escape_html(i.status)}" if i.status else ""
-            block = f"🏢 {_escape_html(i.company)} — {_escape_html(i.title)}"
-            if status_line:
-                block += f"\n{status_line}"
-            block += f'\n🔗 <a href="{_escape_html(i.url)}">{_escape_html(i.url)}</a>\n'
-            parts.append(block)
+        sections.append(Section(
+            "🔄 <b>Обновление статуса:</b>\n",
+            group_blocks((i.company, render_internship_block(i)) for i in updated),
+        ))
 
-    return "\n".join(parts).strip()
+    return pack_sections(sections)
+
+
+def build_changes_messages(changes: list[Change]) -> list[str]:
+    """Дайджест по списку изменений из upsert_and_get_changes()."""
+    return build_digest_messages(
+        [c.internship for c in changes if c.is_new],
+        [c.internship for c in changes if not c.is_new],
+    )
 
 
 def build_no_changes_message(total: int) -> str:
@@ -56,36 +224,86 @@ def build_no_changes_message(total: int) -> str:
     return f"📋 <b>Проверка выполнена.</b>\n\nИзменений нет. Всего отслеживается стажировок: <b>{total}</b>."
 
 
-def send_digest(bot_token: str, chat_id: str, text: str) -> None:
+def send_digest(bot_token: str, chat_id: str, text: str | list[str]) -> None:
     """
-    Отправить сообщение в Telegram.
+    Отправить сообщение (или несколько сообщений подряд) в Telegram из синхронного кода.
+    Все части уходят через один DeliveryEngine: одна сессия, лимиты и повторы при 429.
     
     Args:
         bot_token: токен Telegram бота
         chat_id: ID чата или канала (может быть числом или @username)
-        text: текст сообщения в формате HTML
+        text: текст сообщения в формате HTML или список таких сообщений
     """
+    texts = [text] if isinstance(text, str) else list(text)
     try:
-        bot = Bot(token=bot_token)
-        
-        # Определяем, число ли chat_id или строка
-        try:
-            chat_id_int = int(chat_id)
-        except ValueError:
-            chat_id_int = chat_id
-        
-        # Используем asyncio для отправки сообщения
-        asyncio.run(_send_message_async(bot, chat_id_int, text))
-        
+        stats = asyncio.run(_send_async(bot_token, chat_id, texts))
+        print(stats.summary())
     except Exception as e:
         print(f"Ошибка отправки в Telegram: {e}")
         raise
 
 
-async def _send_message_async(bot: Bot, chat_id: int | str, text: str) -> None:
-    """Вспомогательная async-функция для отправки сообщения."""
-    await bot.send_message(
-        chat_id=chat_id,
-        text=text,
-        parse_mode=ParseMode.HTML,
-    )
\ No newline at end of file
+async def _send_async(bot_token: str, chat_id: str, texts: list[str]) -> DeliveryStats:
+    """Вспомогательная async-функция для отправки сообщений."""
+    async with DeliveryEngine(token=bot_token) as engine:
+        await engine.send_many(chat_id, texts, parse_mode=ParseMode.HTML)
+        return engine.stats()
+
+
+async def fan_out_digest(
+    engine: DeliveryEngine,
+    db_path: Path,
+    chat_id: str | None,
+    changes: list[Change],
+) -> list[ChatDelivery]:
+    """
+    Разослать изменения в чат TELEGRAM_CHAT_ID (все изменения) и подписчикам —
+    каждому только то, что проходит его фильтр (см. routing.FilterIndex).
+    Каждый отличающийся дайджест собирается один раз и уходит сразу всем своим чатам.
+    Чаты обслуживаются параллельно (DeliveryEngine.fan_out), ошибка в одном чате
+    не мешает остальным; итоги по подписчикам пишутся в БД, недоступные чаты отключаются.
+    """
+    filters = await asyncio.to_thread(get_subscriber_filters, db_path)
+    routes = FilterIndex(filters).route(changes, extra=[normalize_chat_id(chat_id)] if chat_id else [])
+    batches = await asyncio.gather(*(
+        engine.fan_out(route.chat_ids, build_changes_messages(route.changes), parse_mode=ParseMode.HTML)
+        for route in routes
+    ))
+    results = [result for batch in batches for result in batch]
+    disabled = await asyncio.to_thread(record_deliveries, db_path, results, SUBSCRIBER_MAX_FAILURES)
+
+    failed = [r for r in results if not r.ok]
+    line = (
+        f"Рассылка: вариантов дайджеста {len(routes)}, чатов {len(results)}, "
+        f"доставлено {len(results) - len(failed)}, ошибок {len(failed)}"
+    )
+    if disabled:
+        line += f", отключено подписчиков {len(disabled)}"
+    print(line)
+    for r in failed[:10]:
+        print(f"  {r.chat_id}: {r.error}")
+    if len(failed) > 10:
+        print(f"  ... и ещё {len(failed) - 10}")
+    return results
+
+
+def broadcast_digest(
+    bot_token: str,
+    chat_id: str | None,
+    changes: list[Change],
+    db_path: Path,
+) -> list[ChatDelivery]:
+    """fan_out_digest() из синхронного кода (main.py): свой DeliveryEngine на одну рассылку."""
+    return asyncio.run(_broadcast_async(bot_token, chat_id, changes, db_path))
+
+
+async def _broadcast_async(
+    bot_token: str,
+    chat_id: str | None,
+    changes: list[Change],
+    db_path: Path,
+) -> list[ChatDelivery]:
+    async with DeliveryEngine(token=bot_token) as engine:
+        results = await fan_out_digest(engine, db_path, chat_id, changes)
+        print(engine.stats().summary())
+        return results
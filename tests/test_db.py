@@ -0,0 +1,64 @@
+"""Тесты db.py на временной базе."""
+import sqlite3
+
+import db
+from db import get_company_stats, get_stats, upsert_and_get_changes
+from parsers.base import Internship
+
+
+def _recount(db_path) -> tuple:
+    """Счётчики /stats, пересчитанные прямо по internships."""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*), SUM(status_kind IS 'open'), SUM(status_kind IS 'soon'), "
+            "SUM(status_kind IS 'closed'), COUNT(DISTINCT company) FROM internships"
+        ).fetchone()
+
+
+def test_status_change_in_single_row_company_keeps_counters(tmp_path):
+    db_path = tmp_path / "internships.db"
+    batch = [
+        Internship("Сбер", "Разработка", "https://example.com/sber", "Набор открыт"),
+        Internship("VK", "Backend", "https://example.com/vk/1", "Набор открыт"),
+        Internship("VK", "Frontend", "https://example.com/vk/2", "Набор закрыт"),
+    ]
+    upsert_and_get_changes(db_path, batch)
+
+    for status in ("Набор закрыт", "Скоро откроется", "Набор открыт"):
+        batch[0] = Internship("Сбер", "Разработка", "https://example.com/sber", status)
+        changes = upsert_and_get_changes(db_path, batch)
+        assert len(changes) == 1
+
+        stats = get_stats(db_path)
+        recount = _recount(db_path)
+        assert tuple(stats[key] for key in ("total", "open", "soon", "closed", "companies")) == recount
+        assert stats["companies"] == 2
+        assert {row["company"]: row["total"] for row in get_company_stats(db_path)} == {"Сбер": 1, "VK": 2}
+
+
+def test_upsert_holds_write_lock_between_read_and_write(tmp_path, monkeypatch):
+    db_path = tmp_path / "internships.db"
+    item = Internship("VK", "Backend", "https://example.com/vk", "Набор открыт")
+    upsert_and_get_changes(db_path, [])
+    blocked = []
+
+    def known_rows_then_race(conn, companies):
+        known = known_rows(conn, companies)
+        # Второй процесс (cron) пытается записать ту же строку между чтением и записью
+        with sqlite3.connect(db_path, timeout=0.1) as other:
+            try:
+                other.execute(
+                    "INSERT INTO internships (id, company, title, url, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, '')",
+                    (item.unique_key(), item.company, item.title, item.url, item.status),
+                )
+            except sqlite3.OperationalError:
+                blocked.append(True)
+        return known
+
+    known_rows = db._known_rows
+    monkeypatch.setattr(db, "_known_rows", known_rows_then_race)
+    changes = upsert_and_get_changes(db_path, [item])
+
+    assert blocked
+    assert [change.internship for change in changes] == [item]
@@ -0,0 +1,42 @@
+"""Тесты delivery.py с ботом-заглушкой (без сети)."""
+import asyncio
+
+from delivery import CHAT_STATE_SWEEP, DeliveryEngine
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[tuple] = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        return text
+
+
+def test_idle_chat_state_is_evicted():
+    bot = FakeBot()
+    # Лимиты такие, что bucket чата восстанавливается сразу после отправки
+    engine = DeliveryEngine(bot=bot, global_rate=1e9, chat_rate=1e9, group_rate=1e9)
+
+    async def run() -> None:
+        for chat_id in range(1, 5 * CHAT_STATE_SWEEP):
+            await engine.send(chat_id, "текст")
+
+    asyncio.run(run())
+    assert len(bot.sent) == 5 * CHAT_STATE_SWEEP - 1
+    assert len(engine._chats) <= CHAT_STATE_SWEEP
+
+
+def test_chat_in_use_or_paused_is_kept():
+    engine = DeliveryEngine(bot=FakeBot(), global_rate=1e9, chat_rate=1e9, group_rate=1e9)
+
+    async def run() -> None:
+        busy = engine._chat(1)
+        busy.users += 1
+        engine._chat(2).bucket.pause(60)
+        for chat_id in range(3, 3 + CHAT_STATE_SWEEP):
+            await engine.send(chat_id, "текст")
+        assert engine._chats[1] is busy
+        assert 2 in engine._chats
+
+    asyncio.run(run())
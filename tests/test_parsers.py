@@ -0,0 +1,51 @@
+"""Тесты кэшей парсеров: отпечаток сырых данных и кэш разбора HTTP-клиента."""
+from types import SimpleNamespace
+
+import pytest
+
+from parsers import base, http_client
+from parsers.base import PayloadUnchanged, check_payload, track_payload
+from parsers.http_client import HttpClient
+
+PAYLOAD = [{"title": "Backend", "status": "Набор открыт"}]
+
+
+def _fingerprint(payload) -> str:
+    with track_payload() as check:
+        check_payload(payload)
+    return check.fingerprint
+
+
+def test_same_payload_is_skipped():
+    with pytest.raises(PayloadUnchanged):
+        with track_payload(_fingerprint(PAYLOAD)):
+            check_payload(PAYLOAD)
+
+
+def test_parser_change_invalidates_payload_fingerprint(monkeypatch):
+    previous = _fingerprint(PAYLOAD)
+    monkeypatch.setattr(base, "parser_version", lambda: "другой код")
+    with track_payload(previous) as check:
+        check_payload(PAYLOAD)
+    assert check.fingerprint != previous
+
+
+def _response(status_code: int):
+    return SimpleNamespace(
+        status_code=status_code, headers={"ETag": '"v1"'}, content=b"<html></html>",
+        encoding="utf-8", raise_for_status=lambda: None,
+    )
+
+
+def test_parser_change_invalidates_remembered_payload(tmp_path, monkeypatch):
+    client = HttpClient(cache_dir=tmp_path)
+    url = "https://example.com/"
+    monkeypatch.setattr(client._session, "get", lambda *args, **kwargs: _response(200))
+    client.get(url)
+    client.remember(url, PAYLOAD)
+
+    monkeypatch.setattr(client._session, "get", lambda *args, **kwargs: _response(304))
+    assert client.get(url).payload == PAYLOAD
+    monkeypatch.setattr(http_client, "parser_version", lambda: "другой код")
+    result = client.get(url)
+    assert result.not_modified and result.payload is None
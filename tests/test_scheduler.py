@@ -0,0 +1,53 @@
+"""Тесты scheduler.py на временной базе."""
+from datetime import datetime, timedelta
+
+from db import save_probe_signatures, save_source_schedule
+from parsers.base import Source
+from scheduler import SourceSchedule, _schedule_row, load_schedule, probe_sources
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+def _source(probe) -> Source:
+    return Source("VK", "https://example.com/vk", lambda url: [], probe=probe)
+
+
+def _planned(**fields) -> SourceSchedule:
+    values = dict(
+        company="VK", interval=3600.0, next_run_at=NOW + timedelta(hours=1),
+        last_run_at=NOW - timedelta(hours=1),
+    )
+    values.update(fields)
+    return SourceSchedule(**values)
+
+
+def test_probe_hit_only_moves_next_run(tmp_path):
+    db_path = tmp_path / "internships.db"
+    save_source_schedule(db_path, [_schedule_row(_planned(failures=1, last_error="timeout"))])
+    save_probe_signatures(db_path, {"VK": "old"}, "")
+
+    outcomes = probe_sources(db_path, [_source(lambda url: "new")], now=NOW)
+
+    assert [o.status for o in outcomes] == ["hit"]
+    planned = load_schedule(db_path)["VK"]
+    assert planned.next_run_at == NOW
+    assert (planned.failures, planned.last_error, planned.interval) == (1, "timeout", 3600.0)
+
+
+def test_probe_does_not_overwrite_run_finished_during_probe(tmp_path):
+    db_path = tmp_path / "internships.db"
+    save_source_schedule(db_path, [_schedule_row(_planned())])
+    save_probe_signatures(db_path, {"VK": "old"}, "")
+    finished = _planned(
+        interval=600.0, next_run_at=NOW + timedelta(hours=3), failures=3,
+        last_run_at=NOW, last_error="timeout",
+    )
+
+    def probe(url: str) -> str:
+        # Пока идёт проба, прогон источника успевает закончиться и записать расписание
+        save_source_schedule(db_path, [_schedule_row(finished)])
+        return "new"
+
+    probe_sources(db_path, [_source(probe)], now=NOW)
+
+    assert load_schedule(db_path)["VK"] == finished
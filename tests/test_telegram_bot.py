@@ -0,0 +1,72 @@
+"""Тесты постраничных списков telegram_bot.py на временной базе."""
+import re
+
+from db import upsert_and_get_changes
+from parsers.base import Internship
+from packing import MESSAGE_LIMIT, message_length
+from telegram_bot import LIST_ALL, build_list_page, render_internship_block
+
+_HEADER_RE = re.compile(r"\((\d+)–(\d+) из (\d+)\)")
+_TITLE_RE = re.compile(r"— (T\d\d)")
+
+
+def _buttons(page) -> dict[str, str]:
+    """Кнопки страницы: {"p" / "n": callback_data}."""
+    if page.markup is None:
+        return {}
+    return {button.callback_data.split(":")[2]: button.callback_data for button in page.markup.inline_keyboard[0]}
+
+
+def _shown(page) -> tuple[list[str], int, int]:
+    """Строки страницы (по заголовкам) и номера первой и последней строки из шапки."""
+    first, last, _total = map(int, _HEADER_RE.search(page.text).groups())
+    return _TITLE_RE.findall(page.text), first, last
+
+
+def _item(title: str) -> Internship:
+    return Internship("Компания", title, f"https://example.com/{title[:3]}", "Набор открыт")
+
+
+def _block_size(title: str) -> int:
+    return message_length("\n" + render_internship_block(_item(title)))
+
+
+def _long_title(n: int) -> str:
+    """Заголовок, блок которого помещается на страницу вдвоём с таким же, но не втроём с коротким."""
+    budget = MESSAGE_LIMIT - 200
+    title = f"T{n:02d}"
+    while 2 * _block_size(title + "!") <= budget:
+        title += "!"
+    assert 2 * _block_size(title) + _block_size("T01") > budget
+    return title
+
+
+def test_paging_back_through_trimmed_page_reaches_every_row(tmp_path):
+    db_path = tmp_path / "internships.db"
+    # Вперёд: [T01 T02] [T03 T04] [T05..T12]. Назад от T05 выборка T01..T04 неполная,
+    # но помещаются только T03 и T04 - T01 и T02 должны остаться достижимы
+    titles = [_long_title(n) if n in (2, 3, 4) else f"T{n:02d}" for n in range(1, 13)]
+    upsert_and_get_changes(db_path, [_item(title) for title in titles])
+    expected = [f"T{n:02d}" for n in range(1, 13)]
+
+    # Вперёд до последней страницы
+    page = build_list_page(db_path, LIST_ALL)
+    forward: list[str] = []
+    while True:
+        shown, first, last = _shown(page)
+        assert first == len(forward) + 1 and last == len(forward) + len(shown)
+        forward += shown
+        if "n" not in _buttons(page):
+            break
+        page = build_list_page(db_path, data=_buttons(page)["n"])
+    assert forward == expected
+
+    # Назад до первой: каждая строка видна, номера совпадают с положением в списке
+    collected, first, _last = _shown(page)
+    while "p" in _buttons(page):
+        page = build_list_page(db_path, data=_buttons(page)["p"])
+        shown, first, last = _shown(page)
+        assert shown == expected[first - 1:last]
+        collected = shown + collected
+    assert first == 1
+    assert collected == expected